@@ -0,0 +1,73 @@
+# scripts/benchmark_corpus.py
+"""
+Measure corpus extraction throughput as the number of forked workers grows.
+
+Models and the HGNC index are loaded once in the parent; each run reports
+docs/sec, speedup over one worker and parallel efficiency (speedup / workers).
+With enough documents per worker, throughput should scale close to linearly up
+to the number of physical cores.
+
+Usage:
+    python scripts/benchmark_corpus.py --corpus path/to/txt_corpus
+    python scripts/benchmark_corpus.py --eval-copies 50 --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from paper2kb.corpus import extract_corpus
+from paper2kb.extract_genes import disable_extraction_cache, load_hgnc_reference
+from paper2kb.io_utils import iter_text_files
+
+
+def default_worker_counts():
+    cores = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multiprocess corpus extraction.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--corpus", type=str, help="Directory of .txt documents")
+    group.add_argument("--eval-copies", type=int, default=20,
+                       help="Use N copies of data/eval/ner_eval.jsonl as the corpus (default)")
+    parser.add_argument("--hgnc", default="data/reference/hgnc_complete_set.txt", help="HGNC reference")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_worker_counts(), help="Worker counts to run")
+    parser.add_argument("--mode", choices=["ml", "hybrid"], default="ml",
+                        help="hybrid adds Open Targets lookups, which measure the network rather than the pool")
+    args = parser.parse_args()
+
+    if args.corpus:
+        documents = list(iter_text_files(args.corpus))
+    else:
+        with open("data/eval/ner_eval.jsonl", encoding="utf-8") as f:
+            texts = [json.loads(line)["text"] for line in f if line.strip()]
+        documents = [(f"{i}-{j}", text) for i in range(args.eval_copies) for j, text in enumerate(texts)]
+
+    disable_extraction_cache()  # every run must do the work
+    load_hgnc_reference(args.hgnc)
+    chars = sum(len(text) for _, text in documents)
+    print(f"{len(documents)} documents, {chars:,} characters, {os.cpu_count()} CPU(s)\n")
+    print(f"{'workers':>7} {'seconds':>8} {'docs/s':>8} {'speedup':>8} {'efficiency':>10}")
+
+    baseline = None
+    for workers in args.workers:
+        stats = {}
+        for _ in extract_corpus(documents, workers=workers, use_hybrid=args.mode == "hybrid", stats=stats):
+            pass
+        baseline = baseline or stats["docs_per_sec"]
+        speedup = stats["docs_per_sec"] / baseline
+        print(f"{workers:>7} {stats['seconds']:>8.2f} {stats['docs_per_sec']:>8.1f} "
+              f"{speedup:>7.2f}x {speedup / workers:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
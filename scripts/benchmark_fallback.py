@@ -0,0 +1,83 @@
+# scripts/benchmark_fallback.py
+"""
+Compare the single-pass HGNC fallback matcher against the per-symbol regex loop.
+
+Usage:
+    python scripts/benchmark_fallback.py --pmid 38790019
+    python scripts/benchmark_fallback.py --text path/to/fulltext.txt --repeat 5
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from paper2kb import extract_genes
+from paper2kb.extract_genes import load_hgnc_reference, iter_hgnc_matches, COMMON_WORD_GENES
+
+
+def regex_loop_symbols(text):
+    """Per-symbol `re.search` scan over the full text (symbols only)."""
+    found = set()
+    for hgnc_symbol in extract_genes.HGNC_SYMBOLS:
+        if hgnc_symbol in COMMON_WORD_GENES:
+            if not re.search(rf"\b{hgnc_symbol}\b", text):
+                continue
+        pattern = r'\b' + re.escape(hgnc_symbol) + r'\b'
+        if re.search(pattern, text, flags=re.IGNORECASE):
+            found.add(hgnc_symbol)
+    return found
+
+
+def single_pass_symbols(text):
+    """Single-pass matcher, restricted to official symbol hits for comparison."""
+    return {symbol for symbol, mention, _ in iter_hgnc_matches(text) if symbol == mention}
+
+
+def time_it(func, text, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HGNC fallback matching on a long paper.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--pmid", type=str, help="PubMed ID to fetch (full text preferred)")
+    group.add_argument("--text", type=str, help="Path to a local .txt file")
+    parser.add_argument("--hgnc", default="data/reference/hgnc_complete_set.txt", help="HGNC reference TSV")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method (best time is reported)")
+    args = parser.parse_args()
+
+    if args.pmid:
+        from paper2kb.fetch_paper import fetch_paper_text
+        text, source = fetch_paper_text(args.pmid, return_source=True)
+    else:
+        text, source = Path(args.text).read_text(encoding="utf-8"), "localfile"
+
+    t0 = time.perf_counter()
+    load_hgnc_reference(args.hgnc)
+    print(f"HGNC reference + matcher index loaded in {time.perf_counter() - t0:.2f}s "
+          f"({len(extract_genes.HGNC_SYMBOLS)} symbols, {len(extract_genes.HGNC_ALIASES)} aliases)")
+    print(f"Text: {len(text):,} characters ({source})")
+
+    loop_time, loop_hits = time_it(regex_loop_symbols, text, args.repeat)
+    pass_time, pass_hits = time_it(single_pass_symbols, text, args.repeat)
+
+    print(f"Regex loop:   {loop_time:8.3f}s  {len(loop_hits)} symbols")
+    print(f"Single pass:  {pass_time:8.3f}s  {len(pass_hits)} symbols")
+    print(f"Speedup:      {loop_time / max(pass_time, 1e-9):8.1f}x")
+
+    if loop_hits != pass_hits:
+        print(f"[WARN] Symbol sets differ: only loop={sorted(loop_hits - pass_hits)[:10]} "
+              f"only single pass={sorted(pass_hits - loop_hits)[:10]}")
+
+
+if __name__ == "__main__":
+    main()
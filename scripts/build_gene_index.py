@@ -0,0 +1,46 @@
+# scripts/build_gene_index.py
+"""
+Build the offline gene coordinate index used by get_coordinates.
+
+Download gene annotations for one or both genome builds, e.g.
+Homo_sapiens.GRCh38.112.gtf.gz (Ensembl) or gencode.v45.annotation.gtf.gz
+for hg38, and Homo_sapiens.GRCh37.87.gtf.gz or gencode.v19.annotation.gtf.gz
+for hg19. The resulting SQLite file is picked up automatically from
+data/reference/gene_coordinates.db, or from $PAPER2KB_GENE_INDEX.
+
+Usage:
+    python scripts/build_gene_index.py \\
+        --hg38 downloads/Homo_sapiens.GRCh38.112.gtf.gz \\
+        --hg19 downloads/gencode.v19.annotation.gtf.gz
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from paper2kb.get_coordinates import GENE_INDEX_PATH, build_gene_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline gene coordinate index.")
+    parser.add_argument("--hg38", default=None, help="GRCh38 GTF/GFF3 annotation (optionally gzipped)")
+    parser.add_argument("--hg19", default=None, help="GRCh37 GTF/GFF3 annotation (optionally gzipped)")
+    parser.add_argument("--out", default=GENE_INDEX_PATH, help="Output SQLite path")
+    args = parser.parse_args()
+
+    if not (args.hg38 or args.hg19):
+        parser.error("pass --hg38 and/or --hg19")
+
+    t0 = time.perf_counter()
+    counts = build_gene_index(args.out, hg38_path=args.hg38, hg19_path=args.hg19)
+
+    summary = ", ".join(f"{n} {build} genes" for build, n in counts.items())
+    print(f"[INFO] Wrote {summary} to {args.out} in {time.perf_counter() - t0:.1f}s")
+    if "hg19" not in counts:
+        print("[WARN] No hg19 annotation given; hg19 coordinates will still be lifted over from hg38")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# scripts/build_hgnc_index.py
+"""
+Compile data/reference/hgnc_complete_set.txt into the binary HGNC index.
+
+The index (hgnc_complete_set.idx) is memory-mapped by load_hgnc_reference, so
+startup no longer parses the TSV. scripts/update_hgnc.py runs this automatically
+after each download.
+
+Usage:
+    python scripts/build_hgnc_index.py
+    python scripts/build_hgnc_index.py --hgnc path/to/hgnc_complete_set.txt --out path/to/index.idx
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from paper2kb.hgnc_index import build_hgnc_index, open_hgnc_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the binary HGNC reference index.")
+    parser.add_argument("--hgnc", default="data/reference/hgnc_complete_set.txt", help="HGNC reference TSV")
+    parser.add_argument("--out", default=None, help="Index path (default: next to the TSV, .idx suffix)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index_path = build_hgnc_index(args.hgnc, args.out)
+    build_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    index = open_hgnc_index(index_path)
+    load_time = time.perf_counter() - t0
+
+    print(f"[INFO] Built {index_path} in {build_time:.2f}s: {len(index)} genes, "
+          f"{len(index.aliases)} aliases, {len(index.previous)} previous symbols (version {index.version})")
+    print(f"[INFO] Index opens in {load_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
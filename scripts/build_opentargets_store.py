@@ -0,0 +1,50 @@
+# scripts/build_opentargets_store.py
+"""
+Build the offline Open Targets association store used by the HGNC fallback.
+
+Download the JSON datasets from the Open Targets platform (e.g.
+association_overall_direct, diseases and targets) and point this script at
+them. The resulting SQLite file is picked up automatically from
+data/reference/opentargets_associations.db, or from $PAPER2KB_OT_STORE.
+
+Usage:
+    python scripts/build_opentargets_store.py \\
+        --associations downloads/association_overall_direct \\
+        --diseases downloads/diseases --targets downloads/targets
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from paper2kb.opentargets_utils import OT_STORE_PATH, build_association_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline Open Targets association store.")
+    parser.add_argument("--associations", required=True, help="Associations JSON-lines file or directory")
+    parser.add_argument("--diseases", default=None, help="Diseases JSON-lines file or directory (id, name)")
+    parser.add_argument("--targets", default=None, help="Targets JSON-lines file or directory (id, approvedSymbol)")
+    parser.add_argument("--min-score", type=float, default=0.0, help="Drop associations below this score")
+    parser.add_argument("--out", default=OT_STORE_PATH, help="Output SQLite path")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    written = build_association_store(args.associations, args.out, diseases_path=args.diseases,
+                                      targets_path=args.targets, min_score=args.min_score)
+
+    conn = sqlite3.connect(args.out)
+    meta = dict(conn.execute("SELECT key, value FROM store_meta"))
+    conn.close()
+
+    print(f"[INFO] Wrote {written} associations to {args.out} in {time.perf_counter() - t0:.1f}s")
+    if int(meta.get("missing_symbols", 0)):
+        print(f"[WARN] {meta['missing_symbols']} associations have no gene symbol; "
+              f"pass --targets so lookups by symbol can find them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# scripts/compare_profiles.py
+"""
+Compare NER pipeline profiles on the fixed evaluation set in data/eval/ner_eval.jsonl.
+
+For each profile this reports model load time, throughput (docs/sec through nlp.pipe)
+and precision/recall/F1 for gene symbols, disease mentions and same-sentence
+gene-disease pairs, so a deployment can choose between "accurate" and "fast".
+
+Usage:
+    python scripts/compare_profiles.py --repeat 20
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from paper2kb.extract_genes import (
+    PIPELINE_PROFILES, extract_many, get_gene_nlp, load_hgnc_reference, set_pipeline_profile
+)
+
+
+def prf(gold, predicted):
+    """Precision, recall and F1 over two sets of hashable items."""
+    tp = len(gold & predicted)
+    precision = tp / len(predicted) if predicted else 1.0
+    recall = tp / len(gold) if gold else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def disease_match(gold_name, predicted_name):
+    """Lenient disease match: one mention contains the other."""
+    return gold_name in predicted_name or predicted_name in gold_name
+
+
+def align_diseases(gold, predicted):
+    """Map predicted disease strings onto gold names where they match leniently."""
+    return {next((g for g in gold if disease_match(g, p)), p) for p in predicted}
+
+
+def evaluate(examples, repeat):
+    nlp = get_gene_nlp()
+    texts = [ex["text"] for ex in examples]
+
+    gold_genes, pred_genes = set(), set()
+    gold_diseases, pred_diseases = set(), set()
+    gold_pairs, pred_pairs = set(), set()
+
+    for ex, (_, results, _) in zip(examples, extract_many(texts, use_hybrid=False)):
+        gold_genes |= {(ex["id"], g) for g in ex["genes"]}
+        pred_genes |= {(ex["id"], r["symbol"]) for r in results}
+        gold_pairs |= {(ex["id"], g, d) for g, d in ex["pairs"]}
+        for r in results:
+            for d in align_diseases(ex["diseases"], {d.lower() for d in r["diseases"]}):
+                pred_pairs.add((ex["id"], r["symbol"], d))
+
+    for ex, doc in zip(examples, nlp.pipe(texts)):
+        found = {span.text.lower() for span in doc.spans["disease"] if span.label_ == "DISEASE"}
+        gold_diseases |= {(ex["id"], d) for d in ex["diseases"]}
+        pred_diseases |= {(ex["id"], d) for d in align_diseases(ex["diseases"], found)}
+
+    t0 = time.perf_counter()
+    n_docs = 0
+    for _ in nlp.pipe(texts * repeat):
+        n_docs += 1
+    throughput = n_docs / (time.perf_counter() - t0)
+
+    return {
+        "genes": prf(gold_genes, pred_genes),
+        "diseases": prf(gold_diseases, pred_diseases),
+        "pairs": prf(gold_pairs, pred_pairs),
+        "docs_per_sec": throughput,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare NER pipeline profiles.")
+    parser.add_argument("--eval", default="data/eval/ner_eval.jsonl", help="Evaluation set (JSON lines)")
+    parser.add_argument("--hgnc", default="data/reference/hgnc_complete_set.txt", help="HGNC reference TSV")
+    parser.add_argument("--profiles", nargs="+", default=list(PIPELINE_PROFILES), help="Profiles to compare")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the set when timing throughput")
+    args = parser.parse_args()
+
+    with open(args.eval, encoding="utf-8") as f:
+        examples = [json.loads(line) for line in f if line.strip()]
+    load_hgnc_reference(args.hgnc)
+
+    print(f"{len(examples)} evaluation documents\n")
+    print(f"{'profile':<10} {'load s':>7} {'docs/s':>8}   {'gene P/R/F1':<17} {'disease P/R/F1':<17} {'pair P/R/F1':<17}")
+    for profile in args.profiles:
+        set_pipeline_profile(profile)
+        t0 = time.perf_counter()
+        get_gene_nlp()
+        load_time = time.perf_counter() - t0
+
+        scores = evaluate(examples, args.repeat)
+        cells = ["/".join(f"{v:.2f}" for v in scores[key]) for key in ("genes", "diseases", "pairs")]
+        print(f"{profile:<10} {load_time:>7.2f} {scores['docs_per_sec']:>8.1f}   "
+              f"{cells[0]:<17} {cells[1]:<17} {cells[2]:<17}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# scripts/measure_startup.py
+"""
+Measure cold-start time of the CLI and of the Streamlit app's module imports.
+
+Each measurement runs in a fresh interpreter, so nothing is shared between runs.
+The report also lists which heavy dependencies were imported during startup.
+
+Usage:
+    python scripts/measure_startup.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+
+# Imports performed by streamlit_app/app.py before any button is pressed
+APP_IMPORTS = """
+import sys, time
+t0 = time.perf_counter()
+from paper2kb.io_utils import extract_text_from_pdf, load_text_source
+from paper2kb.fetch_paper import fetch_paper_text
+from paper2kb.extract_genes import extract_gene_disease_mentions, load_hgnc_reference
+from paper2kb.get_hgnc_metadata import enrich_with_hgnc
+from paper2kb.get_coordinates import add_coordinates
+from paper2kb.normalize_diseases import normalize_diseases
+from paper2kb.write_output import save_output
+from paper2kb.db_utils import insert_mentions_to_db
+elapsed = time.perf_counter() - t0
+heavy = [m for m in ("spacy", "fitz", "pymupdf") if m in sys.modules]
+print(f"{elapsed:.4f} {','.join(heavy) or '-'}")
+"""
+
+# Heavy dependencies reported for the CLI run
+CLI_PROBE = """
+import runpy, sys
+sys.argv = ["paper2kb", "--help"]
+try:
+    runpy.run_path({cli!r}, run_name="__main__")
+except SystemExit:
+    pass
+heavy = [m for m in ("spacy", "fitz", "pymupdf") if m in sys.modules]
+sys.stderr.write("HEAVY " + (",".join(heavy) or "-") + "\\n")
+"""
+
+
+def run(cmd, env):
+    t0 = time.perf_counter()
+    result = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=ROOT)
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Paper2KB cold-start time.")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement (median is reported)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    cli = str(SRC / "paper2kb" / "cli.py")
+
+    # CLI --help, wall clock including interpreter startup
+    times, heavy = [], "-"
+    for _ in range(args.runs):
+        elapsed, result = run([sys.executable, "-c", CLI_PROBE.format(cli=cli)], env)
+        times.append(elapsed)
+        for line in result.stderr.splitlines():
+            if line.startswith("HEAVY "):
+                heavy = line.split(" ", 1)[1]
+    print(f"CLI --help:          {statistics.median(times):.3f}s  (heavy modules imported: {heavy})")
+
+    # Streamlit app module imports, measured inside the interpreter
+    times, heavy = [], "-"
+    for _ in range(args.runs):
+        _, result = run([sys.executable, "-c", APP_IMPORTS], env)
+        if result.returncode != 0:
+            print(result.stderr.strip().splitlines()[-1])
+            return
+        elapsed, heavy = result.stdout.split()
+        times.append(float(elapsed))
+    print(f"Streamlit imports:   {statistics.median(times):.3f}s  (heavy modules imported: {heavy})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
 import os
+import sys
 import requests
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from paper2kb.hgnc_index import build_hgnc_index
 
 HGNC_URL = "https://storage.googleapis.com/public-download-files/hgnc/tsv/tsv/hgnc_complete_set.txt"
 DEST_DIR = "data/reference"
@@ -23,6 +29,10 @@ def download_hgnc():
 
     print(f"[INFO] HGNC data saved to {dest_path}")
 
+    # Recompile the binary index so load_hgnc_reference does not fall back to the TSV
+    index_path = build_hgnc_index(dest_path)
+    print(f"[INFO] HGNC index rebuilt at {index_path}")
+
 
     versioned = os.path.join(DEST_DIR, f"hgnc_{datetime.now().date()}.txt")
     with open(versioned, "w") as f:
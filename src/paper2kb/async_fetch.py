@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+
+from paper2kb import fetch_paper, http_client
+from paper2kb.fetch_paper import fetch_entrez_abstract, fetch_europepmc_fulltext, fetch_pmc_article, find_pmcids
+
+# ----------------------------------------
+# Rate Limits
+# ----------------------------------------
+
+# NCBI E-utilities: 3 requests/second, or 10 with an API key (NCBI_API_KEY)
+NCBI_RATE = 3
+NCBI_RATE_WITH_KEY = 10
+
+# Europe PMC asks clients to be polite; stay well below its service limits
+EUROPEPMC_RATE = 5
+
+# PMIDs being fetched at the same time (each runs its HTTP calls in a worker thread)
+MAX_CONCURRENCY = 8
+
+# Services (see http_client.SERVICE_PREFIXES) paced by each limiter
+LIMITED_SERVICES = {"entrez": "ncbi", "europepmc": "europepmc"}
+
+# Seconds between checks for a consumer that stopped reading fetch_papers
+QUEUE_POLL_SECONDS = 0.1
+
+class RateLimiter:
+    """
+    Async limiter that spaces acquisitions at least 1/`rate` seconds apart.
+
+    Slots are reserved synchronously inside the event loop, so concurrent
+    coroutines never exceed the rate without needing a lock.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+def default_limiters() -> dict:
+    """Per-host limiters: "ncbi" (rate depends on NCBI_API_KEY) and "europepmc"."""
+    return {
+        "ncbi": RateLimiter(NCBI_RATE_WITH_KEY if fetch_paper.NCBI_API_KEY else NCBI_RATE),
+        "europepmc": RateLimiter(EUROPEPMC_RATE),
+    }
+
+# ----------------------------------------
+# Concurrent Fetching
+# ----------------------------------------
+
+async def fetch_papers_async(pmids, skip_sections=None, max_concurrency: int = None, limiters: dict = None,
+                             with_sections: bool = False):
+    """
+    Fetch many PMIDs concurrently, yielding each paper as soon as it is retrieved.
+
+    Each PMID tries NCBI PMC, Europe PMC and the Entrez abstract in the same
+    order as fetch_paper_text, but different PMIDs proceed in parallel. Every
+    request that goes to the network first waits for its host's rate limiter;
+    answers from the HTTP cache (http_client.enable_http_cache) do not.
+
+    Args:
+        pmids (Iterable[str]): PubMed IDs.
+        skip_sections (Iterable[str], optional): Full-text section types to leave out.
+        max_concurrency (int, optional): PMIDs in flight at once (default MAX_CONCURRENCY).
+        limiters (dict, optional): {"ncbi": RateLimiter, "europepmc": RateLimiter}; pass the
+            same dict to several calls to share the limits.
+        with_sections (bool): If True, also yield the section spans of the text.
+
+    Yields:
+        tuple: (pmid, text, source), or (pmid, text, source, sections) with with_sections=True,
+        in completion order. text and source are None if every source failed.
+    """
+    limiters = limiters or default_limiters()
+    semaphore = asyncio.Semaphore(max_concurrency or MAX_CONCURRENCY)
+
+    tasks = [asyncio.create_task(_fetch_one(pmid, skip_sections, limiters, semaphore)) for pmid in pmids]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            pmid, paper = await next_done
+            if paper is None:
+                logging.warning(f"⚠️ Unable to retrieve text for PMID {pmid}")
+                paper = {"text": None, "source": None, "sections": None}
+            output = (pmid, paper["text"], paper["source"])
+            yield output + (paper["sections"],) if with_sections else output
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def fetch_papers(pmids, skip_sections=None, max_concurrency: int = None, with_sections: bool = False):
+    """
+    Synchronous wrapper around fetch_papers_async for non-async callers.
+
+    The event loop runs in a background thread, so results can be consumed
+    (e.g. fed to extraction) while the remaining PMIDs are still being fetched.
+    At most `max_concurrency` results wait to be consumed. If the consumer stops
+    early (break, exception, close()), the outstanding fetches are cancelled.
+
+    Yields:
+        tuple: Same as fetch_papers_async, in completion order.
+    """
+    max_concurrency = max_concurrency or MAX_CONCURRENCY
+    results = queue.Queue(maxsize=max_concurrency)
+    stop = threading.Event()
+    running = {}
+    done = object()
+
+    def offer(item) -> bool:
+        """Queue an item once there is room; False if the consumer stopped."""
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=QUEUE_POLL_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    async def produce():
+        running["loop"], running["task"] = asyncio.get_running_loop(), asyncio.current_task()
+        if stop.is_set():
+            return
+        papers = fetch_papers_async(pmids, skip_sections, max_concurrency, with_sections=with_sections)
+        try:
+            async for item in papers:
+                if not await asyncio.to_thread(offer, item):
+                    return
+        finally:
+            await papers.aclose()
+
+    def run():
+        try:
+            asyncio.run(produce())
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            offer(e)
+            return
+        offer(done)
+
+    thread = threading.Thread(target=run, name="paper2kb-fetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        if "task" in running:
+            try:
+                running["loop"].call_soon_threadsafe(running["task"].cancel)
+            except RuntimeError:
+                pass  # the loop has already finished
+        thread.join()
+
+async def _fetch_one(pmid: str, skip_sections, limiters: dict, semaphore: asyncio.Semaphore):
+    """Try each source for one PMID, throttling every network request by host."""
+    loop = asyncio.get_running_loop()
+
+    def throttle(service: str):
+        # Runs in the worker thread, only when a request is not answered from the cache
+        limiter = limiters.get(LIMITED_SERVICES.get(service))
+        if limiter is not None:
+            asyncio.run_coroutine_threadsafe(limiter.acquire(), loop).result()
+
+    # Set in this task's own context, and copied into its asyncio.to_thread calls
+    http_client.set_throttle(throttle)
+
+    async with semaphore:
+        # Step 1: NCBI PMC full text (elink, then efetch per linked PMCID)
+        try:
+            for pmcid in await asyncio.to_thread(find_pmcids, pmid):
+                paper = await asyncio.to_thread(fetch_pmc_article, pmcid, skip_sections)
+                if paper:
+                    return pmid, paper
+        except Exception as e:
+            logging.warning(f"NCBI PMC full text fetch failed for PMID {pmid}: {e}")
+
+        # Step 2: Europe PMC full text
+        paper = await asyncio.to_thread(fetch_europepmc_fulltext, pmid, skip_sections)
+        if paper:
+            return pmid, paper
+
+        # Step 3: Entrez abstract
+        return pmid, await asyncio.to_thread(fetch_entrez_abstract, pmid)
@@ -12,17 +12,8 @@ import os
 import time
 from dotenv import load_dotenv
 
-from Bio import Entrez
-from paper2kb.extract_genes import extract_gene_disease_mentions, load_hgnc_reference
-from paper2kb.get_hgnc_metadata import enrich_with_hgnc
-from paper2kb.get_coordinates import add_coordinates
-from paper2kb.normalize_diseases import normalize_diseases
-from paper2kb.write_output import save_output
-from paper2kb.io_utils import load_text_source, infer_output_path
-
 # Load environment variables (for NCBI Entrez API access)
 load_dotenv()
-Entrez.email = os.environ.get("ENTREZ_EMAIL", "fallback@example.com")
 
 # Set up logging format and default level
 logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
@@ -41,12 +32,31 @@ def main():
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument('--pmid', type=str, help='PubMed ID of the publication')
     group.add_argument('--localfile', type=str, help='Path to a local .txt or .pdf file')
+    group.add_argument('--corpus', type=str,
+                       help='Directory of .txt/JATS XML papers, or a PMC Open Access .tar.gz package, to extract '
+                            'with a worker pool (streamed without unpacking; extraction only, no enrichment)')
+    group.add_argument('--pmid-list', type=str,
+                       help='File with one PMID per line; papers are fetched concurrently (or with batched '
+                            'Entrez requests for 50+ PMIDs) and extracted with a worker pool as they arrive '
+                            '(extraction only, no enrichment)')
 
     parser.add_argument('--build', choices=['hg19', 'hg38', 'both'], default='both', help='Genome build')
     parser.add_argument('--format', choices=['json', 'csv'], default='json', help='Output format')
     parser.add_argument('--output', type=str, help='Output file path (optional — auto inferred if not provided)')
     parser.add_argument('--mode', choices=['ml', 'hybrid'], default='hybrid',
                         help='Extraction mode: ml (NER only) or hybrid (NER + HGNC fallback)')
+    parser.add_argument('--profile', choices=['accurate', 'fast'],
+                        help='NER pipeline profile: accurate (full models) or fast (NER + rule-based '
+                             'sentences); defaults to $PAPER2KB_PIPELINE_PROFILE or accurate')
+    parser.add_argument('--text-only', action='store_true',
+                        help='Only retrieve the paper text and save it as .txt (no extraction or enrichment)')
+    parser.add_argument('--all-sections', action='store_true',
+                        help='Keep every full-text section (by default methods, references, acknowledgements '
+                             'and similar back matter are skipped)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not read or write cached extraction results, API responses or PDF text (data/cache/)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for --corpus / --pmid-list (default: number of CPU cores)')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
 
     args = parser.parse_args()
@@ -55,6 +65,47 @@ def main():
 
     start_total = time.time()
 
+    # Pipeline modules are imported only after argument parsing; NER models and
+    # the LiftOver chain are loaded on first use, so --help and text-only runs skip them
+    from Bio import Entrez
+    from paper2kb.http_client import enable_http_cache
+    from paper2kb.io_utils import enable_pdf_cache, load_text_source, infer_output_path
+
+    Entrez.email = os.environ.get("ENTREZ_EMAIL", "fallback@example.com")
+
+    # Reuse stored HGNC/Ensembl/OLS/Open Targets/Entrez responses and PDF text across runs
+    if not args.no_cache:
+        enable_http_cache()
+        enable_pdf_cache()
+
+    skip_sections = () if args.all_sections else None
+
+    if args.corpus or args.pmid_list:
+        run_corpus(args)
+        return
+
+    if args.text_only:
+        text, source = load_text_source(pmid=args.pmid, localfile=args.localfile, skip_sections=skip_sections)
+        logging.info(f"🧾 Text source: {source}")
+        out_path = args.output or infer_output_path(pmid=args.pmid, localfile=args.localfile, format="txt")
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        logging.info(f"📤 Saved paper text to {out_path} ({time.time() - start_total:.2f}s)")
+        return
+
+    from paper2kb.extract_genes import (
+        enable_extraction_cache, extract_gene_disease_mentions, load_hgnc_reference, set_pipeline_profile
+    )
+    from paper2kb.get_hgnc_metadata import enrich_with_hgnc
+    from paper2kb.get_coordinates import add_coordinates, gene_index_version
+    from paper2kb.normalize_diseases import normalize_diseases
+    from paper2kb.write_output import save_output
+
+    if args.profile:
+        set_pipeline_profile(args.profile)
+    if not args.no_cache:
+        enable_extraction_cache()
+
     # Load HGNC reference for matching + enrichment
     logging.info("📥 Loading HGNC reference...")
     load_hgnc_reference("data/reference/hgnc_complete_set.txt")
@@ -62,7 +113,8 @@ def main():
     # Load full text using chosen input method
     logging.info("📄 Will try full text via Europe PMC, fallback to abstract if unavailable.")
     logging.info("📄 Retrieving paper text...")
-    text, source = load_text_source(pmid=args.pmid, localfile=args.localfile)
+    text, source, sections = load_text_source(pmid=args.pmid, localfile=args.localfile,
+                                               return_sections=True, skip_sections=skip_sections)
     logging.info(f"🧾 Text source: {source}")
 
     # Determine where to save output
@@ -74,7 +126,8 @@ def main():
     logging.info(f"🔍 Extracting gene-disease mentions with mode: {args.mode}")
     t0 = time.time()
     use_hybrid = args.mode == "hybrid"
-    gene_pairs, skipped = extract_gene_disease_mentions(text, use_hybrid=use_hybrid, return_skipped=True)
+    gene_pairs, skipped = extract_gene_disease_mentions(text, use_hybrid=use_hybrid, return_skipped=True,
+                                                        section_spans=sections)
     logging.info(f"⏱️ Gene/Disease extraction completed in {time.time() - t0:.2f}s")
 
     logging.info(f"🧬 Found {len(gene_pairs)} matched gene(s)")
@@ -96,8 +149,9 @@ def main():
     enriched = enrich_with_hgnc(gene_pairs)
     logging.info(f"⏱️ HGNC enrichment completed in {time.time() - t0:.2f}s")
 
-    # Add genomic coordinates from Ensembl REST API
-    logging.info(f"🧬 Adding genomic coordinates ({args.build})...")
+    # Add genomic coordinates from the offline gene index, or the Ensembl REST API
+    gene_index = gene_index_version()
+    logging.info(f"🧬 Adding genomic coordinates ({args.build}, {f'gene index {gene_index}' if gene_index else 'Ensembl REST'})...")
     t0 = time.time()
     with_coords = add_coordinates(enriched, build=args.build)
     logging.info(f"⏱️ Coordinate lookup completed in {time.time() - t0:.2f}s")
@@ -116,8 +170,79 @@ def main():
     # Save result to CSV or JSON
     logging.info(f"📤 Writing output to {args.output}")
     save_output(final, args.output, fmt=args.format)
+    log_http_cache_stats()
     logging.info(f"🎉 Done! Total runtime: {time.time() - start_total:.2f}s")
 
 
+def run_corpus(args):
+    """
+    Extract gene-disease mentions from every document in `args.corpus` (text and
+    XML files or an OA package), or from every PMID in `args.pmid_list`, using a
+    pool of forked workers that share the loaded models and HGNC index.
+
+    Writes one row per mention, tagged with its `doc_id`, to JSON or CSV.
+    """
+    from paper2kb.async_fetch import fetch_papers
+    from paper2kb.corpus import extract_corpus
+    from paper2kb.extract_genes import enable_extraction_cache, set_pipeline_profile
+    from paper2kb.fetch_paper import BULK_FETCH_MIN_PMIDS, fetch_papers_bulk
+    from paper2kb.io_utils import infer_output_path, iter_corpus
+    from paper2kb.write_output import save_output
+
+    if args.profile:
+        set_pipeline_profile(args.profile)
+    if not args.no_cache:
+        enable_extraction_cache()
+
+    skip_sections = () if args.all_sections else None
+    if args.pmid_list:
+        with open(args.pmid_list, "r", encoding="utf-8") as f:
+            pmids = [line.strip() for line in f if line.strip()]
+        if len(pmids) >= BULK_FETCH_MIN_PMIDS:
+            # Batched elink/efetch: tens of requests instead of several per PMID
+            documents = (
+                (pmid, paper["text"], paper["sections"])
+                for pmid, paper in fetch_papers_bulk(pmids, skip_sections=skip_sections)
+                if paper
+            )
+        else:
+            # Fetched concurrently; each paper is handed to the pool as soon as it arrives
+            documents = (
+                (pmid, text, sections)
+                for pmid, text, _, sections in fetch_papers(pmids, skip_sections=skip_sections, with_sections=True)
+                if text
+            )
+        source = args.pmid_list
+    else:
+        documents = iter_corpus(args.corpus, skip_sections=skip_sections)
+        source = args.corpus
+
+    out_path = args.output or infer_output_path(corpus=source, format=args.format)
+    logging.info(f"📚 Extracting corpus {source} with mode: {args.mode}")
+
+    rows, stats = [], {}
+    for doc_id, results, skipped in extract_corpus(documents, workers=args.workers,
+                                                   use_hybrid=args.mode == "hybrid", stats=stats):
+        rows.extend(dict(result, doc_id=doc_id) for result in results)
+        logging.debug(f"🧬 {doc_id}: {len(results)} gene(s), {len(skipped)} skipped")
+
+    logging.info(f"⚡ Throughput: {stats['docs_per_sec']:.2f} docs/sec "
+                 f"({stats['chars'] / max(stats['seconds'], 1e-9) / 1000:.0f}k chars/sec, {stats['workers']} worker(s))")
+    logging.info(f"📤 Writing {len(rows)} mention(s) to {out_path}")
+    save_output(rows, out_path, fmt=args.format)
+    log_http_cache_stats()
+
+
+def log_http_cache_stats():
+    """Log how many external API responses were served from the HTTP cache."""
+    from paper2kb.http_client import http_cache_stats
+
+    stats = http_cache_stats()
+    if stats["hits"] or stats["misses"]:
+        per_service = ", ".join(f"{service} {counts['hits']}/{counts['hits'] + counts['misses']}"
+                                for service, counts in sorted(stats["services"].items()))
+        logging.info(f"🌐 HTTP cache: {stats['hits']} hit(s), {stats['misses']} miss(es) ({per_service})")
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
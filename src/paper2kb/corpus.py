@@ -0,0 +1,111 @@
+import gc
+import logging
+import multiprocessing
+import os
+import time
+
+from paper2kb import extract_genes
+from paper2kb.extract_genes import extract_gene_disease_mentions, get_disease_nlp, get_gene_nlp, load_hgnc_reference
+
+# ----------------------------------------
+# Corpus Worker Pool
+# ----------------------------------------
+#
+# The parent process loads the HGNC index and both NER pipelines once, freezes
+# them out of the garbage collector, then forks workers. Workers inherit the
+# loaded objects copy-on-write (the HGNC index itself is a shared read-only
+# mmap), so adding a worker costs neither a model load nor a copy of the models.
+
+DEFAULT_HGNC_PATH = "data/reference/hgnc_complete_set.txt"
+
+# Extraction options, set in the parent before forking and inherited by workers
+_WORKER_OPTIONS = {}
+
+def extract_corpus(documents, workers: int = None, use_hybrid: bool = True, hgnc_path: str = DEFAULT_HGNC_PATH,
+                   ordered: bool = False, stats: dict = None):
+    """
+    Extract gene-disease mentions from many documents with a pool of forked workers.
+
+    Args:
+        documents (iterable): Document strings, or (doc_id, text) / (doc_id, text, section_spans)
+            tuples. Consumed lazily, so large corpora can be streamed from disk.
+        workers (int, optional): Worker processes (default: all cores). 1 runs in-process.
+        use_hybrid (bool): If True, includes HGNC-symbol fallback matching in addition to NER.
+        hgnc_path (str): HGNC reference (TSV or compiled index) loaded in the parent,
+            unless a reference is already loaded.
+        ordered (bool): Yield results in input order instead of completion order.
+        stats (dict, optional): Filled with docs, chars, workers, seconds and docs_per_sec.
+
+    Yields:
+        tuple: (doc_id, results, skipped_genes) for each document.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        logging.warning("⚠️ fork is not available on this platform — processing the corpus in one process")
+        workers = 1
+
+    # Load everything workers need before forking
+    t0 = time.perf_counter()
+    if extract_genes.HGNC_INDEX is None:
+        load_hgnc_reference(hgnc_path)
+    get_gene_nlp()
+    get_disease_nlp()
+    logging.info(f"📦 Reference and models loaded in {time.perf_counter() - t0:.2f}s; starting {workers} worker(s)")
+
+    _WORKER_OPTIONS.clear()
+    _WORKER_OPTIONS["use_hybrid"] = use_hybrid
+
+    items = (
+        (item + (None,) if len(item) == 2 else item) if isinstance(item, tuple) else (i, item, None)
+        for i, item in enumerate(documents)
+    )
+
+    totals = {"docs": 0, "chars": 0}
+    start = time.perf_counter()
+    try:
+        if workers == 1:
+            for item in items:
+                yield _finish(_extract_document(item), totals)
+        else:
+            # Objects created so far are never collected, so the collector does not
+            # touch their headers in the children and break copy-on-write sharing
+            gc.freeze()
+            context = multiprocessing.get_context("fork")
+            with context.Pool(workers, initializer=_init_worker) as pool:
+                run = pool.imap if ordered else pool.imap_unordered
+                for output in run(_extract_document, items, chunksize=1):
+                    yield _finish(output, totals)
+    finally:
+        gc.unfreeze()
+        elapsed = time.perf_counter() - start
+        summary = dict(totals, workers=workers, seconds=elapsed,
+                       docs_per_sec=totals["docs"] / elapsed if elapsed else 0.0)
+        if stats is not None:
+            stats.update(summary)
+        logging.info(f"📚 Processed {summary['docs']} document(s) in {elapsed:.1f}s "
+                     f"({summary['docs_per_sec']:.2f} docs/sec, {workers} worker(s))")
+
+def _init_worker():
+    """Keep each worker single-threaded so N workers use N cores without oversubscription."""
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+def _extract_document(item):
+    """Worker task: run extraction on one (doc_id, text, section_spans) item."""
+    doc_id, text, section_spans = item
+    results, skipped = extract_gene_disease_mentions(
+        text,
+        use_hybrid=_WORKER_OPTIONS.get("use_hybrid", True),
+        return_skipped=True,
+        section_spans=section_spans
+    )
+    return doc_id, results, skipped, len(text)
+
+def _finish(output, totals: dict):
+    doc_id, results, skipped, n_chars = output
+    totals["docs"] += 1
+    totals["chars"] += n_chars
+    return doc_id, results, skipped
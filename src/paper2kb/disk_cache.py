@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+# ----------------------------------------
+# Size-Bounded On-Disk Cache
+# ----------------------------------------
+
+class DiskCache:
+    """
+    On-disk cache of JSON-serializable values with size-bounded LRU eviction.
+
+    Each entry is a gzip-compressed JSON file named by the SHA-256 of its key,
+    so any string (e.g. a JSON description of everything the value depends on)
+    can be used as a key. Reads refresh the file's modification time, and when
+    the cache grows past `max_bytes` the least recently used entries are removed.
+    Entries are written atomically, so several processes can share a directory.
+
+    Args:
+        directory (str): Cache directory (created on first write).
+        max_bytes (int): Size budget for all entries.
+        ttl (float, optional): Seconds after which an entry expires.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 ** 2, ttl: float = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None, ttl: float = None):
+        """
+        Return the cached value for `key`, or `default` if missing or expired.
+
+        `ttl` overrides the cache's own expiry for this lookup.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+            if ttl is not None and time.time() - entry["created"] > ttl:
+                self._count("misses")
+                return default
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            self._count("misses")
+            return default
+
+        self._count("hits")
+        return entry["value"]
+
+    def set(self, key: str, value):
+        """Store `value` under `key`, evicting old entries if over budget."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        data = gzip.compress(json.dumps({"created": time.time(), "value": value}).encode("utf-8"))
+        tmp_path = f"{path}.tmp{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        # An overwritten entry gives its old size back to the budget
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.writes += 1
+            if self._size is None:
+                self._size = sum(size for _, _, size in self._entries())
+            else:
+                self._size += len(data) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            for path, _, _ in self._entries():
+                _remove(path)
+            self._size = 0
+
+    @property
+    def stats(self) -> dict:
+        """Hit/miss/write/eviction counters for this process."""
+        return {"hits": self.hits, "misses": self.misses, "writes": self.writes, "evictions": self.evictions}
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json.gz")
+
+    def _entries(self):
+        """Yield (path, mtime, size) for every entry on disk."""
+        if not os.path.isdir(self.directory):
+            return
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith(".json.gz"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue  # removed by another process
+                    yield entry.path, stat.st_mtime, stat.st_size
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is within 90% of its budget."""
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        self._size = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        for path, _, size in entries:
+            if self._size <= target:
+                break
+            _remove(path)
+            self._size -= size
+            self.evictions += 1
+        logging.debug(f"🧹 Cache {self.directory} trimmed to {self._size / 1e6:.1f} MB")
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
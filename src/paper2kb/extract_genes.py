@@ -1,20 +1,35 @@
-import spacy
-import csv
+import hashlib
+import json
 import logging
+import os
 import re
+import sys
+import threading
+from bisect import bisect_right
+from importlib import metadata
+from itertools import chain, islice
 
-from paper2kb.opentargets_utils import get_opentargets_diseases
+from paper2kb.disk_cache import DiskCache
+from paper2kb.hgnc_index import load_hgnc_index
+from paper2kb.opentargets_utils import association_store_version, get_opentargets_diseases_batch
 
 # ------------------------
 # Global Reference Objects
 # ------------------------
 
+# Loaded HGNC reference (paper2kb.hgnc_index.HGNCIndex), set by load_hgnc_reference
+HGNC_INDEX = None
+
 # Set of official HGNC gene symbols
 HGNC_SYMBOLS = set()
 
 # Mapping of alias → canonical gene symbol
 HGNC_ALIASES = {}
 
+# Multi-token symbols/aliases (e.g. "HLA-A") keyed by their first word token.
+# Single-token names are looked up directly in HGNC_SYMBOLS / HGNC_ALIASES.
+HGNC_MULTI_TOKEN = {}
+
 # Mapping of gene → known associated diseases (used in fallback)
 GENE_DISEASE_MAP = {}
 
@@ -29,146 +44,652 @@ COMMON_WORD_GENES = {
     "MGP", "AR"
 }
 
+# Word tokens used by the fallback matcher; mirrors the `\b` semantics of `re`
+WORD_TOKEN = re.compile(r"\w+")
+
+# Batch sizing for extract_many: roughly this many characters per nlp.pipe batch,
+# estimated from the first BATCH_SAMPLE_DOCS documents
+BATCH_CHAR_BUDGET = 200_000
+BATCH_SAMPLE_DOCS = 256
+MAX_BATCH_SIZE = 1000
+
+# Long documents are processed in sentence-aligned chunks of at most this many
+# characters (well below spaCy's default max_length of 1,000,000)
+MAX_CHUNK_CHARS = 100_000
+
+# Preferred chunk cut points, tried in order: paragraph break, sentence end, line break, space
+CHUNK_BREAKS = [
+    re.compile(r"\n\s*\n"),
+    re.compile(r"[.!?][\"')\]]*\s+"),
+    re.compile(r"\n"),
+    re.compile(r"\s+"),
+]
+
 # ------------------------
 # Setup
 # ------------------------
 
-# Load NER models (Spacy BioNER)
-GENE_NLP = spacy.load("en_ner_jnlpba_md")
-DISEASE_NLP = spacy.load("en_ner_bc5cdr_md")
+# NER models (Spacy BioNER), loaded on first use by get_gene_nlp() / get_disease_nlp()
+GENE_MODEL = "en_ner_jnlpba_md"
+DISEASE_MODEL = "en_ner_bc5cdr_md"
+
+# Pipeline profiles: which model components to skip at load time, and whether to
+# segment sentences with the rule-based sentencizer instead of the parser.
+#   - accurate: every component enabled, parser-based sentence boundaries
+#   - fast: only tok2vec + ner, punctuation-based sentence boundaries
+PIPELINE_PROFILES = {
+    "accurate": {"exclude": [], "sentencizer": False},
+    "fast": {"exclude": ["tagger", "parser", "lemmatizer", "attribute_ruler"], "sentencizer": True},
+}
+
+# Active profile; override with PAPER2KB_PIPELINE_PROFILE or set_pipeline_profile()
+PIPELINE_PROFILE = os.environ.get("PAPER2KB_PIPELINE_PROFILE", "accurate")
+
+_GENE_NLP = None
+_DISEASE_NLP = None
+_DISEASE_COMPONENTS = []
+_MODEL_LOCK = threading.Lock()
+
+def set_pipeline_profile(profile: str):
+    """
+    Select the NER pipeline profile ("accurate" or "fast").
+
+    Models already loaded with a different profile are discarded and reloaded on next use.
+
+    Raises:
+        ValueError: If the profile name is unknown.
+    """
+    global PIPELINE_PROFILE, _GENE_NLP, _DISEASE_NLP, _DISEASE_COMPONENTS
+    if profile not in PIPELINE_PROFILES:
+        raise ValueError(f"Unknown pipeline profile: {profile}")
+
+    with _MODEL_LOCK:
+        if profile != PIPELINE_PROFILE:
+            PIPELINE_PROFILE = profile
+            _GENE_NLP = None
+            _DISEASE_NLP = None
+            _DISEASE_COMPONENTS = []
+
+def _load_model(name: str):
+    """Load a spaCy model according to the active pipeline profile."""
+    import spacy
+
+    profile = PIPELINE_PROFILES.get(PIPELINE_PROFILE)
+    if profile is None:
+        raise ValueError(f"Unknown pipeline profile: {PIPELINE_PROFILE}")
+    logging.info(f"📦 Loading NER model {name} ({PIPELINE_PROFILE} profile)...")
+    nlp = spacy.load(name, exclude=profile["exclude"])
+    if profile["sentencizer"]:
+        nlp.add_pipe("sentencizer", first=True)
+    return nlp
+
+def get_gene_nlp():
+    """
+    Return the gene NER pipeline, loading it on first use.
+
+    The pipeline ends with the `paper2kb_disease_ner` component, so a single call
+    annotates both gene entities and disease spans. Safe to call from several threads.
+    """
+    global _GENE_NLP
+    if _GENE_NLP is None:
+        with _MODEL_LOCK:
+            if _GENE_NLP is None:
+                from spacy.language import Language
+
+                if not Language.has_factory("paper2kb_disease_ner"):
+                    Language.factory("paper2kb_disease_ner", func=create_disease_ner)
+
+                nlp = _load_model(GENE_MODEL)
+                # Gene and disease NER share one tokenization and sentence segmentation
+                nlp.add_pipe("paper2kb_disease_ner", last=True)
+                _GENE_NLP = nlp
+    return _GENE_NLP
+
+def get_disease_nlp():
+    """
+    Return the disease NER pipeline, loading it on first use.
+
+    Safe to call from several threads.
+    """
+    global _DISEASE_NLP, _DISEASE_COMPONENTS
+    if _DISEASE_NLP is None:
+        with _MODEL_LOCK:
+            if _DISEASE_NLP is None:
+                nlp = _load_model(DISEASE_MODEL)
+                _DISEASE_COMPONENTS = _disease_ner_components(nlp)
+                _DISEASE_NLP = nlp
+    return _DISEASE_NLP
+
+def __getattr__(name):
+    # Keep GENE_NLP / DISEASE_NLP importable without loading models at import time
+    if name == "GENE_NLP":
+        return get_gene_nlp()
+    if name == "DISEASE_NLP":
+        return get_disease_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _disease_ner_components(nlp):
+    """
+    Select the disease model components needed to produce entities.
+
+    The disease NER reuses the tokens and sentences of the gene pipeline, so its
+    tagger, parser, lemmatizer and attribute ruler are never run. Its tok2vec is
+    kept only if the NER component listens to it.
+    """
+    needed = {"ner"}
+    if "tok2vec" in nlp.pipe_names:
+        tok2vec = nlp.get_pipe("tok2vec")
+        if "ner" in getattr(tok2vec, "listening_components", ["ner"]):
+            needed.add("tok2vec")
+    return [(name, proc) for name, proc in nlp.pipeline if name in needed]
+
+class DiseaseNER:
+    """
+    Pipeline component that annotates gene-pipeline Docs with disease entities.
+
+    The disease model runs over a copy of the already tokenized text, and its
+    entities are stored on the original Doc as `doc.spans["disease"]`, aligned
+    to the same tokens and sentences as the gene entities.
+    """
+
+    def __call__(self, doc):
+        return next(self.pipe([doc]))
+
+    def pipe(self, docs, batch_size: int = 128):
+        from spacy.tokens import Doc, Span
+        from spacy.util import minibatch
+
+        disease_nlp = get_disease_nlp()
+        for batch in minibatch(docs, size=batch_size):
+            disease_docs = [
+                Doc(
+                    disease_nlp.vocab,
+                    words=[token.text for token in doc],
+                    spaces=[bool(token.whitespace_) for token in doc]
+                )
+                for doc in batch
+            ]
+            for _, proc in _DISEASE_COMPONENTS:
+                disease_docs = list(proc.pipe(disease_docs, batch_size=batch_size))
+
+            for doc, disease_doc in zip(batch, disease_docs):
+                doc.spans["disease"] = [
+                    Span(doc, ent.start, ent.end, label=ent.label_)
+                    for ent in disease_doc.ents
+                ]
+                yield doc
+
+def create_disease_ner(nlp, name):
+    return DiseaseNER()
+
+# ------------------------
+# Extraction Result Cache
+# ------------------------
+
+# Bump when the structure or meaning of extraction results changes
+EXTRACTION_CACHE_VERSION = 1
+EXTRACTION_CACHE_DIR = "data/cache/extractions"
+EXTRACTION_CACHE_MAX_BYTES = 256 * 1024 ** 2
+# Hybrid results carry fallback diseases from Open Targets; without the offline
+# store those come from the live API, so such entries expire like its responses
+EXTRACTION_CACHE_OT_TTL = 30 * 24 * 3600
+
+# Disabled unless enable_extraction_cache() is called (the CLI and app enable it)
+_EXTRACTION_CACHE = None
+_MODEL_VERSIONS = None
+
+def enable_extraction_cache(directory: str = None, max_bytes: int = None) -> DiskCache:
+    """
+    Cache extract_gene_disease_mentions results on disk.
+
+    Entries are keyed by the text hash, extraction mode, pipeline profile, model
+    package versions, HGNC reference version and (for hybrid mode) the Open
+    Targets association store version, so a changed model or reference never
+    serves stale results. Results whose fallback disease lookup failed are not
+    cached.
+
+    Returns:
+        DiskCache: The active cache (its `stats` report hits and misses).
+    """
+    global _EXTRACTION_CACHE
+    _EXTRACTION_CACHE = DiskCache(directory or EXTRACTION_CACHE_DIR, max_bytes or EXTRACTION_CACHE_MAX_BYTES)
+    return _EXTRACTION_CACHE
+
+def disable_extraction_cache():
+    """Stop reading and writing cached extraction results."""
+    global _EXTRACTION_CACHE
+    _EXTRACTION_CACHE = None
+
+def extraction_cache_key(text: str, use_hybrid: bool, section_spans=None) -> str:
+    """Describe everything an extraction result depends on, as a cache key."""
+    return json.dumps({
+        "version": EXTRACTION_CACHE_VERSION,
+        "text": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        "sections": [list(span) for span in section_spans] if section_spans else None,
+        "mode": "hybrid" if use_hybrid else "ml",
+        "profile": PIPELINE_PROFILE,
+        "max_chunk_chars": MAX_CHUNK_CHARS,
+        "models": _model_versions(),
+        "hgnc": HGNC_INDEX.version if HGNC_INDEX is not None else None,
+        "opentargets": (association_store_version() or "api") if use_hybrid else None,
+    }, sort_keys=True)
+
+def _model_versions() -> dict:
+    """Installed versions of spaCy and the NER model packages, read without loading them."""
+    global _MODEL_VERSIONS
+    if _MODEL_VERSIONS is None:
+        versions = {}
+        for package in ("spacy", "scispacy", GENE_MODEL, DISEASE_MODEL):
+            try:
+                versions[package] = metadata.version(package)
+            except metadata.PackageNotFoundError:
+                versions[package] = None
+        _MODEL_VERSIONS = versions
+    return _MODEL_VERSIONS
 
 def load_hgnc_reference(filepath: str):
     """
-    Load HGNC gene symbol reference from a TSV file.
+    Load the HGNC gene symbol reference.
+
+    `filepath` may be the HGNC TSV or a compiled index built by
+    scripts/build_hgnc_index.py. For a TSV, an up-to-date compiled index next to
+    it is memory-mapped instead of parsing the TSV (see paper2kb.hgnc_index).
 
     Populates:
+        - HGNC_INDEX: the loaded HGNCIndex (records, previous symbols, version)
         - HGNC_SYMBOLS: set of official gene symbols
         - HGNC_ALIASES: map of aliases to official symbols
+        - HGNC_MULTI_TOKEN: index of multi-token names used by the fallback matcher
     """
-    global HGNC_SYMBOLS, HGNC_ALIASES
+    global HGNC_INDEX, HGNC_SYMBOLS, HGNC_ALIASES, HGNC_MULTI_TOKEN
+
+    HGNC_INDEX = load_hgnc_index(filepath)
+    HGNC_SYMBOLS = HGNC_INDEX.symbols
+    HGNC_ALIASES = HGNC_INDEX.aliases
+
+    HGNC_MULTI_TOKEN = {}
+    for name, symbol in HGNC_INDEX.multi_token_names():
+        _index_multi_token(name, symbol)
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f, delimiter='\t')
-        for row in reader:
-            symbol = row["symbol"].upper()
-            HGNC_SYMBOLS.add(symbol)
-            if row["alias_symbol"]:
-                for alias in row["alias_symbol"].split("|"):
-                    alias = alias.upper()
-                    HGNC_ALIASES[alias] = symbol
+def _index_multi_token(name: str, symbol: str):
+    """
+    Register a name containing non-word characters under its first word token.
+
+    Names made of a single word token need no entry: the matcher looks them up
+    directly. Names that do not start with a word character cannot follow a word
+    boundary at the start of a token and are ignored.
+    """
+    first = WORD_TOKEN.match(name)
+    if not first or first.end() == len(name):
+        return
+    HGNC_MULTI_TOKEN.setdefault(first.group(), {})[name] = symbol
+
+def _is_word_boundary(text: str, pos: int) -> bool:
+    """Return True if `pos` is a regex `\b` position in `text`."""
+    before = pos > 0 and (text[pos - 1].isalnum() or text[pos - 1] == "_")
+    after = pos < len(text) and (text[pos].isalnum() or text[pos] == "_")
+    return before != after
+
+def _alias_case_ok(mention: str, alias: str) -> bool:
+    """Aliases match in uppercase, or in any case when they contain a digit (e.g. "p53")."""
+    return mention == alias or any(char.isdigit() for char in alias)
+
+def iter_hgnc_matches(text: str):
+    """
+    Find every HGNC symbol or alias in `text` in a single left-to-right pass.
+
+    Each word token is looked up once in the symbol/alias tables, and tokens
+    that start a known multi-token name (e.g. "HLA-A") are extended against
+    HGNC_MULTI_TOKEN. Matching is word-boundary aware. Official symbols match
+    regardless of case, except for COMMON_WORD_GENES, which must appear in
+    uppercase. Aliases must appear in uppercase unless they contain a digit
+    (so "p53" still finds TP53), which keeps ordinary words that happen to be
+    aliases (e.g. "for", alias of WWOX) from being taken for genes.
+
+    Args:
+        text (str): The input biomedical text.
+
+    Yields:
+        tuple: (official_symbol, matched_name, start_offset) in text order.
+    """
+    # Tokens repeat a lot within a paper; resolve each distinct key only once
+    resolved = {}
+
+    for match in WORD_TOKEN.finditer(text):
+        start = match.start()
+        token = match.group()
+        key = token.upper()
+
+        # Names such as "HLA-A" that start with this token
+        for name, symbol in HGNC_MULTI_TOKEN.get(key, {}).items():
+            end = start + len(name)
+            matched = text[start:end]
+            if name != symbol and not _alias_case_ok(matched, name):
+                continue
+            if matched.upper() == name and _is_word_boundary(text, end):
+                yield symbol, name, start
+
+        if key in COMMON_WORD_GENES and token != key:
+            continue  # require exact uppercase match
+        if key not in resolved:
+            if key in HGNC_SYMBOLS:
+                resolved[key] = (key, False)
+            else:
+                alias_of = HGNC_ALIASES.get(key)
+                resolved[key] = (alias_of, True) if alias_of else None
+        if resolved[key]:
+            symbol, is_alias = resolved[key]
+            if is_alias and not _alias_case_ok(token, key):
+                continue
+            yield symbol, key, start
+
+# ------------------------
+# Long Document Chunking
+# ------------------------
+
+def split_text_into_chunks(text: str, max_chars: int = None) -> list[str]:
+    """
+    Split text into sentence-aligned chunks of at most `max_chars` characters.
+
+    Cuts are placed at the last paragraph or sentence break in the second half of
+    each window, falling back to line breaks, whitespace and finally a hard cut.
+    Joining the chunks gives back the original text exactly.
+
+    Args:
+        text (str): The input text.
+        max_chars (int, optional): Chunk size limit; defaults to MAX_CHUNK_CHARS.
+
+    Returns:
+        list[str]: One or more chunks (a single chunk for short texts).
+    """
+    max_chars = max_chars or MAX_CHUNK_CHARS
+    chunks = []
+    start = 0
+    while len(text) - start > max_chars:
+        window = text[start:start + max_chars]
+        cut = None
+        for pattern in CHUNK_BREAKS:
+            breaks = [m.end() for m in pattern.finditer(window, max_chars // 2)]
+            if breaks:
+                cut = breaks[-1]
+                break
+        cut = cut or max_chars
+        chunks.append(text[start:start + cut])
+        start += cut
+    chunks.append(text[start:])
+    return chunks
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
 
 # ------------------------
 # Core Extraction Function
 # ------------------------
 
-def extract_gene_disease_mentions(text: str, use_hybrid: bool = True, return_skipped: bool = False) -> list[dict]:
+def extract_gene_disease_mentions(text: str, use_hybrid: bool = True, return_skipped: bool = False,
+                                  section_spans=None) -> list[dict]:
     """
     Extract gene-disease associations from text using NER and optional fallback matching.
 
+    Texts longer than MAX_CHUNK_CHARS are processed in sentence-aligned chunks, one
+    chunk at a time, so peak memory stays bounded for full-text articles.
+
+    If enable_extraction_cache() was called, results for previously seen inputs
+    are returned from the on-disk cache without running the models.
+
     Args:
         text (str): The input biomedical text.
         use_hybrid (bool): If True, includes HGNC-symbol fallback matching in addition to NER.
         return_skipped (bool): If True, returns a tuple (results, skipped_genes) instead of just results.
+        section_spans (list, optional): (start, end, section_type) ranges of `text`, as returned by
+            paper2kb.jats.render_document; used for `source_section`. Without them the section is
+            guessed as "table" or "body" from the sentence.
 
     Returns:
         List of dictionaries with extracted data (or tuple with skipped gene list if return_skipped=True).
     """
-    gene_doc = GENE_NLP(text)
-    disease_doc = DISEASE_NLP(text)
+    cache, cache_key = _EXTRACTION_CACHE, None
+    if cache is not None:
+        cache_key = extraction_cache_key(text, use_hybrid, section_spans)
+        live_api = use_hybrid and association_store_version() is None
+        cached = cache.get(cache_key, ttl=EXTRACTION_CACHE_OT_TTL if live_api else None)
+        if cached is not None:
+            logging.info(f"♻️ Using cached extraction results ({len(cached['results'])} mentions)")
+            return cached["results"] if not return_skipped else (cached["results"], cached["skipped"])
+
+    chunks = split_text_into_chunks(text)
+    state = _new_extraction_state(section_spans)
+
+    for doc in get_gene_nlp().pipe(chunks, batch_size=1):
+        _collect_ner_mentions(doc, state)
+        state["offset"] += len(doc.text)
+    if use_hybrid:
+        _collect_fallback_mentions(text, state)
 
-    results = []
-    skipped_genes = []
-    seen_mentions = set()
+    peak = _peak_rss_mb()
+    logging.debug(f"🧮 Processed {len(text):,} characters in {len(chunks)} chunk(s)"
+                  + (f", peak RSS {peak:.0f} MB" if peak is not None else ""))
+
+    results, skipped_genes = state["results"], state["skipped"]
+    if skipped_genes:
+        preview = ", ".join(sorted(set(skipped_genes))[:10])
+        logging.warning(f"⚠️ Skipped {len(skipped_genes)} unrecognized gene(s). First few: {preview}")
+
+    if cache is not None and not state["lookup_failed"]:
+        cache.set(cache_key, {"results": results, "skipped": skipped_genes})
+    elif cache is not None:
+        logging.warning("⚠️ Open Targets lookup failed for some fallback genes — result not cached")
+
+    return results if not return_skipped else (results, skipped_genes)
+
+def extract_many(texts, use_hybrid: bool = True, n_process: int = 1, batch_size: int = None):
+    """
+    Extract gene-disease associations from many documents, streaming results.
+
+    Documents are fed through `nlp.pipe`, so tokenization and NER run in batches
+    and, with `n_process` > 1, across several worker processes. Long documents
+    are split into chunks exactly as in extract_gene_disease_mentions.
+
+    Args:
+        texts (iterable): Document strings, or (doc_id, text) / (doc_id, text, section_spans)
+            tuples. Plain strings are identified by their position in the input.
+        use_hybrid (bool): If True, includes HGNC-symbol fallback matching in addition to NER.
+        n_process (int): Number of processes for `nlp.pipe` (-1 uses all cores).
+        batch_size (int, optional): Chunks per batch. If omitted, it is sized from
+            the first documents so a batch holds roughly BATCH_CHAR_BUDGET characters.
+
+    Yields:
+        tuple: (doc_id, results, skipped_genes) for each document, in input order.
+    """
+    items = (
+        (item + (None,) if len(item) == 2 else item) if isinstance(item, tuple) else (i, item, None)
+        for i, item in enumerate(texts)
+    )
+
+    if batch_size is None:
+        head = list(islice(items, BATCH_SAMPLE_DOCS))
+        batch_size = _adaptive_batch_size([text for _, text, _ in head])
+        items = chain(head, items)
+        logging.debug(f"📦 Using nlp.pipe batch size {batch_size}")
+
+    def chunked(items):
+        for doc_id, text, section_spans in items:
+            chunks = split_text_into_chunks(text)
+            for i, chunk in enumerate(chunks):
+                yield chunk, (doc_id, i == len(chunks) - 1, section_spans)
+
+    docs = get_gene_nlp().pipe(
+        chunked(items),
+        as_tuples=True,
+        n_process=n_process,
+        batch_size=batch_size
+    )
+
+    # Chunks arrive in order, so per-document state only lives until its last chunk
+    state, parts = None, []
+    for doc, (doc_id, is_last, section_spans) in docs:
+        if state is None:
+            state = _new_extraction_state(section_spans)
+        _collect_ner_mentions(doc, state)
+        state["offset"] += len(doc.text)
+        parts.append(doc.text)
+        if is_last:
+            if use_hybrid:
+                _collect_fallback_mentions("".join(parts), state)
+            peak = _peak_rss_mb()
+            logging.debug(f"🧮 {doc_id}: {len(parts)} chunk(s)"
+                          + (f", peak RSS {peak:.0f} MB" if peak is not None else ""))
+            yield doc_id, state["results"], state["skipped"]
+            state, parts = None, []
+
+def _adaptive_batch_size(sample: list[str]) -> int:
+    """
+    Choose an `nlp.pipe` batch size from the lengths of sample documents.
+
+    Short abstracts are grouped into large batches to amortize per-batch overhead,
+    while long full-text articles get small batches to bound memory.
+    """
+    if not sample:
+        return 1
+    lengths = [min(len(text), MAX_CHUNK_CHARS) for text in sample]
+    mean_length = max(1, sum(lengths) // len(lengths))
+    return max(1, min(MAX_BATCH_SIZE, BATCH_CHAR_BUDGET // mean_length))
+
+def _new_extraction_state(section_spans=None) -> dict:
+    """
+    Create the mutable state shared by all chunks of one document.
+
+    Keys:
+        - results: extracted mention dictionaries
+        - skipped: gene mentions with no HGNC match
+        - seen: official symbols already reported (dedup across chunks)
+        - diseases: lowercased disease mentions found anywhere in the document
+        - offset: start of the current chunk in the document text
+        - sections / section_starts: sorted section spans for source_section, if known
+        - lookup_failed: True if the fallback disease lookup failed for any gene
+    """
+    sections = sorted(section_spans) if section_spans else []
+    return {
+        "results": [], "skipped": [], "seen": set(), "diseases": set(), "offset": 0,
+        "sections": sections, "section_starts": [start for start, _, _ in sections],
+        "lookup_failed": False,
+    }
+
+def _section_at(state: dict, position: int, sentence: str) -> str:
+    """
+    Return the section type containing document offset `position`.
+
+    Without section spans (plain text, PDFs, abstracts), fall back to guessing
+    "table" or "body" from the sentence.
+    """
+    if not state["sections"]:
+        return "table" if "table" in sentence.lower() else "body"
+    i = bisect_right(state["section_starts"], position) - 1
+    if i >= 0 and position < state["sections"][i][1]:
+        return state["sections"][i][2]
+    return "body"
+
+def _collect_ner_mentions(doc, state: dict):
+    """
+    Collect NER gene mentions (and same-sentence diseases) from one spaCy Doc or chunk.
+    """
 
     # ------------------------
     # Extract disease mentions
     # ------------------------
 
     disease_by_sent = {}
-    disease_mentions = set()
 
-    for ent in disease_doc.ents:
+    for ent in doc.spans["disease"]:
         if ent.label_ == "DISEASE":
-            sentence = ent.sent.text.strip()
-            disease_by_sent.setdefault(sentence, []).append(ent.text)
-            disease_mentions.add(ent.text.lower())
+            disease_by_sent.setdefault(ent.sent.start, []).append(ent.text)
+            state["diseases"].add(ent.text.lower())
 
     # ------------------------
     # Step 1: Gene NER Matching
     # ------------------------
 
-    for sent in gene_doc.sents:
+    for sent in doc.sents:
         sentence_text = sent.text.strip()
         gene_mentions = [
-            ent.text.upper()
+            ent
             for ent in sent.ents
             if ent.label_ in {"DNA", "RNA", "PROTEIN"}
         ]
 
-        for gene in gene_mentions:
+        for ent in gene_mentions:
+            gene = ent.text.upper()
             if gene in HGNC_SYMBOLS:
                 normalized = gene
             elif gene in HGNC_ALIASES:
                 normalized = HGNC_ALIASES[gene]
             else:
-                skipped_genes.append(gene)
+                state["skipped"].append(gene)
                 continue
 
-            if normalized in seen_mentions:
+            if normalized in state["seen"]:
                 continue
-            seen_mentions.add(normalized)
+            state["seen"].add(normalized)
 
-            results.append({
+            state["results"].append({
                 "symbol": normalized,
                 "original_mention": gene,
                 "sentence": sentence_text,
-                "diseases": disease_by_sent.get(sentence_text, []),
+                "diseases": disease_by_sent.get(sent.start, []),
                 "source": "ner",
-                "source_section": "table" if "table" in sentence_text.lower() else "body"
+                "source_section": _section_at(state, state["offset"] + ent.start_char, sentence_text)
             })
 
-    # ------------------------
-    # Step 2: HGNC Symbol Fallback
-    # ------------------------
-
-    if use_hybrid:
-        for hgnc_symbol in HGNC_SYMBOLS:
-            if hgnc_symbol in seen_mentions:
-                continue
-
-            if hgnc_symbol in COMMON_WORD_GENES:
-                if not re.search(rf"\b{hgnc_symbol}\b", text):
-                    continue  # require exact uppercase match
-
-            # Match symbol in text with fallback
-            pattern = r'\b' + re.escape(hgnc_symbol) + r'\b'
-            match = re.search(pattern, text, flags=re.IGNORECASE)
-            if match:
-                span = match.start()
-                snippet = text[max(0, span - 100): span + 100]
-                inferred_sentence = snippet.strip().replace("\n", " ")
-
-                # Fetch known diseases from Open Targets
-                known_diseases = set(get_opentargets_diseases(hgnc_symbol))
-                matched_diseases = [d for d in disease_mentions if d in known_diseases]
-
-                results.append({
-                    "symbol": hgnc_symbol,
-                    "original_mention": hgnc_symbol,
-                    "sentence": inferred_sentence,
-                    "diseases": matched_diseases,
-                    "source": "fallback",
-                    "source_section": "table" if "table" in inferred_sentence.lower() else "body"
-                })
-                seen_mentions.add(hgnc_symbol)
-                logging.debug(f"⚡ Fallback match: {hgnc_symbol}")
+def _collect_fallback_mentions(text: str, state: dict):
+    """
+    Add HGNC symbol/alias matches missed by NER, once all chunks of `text` are processed.
+    """
 
     # ------------------------
-    # Step 3: Reporting
+    # Step 2: HGNC Symbol Fallback
     # ------------------------
 
-    if skipped_genes:
-        preview = ", ".join(sorted(set(skipped_genes))[:10])
-        logging.warning(f"⚠️ Skipped {len(skipped_genes)} unrecognized gene(s). First few: {preview}")
-
-    return results if not return_skipped else (results, skipped_genes)
\ No newline at end of file
+    hits = []
+    for hgnc_symbol, mention, span in iter_hgnc_matches(text):
+        if hgnc_symbol in state["seen"]:
+            continue
+        state["seen"].add(hgnc_symbol)
+        hits.append((hgnc_symbol, mention, span))
+
+    if not hits:
+        return
+
+    # Fetch known diseases for all fallback genes in one batch (offline store when available)
+    ensembl_ids = {}
+    if HGNC_INDEX is not None:
+        for hgnc_symbol, _, _ in hits:
+            record = HGNC_INDEX.get(hgnc_symbol)
+            if record and record["ensembl_gene_id"]:
+                ensembl_ids[hgnc_symbol] = record["ensembl_gene_id"]
+    failed = []
+    known_by_symbol = get_opentargets_diseases_batch([hit[0] for hit in hits], ensembl_ids=ensembl_ids, failed=failed)
+    state["lookup_failed"] = state["lookup_failed"] or bool(failed)
+
+    for hgnc_symbol, mention, span in hits:
+        snippet = text[max(0, span - 100): span + 100]
+        inferred_sentence = snippet.strip().replace("\n", " ")
+
+        known_diseases = set(known_by_symbol.get(hgnc_symbol, []))
+        matched_diseases = [d for d in state["diseases"] if d in known_diseases]
+
+        state["results"].append({
+            "symbol": hgnc_symbol,
+            "original_mention": mention,
+            "sentence": inferred_sentence,
+            "diseases": matched_diseases,
+            "source": "fallback",
+            "source_section": _section_at(state, span, inferred_sentence)
+        })
+        logging.debug(f"⚡ Fallback match: {hgnc_symbol} (as {mention})")
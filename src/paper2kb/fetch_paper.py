@@ -1,10 +1,12 @@
 import os
 import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Optional
-from bs4 import BeautifulSoup
 
 from Bio import Entrez
-import requests
+
+from paper2kb import http_client
+from paper2kb.jats import parse_article_set, parse_jats, render_document
 
 # ----------------------------------------
 # Configuration
@@ -13,11 +15,17 @@ import requests
 # Use email for NCBI Entrez API (set via .env or fallback)
 Entrez.email = os.environ.get("ENTREZ_EMAIL", "example@example.com")
 
+# Optional NCBI API key: raises the E-utilities limit from 3 to 10 requests/second
+NCBI_API_KEY = os.environ.get("NCBI_API_KEY")
+if NCBI_API_KEY:
+    Entrez.api_key = NCBI_API_KEY
+
 # ----------------------------------------
 # Text Retrieval Functions
 # ----------------------------------------
 
-def fetch_paper_text(pmid: str, prefer_fulltext: bool = True, return_source: bool = False) -> str | tuple:
+def fetch_paper_text(pmid: str, prefer_fulltext: bool = True, return_source: bool = False,
+                     skip_sections=None) -> str | tuple:
     """
     Attempt to fetch the full text of a biomedical paper using a PubMed ID (PMID).
 
@@ -30,67 +38,330 @@ def fetch_paper_text(pmid: str, prefer_fulltext: bool = True, return_source: boo
         pmid (str): The PubMed ID of the paper.
         prefer_fulltext (bool): Whether to prioritize full text (always True in current usage).
         return_source (bool): If True, return a tuple (text, source) instead of just text.
+        skip_sections (Iterable[str], optional): Full-text section types to leave out
+            (default paper2kb.jats.DEFAULT_SKIP_SECTIONS).
 
     Returns:
         str or tuple: Retrieved text (and optionally source).
 
+    Raises:
+        RuntimeError: If text retrieval fails from all sources.
+    """
+    paper = fetch_paper(pmid, skip_sections=skip_sections)
+    return (paper["text"], paper["source"]) if return_source else paper["text"]
+
+def fetch_paper(pmid: str, skip_sections=None, hedged: bool = False) -> dict:
+    """
+    Fetch a paper by PMID, keeping track of which section each part of the text came from.
+
+    Full-text XML is parsed into a structured document (paper2kb.jats) and joined
+    without the sections in `skip_sections`. With `hedged=True`, NCBI PMC and
+    Europe PMC are queried at the same time (see fetch_fulltext_hedged) instead
+    of one after the other.
+
+    Returns:
+        dict: {"text": str, "source": str, "sections": list of (start, end, section_type)
+        character ranges, or None for plain abstracts}
+
     Raises:
         RuntimeError: If text retrieval fails from all sources.
     """
     logging.info(f"📥 Attempting full-text retrieval for PMID: {pmid}")
 
-    # -------------------------------
-    # Step 1: Try NCBI PMC Full Text
-    # -------------------------------
+    if hedged:
+        paper = fetch_fulltext_hedged(pmid, skip_sections) or fetch_entrez_abstract(pmid)
+    else:
+        paper = (
+            fetch_pmc_fulltext(pmid, skip_sections)
+            or fetch_europepmc_fulltext(pmid, skip_sections)
+            or fetch_entrez_abstract(pmid)
+        )
+    if paper:
+        return paper
+
+    # If nothing worked
+    raise RuntimeError(f"Unable to retrieve text for PMID {pmid}")
+
+# -------------------------------
+# Step 1: NCBI PMC Full Text
+# -------------------------------
+
+def fetch_pmc_fulltext(pmid: str, skip_sections=None) -> Optional[dict]:
+    """Fetch full text from NCBI PMC (elink to PMCID, then efetch). Returns None on failure."""
     try:
-        handle = Entrez.elink(dbfrom="pubmed", db="pmc", id=pmid, linkname="pubmed_pmc")
-        records = Entrez.read(handle)
-        links = records[0].get("LinkSetDb", [])
-
-        for db in links:
-            for link in db["Link"]:
-                pmcid = link["Id"]
-                logging.info(f"🔗 Found PMCID: {pmcid} — trying PMC full text via Entrez")
-                pmc_handle = Entrez.efetch(db="pmc", id=pmcid, rettype="full", retmode="xml")
-                soup = BeautifulSoup(pmc_handle, "lxml-xml")
-                body = soup.find("body")
-                if body:
-                    full_text = body.get_text(separator="\n").strip()
-                    logging.info("✅ Full text retrieved from NCBI PMC.")
-                    return (full_text, "NCBI PMC full text") if return_source else full_text
+        for pmcid in find_pmcids(pmid):
+            paper = fetch_pmc_article(pmcid, skip_sections)
+            if paper:
+                return paper
     except Exception as e:
         logging.warning(f"NCBI PMC full text fetch failed: {e}")
+    return None
+
+def find_pmcids(pmid: str) -> list[str]:
+    """Return the PMC IDs linked to a PMID (one Entrez elink request)."""
+    handle = http_client.entrez("elink", dbfrom="pubmed", db="pmc", id=pmid, linkname="pubmed_pmc")
+    records = Entrez.read(handle)
+    links = records[0].get("LinkSetDb", [])
+    return [link["Id"] for db in links for link in db["Link"]]
+
+def fetch_pmc_article(pmcid: str, skip_sections=None) -> Optional[dict]:
+    """Fetch and parse one PMC article (one Entrez efetch request)."""
+    logging.info(f"🔗 Found PMCID: {pmcid} — trying PMC full text via Entrez")
+    pmc_handle = http_client.entrez("efetch", db="pmc", id=pmcid, rettype="full", retmode="xml")
+    paper = _paper_from_jats(pmc_handle.read(), "NCBI PMC full text", skip_sections)
+    if paper:
+        logging.info("✅ Full text retrieved from NCBI PMC.")
+    return paper
 
-    # -------------------------------
-    # Step 2: Try Europe PMC Full Text
-    # -------------------------------
+# -------------------------------
+# Step 2: Europe PMC Full Text
+# -------------------------------
+
+def fetch_europepmc_fulltext(pmid: str, skip_sections=None) -> Optional[dict]:
+    """Fetch full-text XML from Europe PMC. Returns None on failure."""
     try:
         epmc_url = f"https://www.ebi.ac.uk/europepmc/webservices/rest/{pmid}/fullTextXML"
-        response = requests.get(epmc_url)
+        response = http_client.get(epmc_url)
         if response.ok and '<' in response.text:
-            soup = BeautifulSoup(response.text, "lxml")
-            body = soup.find("body")
-            if body:
-                full_text = body.get_text(separator="\n").strip()
+            paper = _paper_from_jats(response.text, "Europe PMC full text", skip_sections)
+            if paper:
                 logging.info("✅ Full text retrieved from Europe PMC.")
-                return (full_text, "Europe PMC full text") if return_source else full_text
+                return paper
     except Exception as e:
         logging.warning(f"Europe PMC fetch failed: {e}")
+    return None
+
+# -------------------------------
+# Step 3: Entrez Abstract Fallback
+# -------------------------------
 
-    # -------------------------------
-    # Step 3: Fallback to Entrez Abstract
-    # -------------------------------
+def fetch_entrez_abstract(pmid: str) -> Optional[dict]:
+    """
+    Fetch the title and abstract via Entrez. Returns None on failure.
+
+    Reads the same PubMed XML as fetch_abstracts_bulk, so a PMID gets the same
+    text and section spans whichever path fetches it.
+    """
     try:
-        handle = Entrez.efetch(db="pubmed", id=pmid, rettype="abstract", retmode="text")
-        abstract = handle.read()
-        if abstract:
+        paper = _fetch_pubmed_abstracts([str(pmid)]).get(str(pmid))
+        if paper:
             logging.info("ℹ️ Falling back to abstract via Entrez.")
-            return (abstract.strip(), "Entrez abstract") if return_source else abstract.strip()
+            return paper
     except Exception as e:
         logging.warning(f"Entrez fetch failed: {e}")
+    return None
 
-    # If nothing worked
-    raise RuntimeError(f"Unable to retrieve text for PMID {pmid}")
+# -------------------------------
+# Hedged Full-Text Retrieval
+# -------------------------------
+
+def fetch_fulltext_hedged(pmid: str, skip_sections=None) -> Optional[dict]:
+    """
+    Race NCBI PMC and Europe PMC full text and return the first usable body.
+
+    A slow or failing NCBI call no longer delays the Europe PMC attempt: both run
+    in threads, and the first source to return a full-text body wins (PMC if both
+    finish together). The losing request is abandoned rather than awaited; one
+    already on the wire completes in the background and its result is discarded.
+
+    Returns:
+        dict or None: Paper dict as returned by fetch_paper, or None if neither source has full text.
+    """
+    sources = [fetch_pmc_fulltext, fetch_europepmc_fulltext]  # priority order
+    executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="paper2kb-hedge")
+    futures = {executor.submit(source, pmid, skip_sections): rank for rank, source in enumerate(sources)}
+    try:
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            usable = [(futures[future], future.result()) for future in done
+                      if not future.exception() and future.result()]
+            if usable:
+                _, paper = min(usable, key=lambda item: item[0])
+                logging.info(f"🏁 {paper['source']} answered first for PMID {pmid}")
+                return paper
+        return None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# -------------------------------
+# Bulk Retrieval
+# -------------------------------
+#
+# Large PMID lists are resolved and fetched in batches instead of one request
+# per PMID: one elink per ELINK_BATCH_SIZE PMIDs, one efetch per
+# PMC_EFETCH_BATCH_SIZE articles and one per ABSTRACT_EFETCH_BATCH_SIZE
+# abstracts. Biopython switches to HTTP POST for long ID lists and applies
+# the NCBI rate limit (3/s, 10/s with NCBI_API_KEY) between calls.
+
+ELINK_BATCH_SIZE = 200
+PMC_EFETCH_BATCH_SIZE = 50       # full-text XML is large; keep responses to a few MB
+ABSTRACT_EFETCH_BATCH_SIZE = 200
+
+# PMID lists at least this long are fetched in bulk by the CLI; shorter lists
+# are fetched concurrently per PMID (paper2kb.async_fetch), which starts sooner
+BULK_FETCH_MIN_PMIDS = 50
+
+def fetch_papers_bulk(pmids, skip_sections=None, use_europepmc: bool = False):
+    """
+    Fetch many PMIDs with batched Entrez requests, yielding papers batch by batch.
+
+    Sources are tried in the same order as fetch_paper (PMC full text, optionally
+    Europe PMC, then the abstract), but each step covers a whole batch of PMIDs.
+
+    Args:
+        pmids (Iterable[str]): PubMed IDs (duplicates are fetched once).
+        skip_sections (Iterable[str], optional): Full-text section types to leave out.
+        use_europepmc (bool): Also try Europe PMC full text for PMIDs without PMC
+            full text. Europe PMC has no batch endpoint, so this costs one request per
+            such PMID; off by default.
+
+    Yields:
+        tuple: (pmid, paper) with paper as returned by fetch_paper, or None if
+        every source failed. Each ELINK_BATCH_SIZE batch is yielded as soon as it is done.
+    """
+    pmids = list(dict.fromkeys(str(pmid).strip() for pmid in pmids))
+    for start in range(0, len(pmids), ELINK_BATCH_SIZE):
+        batch = pmids[start:start + ELINK_BATCH_SIZE]
+        papers = {}
+
+        # Step 1: NCBI PMC full text for every linked PMCID in the batch
+        try:
+            links = find_pmcids_bulk(batch)
+            pmcid_to_pmid = {pmcid: pmid for pmid in batch for pmcid in links.get(pmid, [])}
+            for pmcid, paper in fetch_pmc_articles_bulk(list(pmcid_to_pmid), skip_sections).items():
+                papers.setdefault(pmcid_to_pmid[pmcid], paper)
+        except Exception as e:
+            logging.warning(f"NCBI PMC bulk fetch failed: {e}")
+
+        # Step 2: Europe PMC full text, one request per remaining PMID
+        if use_europepmc:
+            for pmid in batch:
+                if pmid not in papers:
+                    paper = fetch_europepmc_fulltext(pmid, skip_sections)
+                    if paper:
+                        papers[pmid] = paper
+
+        # Step 3: Entrez abstracts for the rest
+        remaining = [pmid for pmid in batch if pmid not in papers]
+        if remaining:
+            papers.update(fetch_abstracts_bulk(remaining))
+
+        logging.info(f"📦 Bulk fetch: {len(papers)}/{len(batch)} paper(s) retrieved "
+                     f"({start + len(batch)}/{len(pmids)} PMIDs done)")
+        for pmid in batch:
+            yield pmid, papers.get(pmid)
+
+def find_pmcids_bulk(pmids) -> dict:
+    """
+    Return {pmid: [pmcid, ...]} for many PMIDs with a single Entrez elink request.
+
+    IDs are sent as repeated `id` parameters, so NCBI answers with one LinkSet
+    per PMID and the mapping stays one-to-one. PMIDs without a PMC link are absent.
+    """
+    handle = http_client.entrez("elink", dbfrom="pubmed", db="pmc", id=list(pmids), linkname="pubmed_pmc")
+    records = Entrez.read(handle)
+    links = {}
+    for record in records:
+        ids = [link["Id"] for db in record.get("LinkSetDb", []) for link in db["Link"]]
+        if ids and record.get("IdList"):
+            links[str(record["IdList"][0])] = ids
+    return links
+
+def fetch_pmc_articles_bulk(pmcids, skip_sections=None, batch_size: int = None) -> dict:
+    """
+    Fetch PMC articles in batches and split each combined <pmc-articleset> per article.
+
+    Args:
+        pmcids (list[str]): PMC IDs, with or without the "PMC" prefix.
+        skip_sections (Iterable[str], optional): Full-text section types to leave out.
+        batch_size (int, optional): Articles per efetch (default PMC_EFETCH_BATCH_SIZE).
+
+    Returns:
+        dict: {pmcid (as given): paper dict} for articles that have a full-text body.
+    """
+    requested = {_pmc_number(pmcid): pmcid for pmcid in pmcids}
+    ids = list(requested)
+    batch_size = batch_size or PMC_EFETCH_BATCH_SIZE
+
+    papers = {}
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        try:
+            handle = http_client.entrez("efetch", db="pmc", id=",".join(batch), rettype="full", retmode="xml")
+            documents = parse_article_set(handle.read())
+        except Exception as e:
+            logging.warning(f"NCBI PMC bulk fetch failed for {len(batch)} article(s): {e}")
+            continue
+        for document in documents:
+            number = next((_pmc_number(document["ids"][key]) for key in ("pmc", "pmcid", "pmc-uid")
+                           if document["ids"].get(key)), None)
+            paper = _paper_from_document(document, "NCBI PMC full text", skip_sections)
+            if number in requested and paper:
+                papers[requested[number]] = paper
+    logging.info(f"✅ Full text retrieved from NCBI PMC for {len(papers)}/{len(ids)} article(s).")
+    return papers
+
+def fetch_abstracts_bulk(pmids, batch_size: int = None) -> dict:
+    """
+    Fetch PubMed titles and abstracts in batches (Entrez efetch, PubMed XML).
+
+    Returns:
+        dict: {pmid: paper dict} with "title"/"abstract" section spans; PMIDs
+        without a title or abstract are absent.
+    """
+    pmids = list(pmids)
+    batch_size = batch_size or ABSTRACT_EFETCH_BATCH_SIZE
+
+    papers = {}
+    for start in range(0, len(pmids), batch_size):
+        batch = pmids[start:start + batch_size]
+        try:
+            papers.update(_fetch_pubmed_abstracts(batch))
+        except Exception as e:
+            logging.warning(f"Entrez bulk abstract fetch failed: {e}")
+    return papers
+
+def _fetch_pubmed_abstracts(pmids) -> dict:
+    """One Entrez efetch of PubMed XML; returns {pmid: paper dict} for records with a title or abstract."""
+    handle = http_client.entrez("efetch", db="pubmed", id=",".join(pmids), rettype="abstract", retmode="xml")
+    records = Entrez.read(handle)
+    papers = {}
+    for article in records.get("PubmedArticle", []):
+        citation = article["MedlineCitation"]
+        text, sections = _render_pubmed_article(citation["Article"])
+        if text:
+            papers[str(citation["PMID"])] = {"text": text, "source": "Entrez abstract", "sections": sections}
+    return papers
+
+def _render_pubmed_article(article) -> tuple[str, list]:
+    """Join a PubMed record's title and (possibly labelled) abstract paragraphs."""
+    paragraphs = []
+    for part in article.get("Abstract", {}).get("AbstractText", []):
+        label = getattr(part, "attributes", {}).get("Label")
+        paragraphs.append(f"{label}: {part}" if label else str(part))
+    document = {"title": str(article.get("ArticleTitle", "")).strip(), "abstract": "\n".join(paragraphs).strip()}
+    return render_document(document, skip_sections=())
+
+def _pmc_number(pmcid: str) -> str:
+    """Normalize "PMC123" / "123" to "123" (elink returns bare numbers, article XML either)."""
+    pmcid = str(pmcid).strip()
+    return pmcid[3:] if pmcid.upper().startswith("PMC") else pmcid
+
+def _paper_from_jats(xml, source: str, skip_sections=None) -> Optional[dict]:
+    """Parse full-text XML into a paper dict, or None if it has no article body."""
+    return _paper_from_document(parse_jats(xml), source, skip_sections)
+
+def _paper_from_document(document: dict, source: str, skip_sections=None) -> Optional[dict]:
+    """Render a parsed JATS document into a paper dict, or None if it has no article body."""
+    if not document["has_body"]:
+        return None
+
+    text, sections = render_document(document, skip_sections)
+    kept = len({section_type for _, _, section_type in sections})
+    logging.info(f"📑 Parsed {len(document['sections'])} section(s), {len(document['tables'])} table(s), "
+                 f"{len(document['figures'])} figure(s); {len(text):,} characters from {kept} section type(s) kept")
+    return {"text": text, "source": source, "sections": sections}
 
 def fetch_local_text(filepath: str) -> Optional[str]:
     """
@@ -1,13 +1,267 @@
-import requests
+import gzip
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
 from pyliftover import LiftOver
 
-# Initialize liftover converter for hg38 → hg19
-lo = LiftOver('hg38', 'hg19')
+from paper2kb import http_client
+
+# ----------------------------------------
+# Offline Coordinate Index
+# ----------------------------------------
+
+# SQLite index of gene spans compiled from Ensembl/GENCODE GTF or GFF3 files by
+# scripts/build_gene_index.py. For each genome build it holds, lookups never hit
+# the network, and hg19 spans are native rather than lifted over.
+GENE_INDEX_PATH = os.getenv("PAPER2KB_GENE_INDEX", "data/reference/gene_coordinates.db")
+
+BUILDS = ("hg38", "hg19")
+
+_GENE_INDEX = None
+_GENE_INDEX_KEY = None
+_GENE_INDEX_META = {}
+_GENE_INDEX_LOCK = threading.Lock()
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS genes (
+    build TEXT NOT NULL,
+    ensembl_id TEXT NOT NULL,
+    symbol TEXT,
+    chrom TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    strand TEXT,
+    PRIMARY KEY (build, ensembl_id)
+);
+CREATE INDEX IF NOT EXISTS idx_genes_symbol ON genes (build, symbol);
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Version suffixes of Ensembl IDs ("ENSG00000198793.13"); PAR_Y copies keep their suffix
+ENSEMBL_VERSION = re.compile(r"\.\d+")
+GTF_ATTRIBUTE = re.compile(r'(\w+) "([^"]*)"')
+
+def get_gene_index():
+    """
+    Return a read-only connection to the offline coordinate index, or None.
+
+    The connection is opened lazily and reopened when GENE_INDEX_PATH changes, the
+    index is rebuilt, or after a fork, so worker processes never share a SQLite
+    handle; they do share the file's pages through the OS page cache.
+    """
+    global _GENE_INDEX, _GENE_INDEX_KEY, _GENE_INDEX_META
+    try:
+        stat = os.stat(GENE_INDEX_PATH)
+    except OSError:
+        return None
+    # build_gene_index replaces the file, so a rebuilt index has a new inode or mtime
+    key = (GENE_INDEX_PATH, stat.st_ino, stat.st_size, stat.st_mtime_ns, os.getpid())
+    if _GENE_INDEX is not None and _GENE_INDEX_KEY == key:
+        return _GENE_INDEX
+    with _GENE_INDEX_LOCK:
+        if _GENE_INDEX is None or _GENE_INDEX_KEY != key:
+            uri = Path(GENE_INDEX_PATH).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            _GENE_INDEX_META = dict(conn.execute("SELECT key, value FROM index_meta"))
+            _GENE_INDEX, _GENE_INDEX_KEY = conn, key
+    return _GENE_INDEX
+
+def gene_index_version():
+    """
+    Identifier of the offline coordinate index (changes whenever a source file does), or None.
+
+    Returns:
+        str | None: e.g. "hg38:Homo_sapiens.GRCh38.112.gtf.gz hg19:... (3f2a9c01d4e5b6a7)".
+    """
+    if get_gene_index() is None:
+        return None
+    sources = " ".join(f"{build}:{_GENE_INDEX_META[f'source_{build}']}" for build in BUILDS
+                       if f"source_{build}" in _GENE_INDEX_META)
+    return f"{sources} ({_GENE_INDEX_META.get('version')})"
+
+def lookup_stored_coordinates(symbols, build: str = "hg38", ensembl_ids: dict = None):
+    """
+    Look up gene spans in the offline coordinate index.
+
+    Genes are matched by Ensembl ID when one is given, else by symbol. A symbol on
+    several sequences resolves to its primary-chromosome copy (e.g. X over the Y
+    pseudoautosomal copy, chromosomes over patches).
+
+    Args:
+        symbols (Iterable[str]): Official HGNC gene symbols.
+        build (str): 'hg38' or 'hg19'.
+        ensembl_ids (dict, optional): {symbol: Ensembl gene ID}, e.g. from HGNC enrichment.
+
+    Returns:
+        dict | None: {symbol: {"<build>_chr", "<build>_start", "<build>_end"} or None},
+        or None if no index is available for this build.
+    """
+    conn = get_gene_index()
+    if conn is None or f"source_{build}" not in _GENE_INDEX_META:
+        return None
+
+    ensembl_ids = ensembl_ids or {}
+    results = {}
+    with _GENE_INDEX_LOCK:
+        for symbol in {symbol for symbol in symbols if symbol}:
+            row = None
+            ensembl_id = ensembl_ids.get(symbol)
+            if ensembl_id:
+                row = conn.execute(
+                    "SELECT chrom, start, end FROM genes WHERE build = ? AND ensembl_id = ?",
+                    (build, ENSEMBL_VERSION.sub("", ensembl_id))
+                ).fetchone()
+            if row is None:
+                row = conn.execute(
+                    "SELECT chrom, start, end FROM genes WHERE build = ? AND symbol = ? "
+                    "ORDER BY length(chrom), chrom, ensembl_id LIMIT 1",
+                    (build, symbol.upper())
+                ).fetchone()
+            results[symbol] = {f"{build}_chr": row[0], f"{build}_start": row[1], f"{build}_end": row[2]} if row else None
+    return results
+
+def build_gene_index(db_path: str, hg38_path: str = None, hg19_path: str = None, batch_size: int = 10000) -> dict:
+    """
+    Build the offline coordinate index from gene annotation files.
+
+    Each file may be an Ensembl or GENCODE GTF or GFF3 (.gtf/.gff3, optionally
+    gzipped), e.g. Homo_sapiens.GRCh38.112.gtf.gz for hg38 and
+    gencode.v19.annotation.gtf.gz or Homo_sapiens.GRCh37.87.gtf.gz for hg19.
+    Only `gene` records are kept; chromosome names are stored the way Ensembl
+    REST reports them ("1", "X", "MT").
+
+    Returns:
+        dict: {build: number of genes written}.
+
+    Raises:
+        ValueError: If no annotation file is given.
+    """
+    sources = {build: path for build, path in (("hg38", hg38_path), ("hg19", hg19_path)) if path}
+    if not sources:
+        raise ValueError("build_gene_index needs at least one of hg38_path or hg19_path")
+
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    tmp_path = f"{db_path}.tmp{os.getpid()}"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript(INDEX_SCHEMA)
+
+    counts, meta, digest = {}, [], hashlib.sha256()
+    for build, path in sources.items():
+        written, batch = 0, []
+        for gene in _iter_annotation_genes(path):
+            batch.append((build, *gene))
+            if len(batch) >= batch_size:
+                conn.executemany("INSERT OR REPLACE INTO genes VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                written += len(batch)
+                batch = []
+        conn.executemany("INSERT OR REPLACE INTO genes VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+        counts[build] = written + len(batch)
+
+        checksum = _file_sha256(path)
+        digest.update(f"{build}:{checksum}".encode("utf-8"))
+        meta += [
+            (f"source_{build}", os.path.basename(path)),
+            (f"sha256_{build}", checksum),
+            (f"genes_{build}", str(counts[build])),
+        ]
+
+    conn.executemany("INSERT OR REPLACE INTO index_meta VALUES (?, ?)", meta + [
+        ("version", digest.hexdigest()[:16]),
+        ("built_at", datetime.now().isoformat(timespec="seconds")),
+    ])
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, db_path)
+    return counts
+
+def _iter_annotation_genes(path: str):
+    """Yield (ensembl_id, symbol, chrom, start, end, strand) for each gene record of a GTF/GFF3 file."""
+    gff3 = ".gff" in os.path.basename(path).lower()
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 9 or fields[2] != "gene":
+                continue
+
+            if gff3:
+                attributes = dict(item.split("=", 1) for item in fields[8].split(";") if "=" in item)
+                gene_id = attributes.get("gene_id") or attributes.get("ID", "").removeprefix("gene:")
+                symbol = attributes.get("gene_name") or attributes.get("Name")
+            else:
+                attributes = dict(GTF_ATTRIBUTE.findall(fields[8]))
+                gene_id = attributes.get("gene_id")
+                symbol = attributes.get("gene_name")
+            if not gene_id:
+                continue
+
+            chrom = fields[0].removeprefix("chr")
+            yield (
+                ENSEMBL_VERSION.sub("", gene_id),
+                symbol.upper() if symbol else None,
+                "MT" if chrom == "M" else chrom,
+                int(fields[3]),
+                int(fields[4]),
+                fields[6],
+            )
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 ** 2), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# ----------------------------------------
+# Coordinate Lookup
+# ----------------------------------------
+
+ENSEMBL_LOOKUP_URL = "https://rest.ensembl.org/lookup/symbol/homo_sapiens"
+
+# Symbols per POST lookup (the Ensembl REST maximum). Batches are sent one after
+# another; 429 answers are retried after Retry-After by the shared session.
+ENSEMBL_BATCH_SIZE = 1000
+
+# Liftover converter for hg38 → hg19, created on first use by get_liftover()
+_LIFTOVER = None
+_LIFTOVER_LOCK = threading.Lock()
+
+def get_liftover():
+    """
+    Return the shared hg38 → hg19 LiftOver converter, loading the chain file on first use.
+
+    Safe to call from several threads.
+    """
+    global _LIFTOVER
+    if _LIFTOVER is None:
+        with _LIFTOVER_LOCK:
+            if _LIFTOVER is None:
+                _LIFTOVER = LiftOver('hg38', 'hg19')
+    return _LIFTOVER
 
 def add_coordinates(gene_entries, build="both"):
     """
     Add genomic coordinates (hg38 and/or hg19) to a list of gene entries.
 
+    Each distinct symbol is looked up once. Builds covered by the offline
+    coordinate index (GENE_INDEX_PATH) are read from it without any request,
+    matching genes by their 'ensembl_gene_id' when present. Otherwise hg38 spans
+    come from Ensembl in batched requests (see get_ensembl_coordinates_batch)
+    and hg19 spans are lifted over from them.
+
     Args:
         gene_entries (list of dict): Gene metadata, each with at least a 'symbol' key.
         build (str): One of 'hg38', 'hg19', or 'both'. Controls which coordinates to add.
@@ -15,36 +269,78 @@ def add_coordinates(gene_entries, build="both"):
     Returns:
         list of dict: Updated gene entries with coordinate fields added.
     """
+    symbols = [gene['symbol'] for gene in gene_entries]
+    ensembl_ids = {gene['symbol']: gene['ensembl_gene_id'] for gene in gene_entries if gene.get('ensembl_gene_id')}
+
+    # Native hg19 spans from the offline index, when it has them
+    hg19_by_symbol = lookup_stored_coordinates(symbols, "hg19", ensembl_ids) if build in ['hg19', 'both'] else None
+
+    hg38_by_symbol = {}
+    if build in ['hg38', 'both'] or hg19_by_symbol is None:
+        hg38_by_symbol = lookup_stored_coordinates(symbols, "hg38", ensembl_ids)
+        if hg38_by_symbol is None:
+            hg38_by_symbol = get_ensembl_coordinates_batch(symbols)
+
+    # Otherwise convert hg38 to hg19 using liftover, once per symbol
+    if build in ['hg19', 'both'] and hg19_by_symbol is None:
+        hg19_by_symbol = {
+            symbol: lift_hg38_to_hg19(coords["hg38_chr"], coords["hg38_start"])
+            for symbol, coords in hg38_by_symbol.items()
+            if coords and coords.get("hg38_chr") and coords.get("hg38_start")
+        }
+
+    # Missing coordinates are filled with None placeholders
     for gene in gene_entries:
         symbol = gene['symbol']
-        coords = get_ensembl_coordinates(symbol)
-
-        # Add hg38 coordinates if available
-        if coords:
-            if build in ['hg38', 'both']:
-                gene.update({
-                    "hg38_chr": coords.get("hg38_chr"),
-                    "hg38_start": coords.get("hg38_start"),
-                    "hg38_end": coords.get("hg38_end")
-                })
-
-            # Convert to hg19 using liftover
-            if build in ['hg19', 'both'] and coords.get("hg38_chr") and coords.get("hg38_start"):
-                lifted = lift_hg38_to_hg19(coords["hg38_chr"], coords["hg38_start"])
-                gene.update({
-                    "hg19_chr": lifted.get("hg19_chr"),
-                    "hg19_start": lifted.get("hg19_start"),
-                    "hg19_end": lifted.get("hg19_end")
-                })
-        else:
-            # If coordinates are missing, fill with None placeholders
-            if build in ['hg38', 'both']:
-                gene.update({"hg38_chr": None, "hg38_start": None, "hg38_end": None})
-            if build in ['hg19', 'both']:
-                gene.update({"hg19_chr": None, "hg19_start": None, "hg19_end": None})
+        if build in ['hg38', 'both']:
+            coords = hg38_by_symbol.get(symbol) or {}
+            gene.update({
+                "hg38_chr": coords.get("hg38_chr"),
+                "hg38_start": coords.get("hg38_start"),
+                "hg38_end": coords.get("hg38_end")
+            })
+        if build in ['hg19', 'both']:
+            coords = hg19_by_symbol.get(symbol) or {}
+            gene.update({
+                "hg19_chr": coords.get("hg19_chr"),
+                "hg19_start": coords.get("hg19_start"),
+                "hg19_end": coords.get("hg19_end")
+            })
 
     return gene_entries
 
+def get_ensembl_coordinates_batch(symbols, batch_size: int = ENSEMBL_BATCH_SIZE) -> dict:
+    """
+    Look up hg38 coordinates for many symbols with Ensembl's POST symbol endpoint.
+
+    Genes are looked up without transcript expansion, `batch_size` symbols per
+    request. A single symbol is fetched with get_ensembl_coordinates; if a batch
+    request fails, its symbols are retried that way one by one.
+
+    Args:
+        symbols (Iterable[str]): Official HGNC gene symbols (duplicates are looked up once).
+        batch_size (int): Symbols per request (at most 1000).
+
+    Returns:
+        dict: {symbol: coordinates dict or None} (see get_ensembl_coordinates).
+    """
+    # Sorted so the same symbols form the same requests, and hit the HTTP cache, next time
+    unique = sorted({symbol for symbol in symbols if symbol})
+    if len(unique) == 1:
+        return {unique[0]: get_ensembl_coordinates(unique[0])}
+
+    results = {}
+    for i in range(0, len(unique), batch_size):
+        batch = unique[i:i + batch_size]
+        found = _lookup_batch(batch)
+        if found is None:
+            results.update((symbol, get_ensembl_coordinates(symbol)) for symbol in batch)
+            continue
+        for symbol in batch:
+            data = found.get(symbol)
+            results[symbol] = _coordinates_from_lookup(data) if data else None
+    return results
+
 def get_ensembl_coordinates(symbol):
     """
     Query Ensembl REST API to get gene coordinates for hg38.
@@ -56,23 +352,40 @@ def get_ensembl_coordinates(symbol):
         dict or None: Dictionary with 'hg38_chr', 'hg38_start', and 'hg38_end', or None if lookup fails.
     """
     try:
-        response = requests.get(
-            f"https://rest.ensembl.org/lookup/symbol/homo_sapiens/{symbol}?expand=1",
-            headers={"Content-Type": "application/json"},
-            timeout=10
+        response = http_client.get(
+            f"{ENSEMBL_LOOKUP_URL}/{symbol}",
+            headers={"Content-Type": "application/json"}
         )
         if response.status_code != 200:
             return None
-        data = response.json()
-        return {
-            "hg38_chr": data.get("seq_region_name"),
-            "hg38_start": data.get("start"),
-            "hg38_end": data.get("end")
-        }
+        return _coordinates_from_lookup(response.json())
     except Exception as e:
         print(f"[WARN] Failed to get Ensembl coordinates for {symbol}: {e}")
         return None
 
+def _lookup_batch(symbols):
+    """POST one batch of symbols; returns Ensembl's {symbol: gene} map, or None if the request failed."""
+    try:
+        response = http_client.post(
+            ENSEMBL_LOOKUP_URL,
+            json={"symbols": symbols},
+            headers={"Content-Type": "application/json", "Accept": "application/json"}
+        )
+        if response.status_code != 200:
+            print(f"[WARN] Ensembl batch lookup for {len(symbols)} symbols returned {response.status_code}")
+            return None
+        return response.json()
+    except Exception as e:
+        print(f"[WARN] Ensembl batch lookup for {len(symbols)} symbols failed: {e}")
+        return None
+
+def _coordinates_from_lookup(data: dict) -> dict:
+    return {
+        "hg38_chr": data.get("seq_region_name"),
+        "hg38_start": data.get("start"),
+        "hg38_end": data.get("end")
+    }
+
 def lift_hg38_to_hg19(chrom, start):
     """
     Convert hg38 coordinates to hg19 using pyliftover.
@@ -86,7 +399,7 @@ def lift_hg38_to_hg19(chrom, start):
               Returns None values on failure.
     """
     try:
-        lifted = lo.convert_coordinate(f"chr{chrom}", int(start))
+        lifted = get_liftover().convert_coordinate(f"chr{chrom}", int(start))
         if lifted:
             hg19_chr, hg19_pos, _, _ = lifted[0]
             return {
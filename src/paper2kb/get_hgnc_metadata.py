@@ -1,62 +1,194 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
 
-def enrich_with_hgnc(gene_entries):
+from paper2kb import extract_genes, http_client
+from paper2kb.hgnc_index import HGNCIndex, load_hgnc_index
+
+HGNC_FETCH_URL = "https://rest.genenames.org/fetch/symbol/{}"
+HGNC_SEARCH_URL = "https://rest.genenames.org/search/{}"
+
+# Symbols OR'd into one search query, and queries in flight at once
+# (HGNC allows 10 requests/second; see http_client.HOST_POOL_SIZES)
+HGNC_BATCH_SIZE = 50
+HGNC_MAX_WORKERS = 4
+
+# Reference files opened by path, kept for the life of the process
+_REFERENCES = {}
+
+def enrich_with_hgnc(gene_entries, reference=None, rest_fallback=True):
     """
     Enrich a list of gene entries with HGNC metadata.
 
-    For each gene dictionary with a 'symbol' field, this function queries
-    the HGNC REST API and adds the following fields:
+    For each gene dictionary with a 'symbol' field, this function adds the
+    following fields:
       - hgnc_id (e.g., 'HGNC:1234')
       - name (official gene name)
       - alias_symbol (list of aliases)
+      - ensembl_gene_id (e.g., 'ENSG00000198793')
+
+    Symbols are looked up in the local HGNC reference first, which answers in
+    memory without any request. Symbols missing from it are queried from the
+    HGNC REST API once each, in batches (see fetch_hgnc_metadata_batch), and
+    the results are copied to every entry with that symbol.
 
     Args:
         gene_entries (list of dict): Each entry must include a 'symbol' key.
+        reference (HGNCIndex | str, optional): HGNC reference, or a path to
+            hgnc_complete_set.txt or its compiled index (default: the reference
+            loaded by extract_genes.load_hgnc_reference, if any).
+        rest_fallback (bool): Query the REST API for symbols missing locally
+            (or for every symbol when no reference is loaded). If False, their
+            fields are left empty.
 
     Returns:
         list of dict: Gene entries with HGNC metadata fields added.
     """
-    enriched = []
+    index = _reference_index(reference)
+    local, remote = {}, set()
     for gene in gene_entries:
         symbol = gene.get('symbol')
-        url = f"https://rest.genenames.org/fetch/symbol/{symbol}"
-        headers = {"Accept": "application/json"}
-
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                docs = data.get("response", {}).get("docs", [])
-                if docs:
-                    doc = docs[0]
-                    aliases = doc.get("alias_symbol")
-                    gene.update({
-                        "hgnc_id": doc.get("hgnc_id"),
-                        "name": doc.get("name"),
-                        "alias_symbol": aliases if isinstance(aliases, list) else []
-                    })
-                else:
-                    # Symbol not found in HGNC
-                    gene.update({
-                        "hgnc_id": None,
-                        "name": None,
-                        "alias_symbol": []
-                    })
-            else:
-                # Request failed (e.g., 404 or 500)
-                gene.update({
-                    "hgnc_id": None,
-                    "name": None,
-                    "alias_symbol": []
-                })
-        except Exception as e:
-            print(f"[WARN] Failed to fetch HGNC metadata for {symbol}: {e}")
-            gene.update({
-                "hgnc_id": None,
-                "name": None,
-                "alias_symbol": []
-            })
+        if symbol in local or symbol in remote:
+            continue
+        record = index.get(symbol) if index is not None and symbol else None
+        if record is not None:
+            local[symbol] = _metadata_from_record(record)
+        else:
+            remote.add(symbol)
+
+    fetched = fetch_hgnc_metadata_batch(remote) if rest_fallback and remote else {}
 
+    enriched = []
+    for gene in gene_entries:
+        symbol = gene.get('symbol')
+        metadata = local.get(symbol) or fetched.get(symbol) or _empty_metadata()
+        gene.update(metadata, alias_symbol=list(metadata["alias_symbol"]))
         enriched.append(gene)
 
     return enriched
+
+def fetch_hgnc_metadata_batch(symbols, batch_size: int = HGNC_BATCH_SIZE, max_workers: int = HGNC_MAX_WORKERS) -> dict:
+    """
+    Query the HGNC REST API for many symbols with few requests.
+
+    Unique symbols are OR'd into documented search queries
+    (symbol:A+OR+symbol:B) of `batch_size`, sent `max_workers` at a time over
+    the pooled session. HGNC search only returns the matching symbols, so
+    symbols a batch does not find are answered as unknown with no further
+    request, and only the symbols it finds are fetched one by one for their
+    full record. Symbols of a failed batch are fetched one by one as well, so
+    the result is the same as querying each symbol on its own.
+
+    enrich_with_hgnc sends only the symbols missing from the local HGNC
+    reference, which are mostly not approved symbols at all, so most of them
+    are settled by the batched searches.
+
+    Args:
+        symbols (Iterable[str]): Official HGNC gene symbols (duplicates are fetched once).
+        batch_size (int): Symbols per batched query.
+        max_workers (int): Concurrent requests.
+
+    Returns:
+        dict: {symbol: metadata} with the fields of fetch_hgnc_metadata.
+    """
+    # Sorted so the same symbols form the same batches, and hit the HTTP cache, next time
+    unique = sorted({symbol for symbol in symbols if symbol})
+    batches = [unique[i:i + batch_size] for i in range(0, len(unique), batch_size)] if len(unique) > 1 else []
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch, found in zip(batches, executor.map(_search_batch, batches)):
+            if found is None:
+                continue
+            for symbol in batch:
+                if symbol.upper() not in found:
+                    results[symbol] = _empty_metadata()
+
+        remaining = [symbol for symbol in unique if symbol not in results]
+        for symbol, metadata in zip(remaining, executor.map(fetch_hgnc_metadata, remaining)):
+            results[symbol] = metadata
+
+    return results
+
+def fetch_hgnc_metadata(symbol):
+    """
+    Query the HGNC REST API for one official symbol.
+
+    Args:
+        symbol (str): Official HGNC gene symbol.
+
+    Returns:
+        dict: hgnc_id, name, alias_symbol and ensembl_gene_id (empty if the
+        symbol is unknown or the request fails).
+    """
+    url = HGNC_FETCH_URL.format(symbol)
+    headers = {"Accept": "application/json"}
+
+    try:
+        response = http_client.get(url, headers=headers)
+        if response.status_code == 200:
+            data = response.json()
+            docs = data.get("response", {}).get("docs", [])
+            if docs:
+                doc = docs[0]
+                aliases = doc.get("alias_symbol")
+                return {
+                    "hgnc_id": doc.get("hgnc_id"),
+                    "name": doc.get("name"),
+                    "alias_symbol": aliases if isinstance(aliases, list) else [],
+                    "ensembl_gene_id": doc.get("ensembl_gene_id"),
+                }
+        # Symbol not found in HGNC, or request failed (e.g., 404 or 500)
+        return _empty_metadata()
+    except Exception as e:
+        print(f"[WARN] Failed to fetch HGNC metadata for {symbol}: {e}")
+        return _empty_metadata()
+
+# ----------------------------------------
+# Helpers
+# ----------------------------------------
+
+def _search_query(symbols) -> str:
+    """Build the OR'd HGNC search query for a list of symbols."""
+    return "+OR+".join(f"symbol:{symbol}" if symbol.isalnum() else f'symbol:"{symbol}"' for symbol in symbols)
+
+def _search_batch(symbols):
+    """One OR'd search query; returns the set of SYMBOLS HGNC found, or None if the query failed."""
+    url = HGNC_SEARCH_URL.format(_search_query(symbols))
+    headers = {"Accept": "application/json"}
+
+    try:
+        response = http_client.get(url, headers=headers)
+        if response.status_code != 200:
+            print(f"[WARN] Batched HGNC search for {len(symbols)} symbols returned {response.status_code}")
+            return None
+        docs = response.json()["response"]["docs"]
+    except Exception as e:
+        print(f"[WARN] Batched HGNC search for {len(symbols)} symbols failed: {e}")
+        return None
+
+    return {doc["symbol"].upper() for doc in docs if doc.get("symbol")}
+
+def _reference_index(reference):
+    """Return the HGNCIndex to enrich from, or None to use the REST API only."""
+    if reference is None:
+        return extract_genes.HGNC_INDEX
+    if isinstance(reference, HGNCIndex):
+        return reference
+    if reference not in _REFERENCES:
+        _REFERENCES[reference] = load_hgnc_index(reference)
+    return _REFERENCES[reference]
+
+def _metadata_from_record(record: dict) -> dict:
+    return {
+        "hgnc_id": record["hgnc_id"] or None,
+        "name": record["name"] or None,
+        "alias_symbol": record["alias_symbol"],
+        "ensembl_gene_id": record["ensembl_gene_id"] or None,
+    }
+
+def _empty_metadata() -> dict:
+    return {
+        "hgnc_id": None,
+        "name": None,
+        "alias_symbol": [],
+        "ensembl_gene_id": None,
+    }
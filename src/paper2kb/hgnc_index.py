@@ -0,0 +1,397 @@
+import csv
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import zlib
+from collections.abc import Mapping, Set
+from datetime import datetime
+
+# ----------------------------------------
+# Index File Format
+# ----------------------------------------
+#
+# A compiled HGNC index is a single binary file:
+#
+#   header       magic, format version, (offset, length) of each section
+#   meta         JSON: source file size/mtime/sha256, HGNC update date, counts
+#   records      one UTF-8 line per gene, fields in RECORD_FIELDS order
+#   offsets      uint32 start of each record (+ end sentinel)
+#   symbols      hash table: official symbol  → record
+#   aliases      hash table: alias symbol     → record
+#   previous     hash table: previous symbol  → record
+#   multi_token  "NAME\tSYMBOL" lines for names containing punctuation
+#
+# Hash tables use open addressing over CRC32 keys, so lookups read the file in
+# place. The file is opened with mmap, which makes loading take milliseconds and
+# lets worker processes share the same read-only pages.
+
+MAGIC = b"P2KBHGNC"
+FORMAT_VERSION = 1
+INDEX_SUFFIX = ".idx"
+
+RECORD_FIELDS = ["hgnc_id", "symbol", "name", "ensembl_gene_id", "locus_group", "alias_symbol", "prev_symbol"]
+SECTIONS = ["meta", "records", "offsets", "symbols", "aliases", "previous", "multi_token"]
+
+HEADER = struct.Struct("<8sI" + "QQ" * len(SECTIONS))
+TABLE_HEADER = struct.Struct("<II")   # slot count, key count
+SLOT = struct.Struct("<III")          # key hash, key offset, record index + 1 (0 = empty)
+KEY_LENGTH = struct.Struct("<H")
+
+SINGLE_WORD = re.compile(r"\w+")
+
+# ----------------------------------------
+# Building
+# ----------------------------------------
+
+def compile_hgnc_reference(tsv_path: str) -> bytes:
+    """
+    Compile an HGNC TSV (hgnc_complete_set.txt) into the binary index format.
+
+    Args:
+        tsv_path (str): Path to the HGNC complete set TSV.
+
+    Returns:
+        bytes: The compiled index.
+    """
+    records, symbols, aliases, previous = [], {}, {}, {}
+
+    with open(tsv_path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f, delimiter="\t"):
+            fields = [(row.get(field) or "").strip().replace("\t", " ") for field in RECORD_FIELDS]
+            if not fields[1]:
+                continue
+            idx = len(records)
+            records.append("\t".join(fields).encode("utf-8"))
+
+            symbols[fields[1].upper()] = idx
+            for alias in _split_multi(row.get("alias_symbol")):
+                aliases[alias.upper()] = idx
+            for prev in _split_multi(row.get("prev_symbol")):
+                previous[prev.upper()] = idx
+
+    # Names with punctuation (e.g. "HLA-A") for the fallback matcher; official
+    # symbols take precedence over an identical alias of another gene
+    symbol_of = {idx: symbol for symbol, idx in symbols.items()}
+    multi_token = {name: symbol_of[idx] for name, idx in aliases.items()
+                   if name not in symbols and not SINGLE_WORD.fullmatch(name)}
+    multi_token.update({symbol: symbol for symbol in symbols if not SINGLE_WORD.fullmatch(symbol)})
+
+    offsets, position = [], 0
+    for record in records:
+        offsets.append(position)
+        position += len(record) + 1
+    offsets.append(position)
+
+    stat = os.stat(tsv_path)
+    with open(tsv_path, "rb") as f:
+        sha256 = hashlib.sha256(f.read()).hexdigest()
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "source": os.path.basename(tsv_path),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_sha256": sha256,
+        "hgnc_updated": _read_last_updated(tsv_path),
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "n_records": len(records),
+        "n_aliases": len(aliases),
+        "n_previous": len(previous),
+    }
+
+    sections = {
+        "meta": json.dumps(meta).encode("utf-8"),
+        "records": b"\n".join(records) + b"\n",
+        "offsets": struct.pack(f"<{len(offsets)}I", *offsets),
+        "symbols": _encode_table(symbols),
+        "aliases": _encode_table(aliases),
+        "previous": _encode_table(previous),
+        "multi_token": "".join(f"{name}\t{symbol}\n" for name, symbol in multi_token.items()).encode("utf-8"),
+    }
+
+    layout, position = [], HEADER.size
+    for name in SECTIONS:
+        layout += [position, len(sections[name])]
+        position += len(sections[name])
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, *layout)
+    return header + b"".join(sections[name] for name in SECTIONS)
+
+def build_hgnc_index(tsv_path: str, index_path: str = None) -> str:
+    """
+    Compile an HGNC TSV and write the index next to it (or to `index_path`).
+
+    The file is written to a temporary name and renamed into place, so readers
+    never see a partially written index.
+
+    Returns:
+        str: Path of the written index.
+    """
+    index_path = index_path or default_index_path(tsv_path)
+    data = compile_hgnc_reference(tsv_path)
+
+    tmp_path = f"{index_path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, index_path)
+
+    logging.info(f"🗂️ HGNC index written to {index_path} ({len(data) / 1e6:.1f} MB)")
+    return index_path
+
+def default_index_path(tsv_path: str) -> str:
+    """Location of the compiled index for a TSV, e.g. hgnc_complete_set.idx."""
+    return os.path.splitext(tsv_path)[0] + INDEX_SUFFIX
+
+def _split_multi(value) -> list[str]:
+    """Split an HGNC multi-valued field ("A|B") into its non-empty parts."""
+    if not value:
+        return []
+    return [part.strip() for part in value.strip('"').split("|") if part.strip()]
+
+def _read_last_updated(tsv_path: str):
+    """Read the download timestamp written by scripts/update_hgnc.py, if present."""
+    path = os.path.join(os.path.dirname(tsv_path), "last_updated.txt")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+def _encode_table(keys: dict) -> bytes:
+    """Encode a {name: record_index} mapping as an open-addressing hash table."""
+    n_slots = 1 << max(3, (2 * len(keys)).bit_length())
+    mask = n_slots - 1
+    slots = bytearray(n_slots * SLOT.size)
+    occupied = [False] * n_slots
+    blob = bytearray()
+
+    for key, idx in keys.items():
+        data = key.encode("utf-8")
+        key_hash = zlib.crc32(data)
+        pos = key_hash & mask
+        while occupied[pos]:
+            pos = (pos + 1) & mask
+        occupied[pos] = True
+        SLOT.pack_into(slots, pos * SLOT.size, key_hash, len(blob), idx + 1)
+        blob += KEY_LENGTH.pack(len(data)) + data
+
+    return TABLE_HEADER.pack(n_slots, len(keys)) + bytes(slots) + bytes(blob)
+
+# ----------------------------------------
+# Reading
+# ----------------------------------------
+
+class _HashTable:
+    """Read-only view of one hash table section inside an index buffer."""
+
+    def __init__(self, buffer, offset: int):
+        self._buffer = buffer
+        self._n_slots, self._n_keys = TABLE_HEADER.unpack_from(buffer, offset)
+        self._mask = self._n_slots - 1
+        self._slots = offset + TABLE_HEADER.size
+        self._keys = self._slots + self._n_slots * SLOT.size
+
+    def __len__(self):
+        return self._n_keys
+
+    def get(self, key: str):
+        """Return the record index stored for `key`, or None."""
+        data = key.encode("utf-8")
+        key_hash = zlib.crc32(data)
+        pos = key_hash & self._mask
+        while True:
+            slot_hash, key_offset, value = SLOT.unpack_from(self._buffer, self._slots + pos * SLOT.size)
+            if not value:
+                return None
+            if slot_hash == key_hash and self._key_at(key_offset) == data:
+                return value - 1
+            pos = (pos + 1) & self._mask
+
+    def items(self):
+        """Yield (key, record_index) pairs in table order."""
+        for pos in range(self._n_slots):
+            _, key_offset, value = SLOT.unpack_from(self._buffer, self._slots + pos * SLOT.size)
+            if value:
+                yield self._key_at(key_offset).decode("utf-8"), value - 1
+
+    def _key_at(self, key_offset: int) -> bytes:
+        start = self._keys + key_offset
+        (length,) = KEY_LENGTH.unpack_from(self._buffer, start)
+        return bytes(self._buffer[start + KEY_LENGTH.size: start + KEY_LENGTH.size + length])
+
+class _SymbolSet(Set):
+    """Set-like view of official symbols (uppercase)."""
+
+    def __init__(self, table: _HashTable):
+        self._table = table
+
+    def __contains__(self, name):
+        return isinstance(name, str) and self._table.get(name) is not None
+
+    def __iter__(self):
+        return (key for key, _ in self._table.items())
+
+    def __len__(self):
+        return len(self._table)
+
+class _SymbolMap(Mapping):
+    """Mapping view from an alias or previous symbol (uppercase) to its official symbol."""
+
+    def __init__(self, index, table: _HashTable):
+        self._index = index
+        self._table = table
+
+    def __getitem__(self, name):
+        idx = self._table.get(name) if isinstance(name, str) else None
+        if idx is None:
+            raise KeyError(name)
+        return self._index.symbol_at(idx)
+
+    def __contains__(self, name):
+        return isinstance(name, str) and self._table.get(name) is not None
+
+    def __iter__(self):
+        return (key for key, _ in self._table.items())
+
+    def __len__(self):
+        return len(self._table)
+
+class HGNCIndex:
+    """
+    Read-only HGNC reference backed by a compiled index buffer (usually an mmap).
+
+    Attributes:
+        meta (dict): Build metadata (source checksum, HGNC update date, counts).
+        symbols (Set): Official symbols, uppercase.
+        aliases (Mapping): Alias symbol → official symbol, uppercase.
+        previous (Mapping): Previous symbol → official symbol, uppercase.
+    """
+
+    def __init__(self, buffer):
+        if len(buffer) < HEADER.size:
+            raise ValueError("Not an HGNC index: file too short")
+        magic, version, *layout = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not an HGNC index: bad magic bytes")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported HGNC index format {version} (expected {FORMAT_VERSION})")
+
+        self._buffer = buffer
+        self._sections = {name: (layout[2 * i], layout[2 * i + 1]) for i, name in enumerate(SECTIONS)}
+        self.meta = json.loads(self._section("meta"))
+
+        records_offset, _ = self._sections["records"]
+        offsets_offset, offsets_length = self._sections["offsets"]
+        self._records_offset = records_offset
+        self._offsets_offset = offsets_offset
+        self._n_records = offsets_length // 4 - 1
+
+        self.symbols = _SymbolSet(_HashTable(buffer, self._sections["symbols"][0]))
+        self.aliases = _SymbolMap(self, _HashTable(buffer, self._sections["aliases"][0]))
+        self.previous = _SymbolMap(self, _HashTable(buffer, self._sections["previous"][0]))
+
+    @property
+    def version(self) -> str:
+        """Identifier that changes whenever the format or the source reference changes."""
+        return f"v{FORMAT_VERSION}-{self.meta['source_sha256'][:16]}"
+
+    def __len__(self):
+        return self._n_records
+
+    def record(self, idx: int) -> dict:
+        """Decode record `idx` into a dict, with alias/previous symbols as lists."""
+        values = self._record_bytes(idx).decode("utf-8").split("\t")
+        record = dict(zip(RECORD_FIELDS, values))
+        record["alias_symbol"] = _split_multi(record["alias_symbol"])
+        record["prev_symbol"] = _split_multi(record["prev_symbol"])
+        return record
+
+    def symbol_at(self, idx: int) -> str:
+        """Official symbol (uppercase) of record `idx`, without decoding the full record."""
+        raw = self._record_bytes(idx)
+        start = raw.index(b"\t") + 1
+        return raw[start:raw.index(b"\t", start)].decode("utf-8").upper()
+
+    def get(self, symbol: str):
+        """Return the record for an official symbol (case-insensitive), or None."""
+        idx = self.symbols._table.get(symbol.upper())
+        return self.record(idx) if idx is not None else None
+
+    def resolve(self, name: str):
+        """Resolve a symbol, alias or previous symbol to its official symbol, or None."""
+        key = name.upper()
+        if key in self.symbols:
+            return key
+        return self.aliases.get(key) or self.previous.get(key)
+
+    def multi_token_names(self):
+        """Yield (name, official_symbol) for names containing punctuation, e.g. "HLA-A"."""
+        for line in self._section("multi_token").decode("utf-8").splitlines():
+            name, symbol = line.split("\t")
+            yield name, symbol
+
+    def close(self):
+        """Release the underlying memory map, if any."""
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def _section(self, name: str) -> bytes:
+        offset, length = self._sections[name]
+        return bytes(self._buffer[offset:offset + length])
+
+    def _record_bytes(self, idx: int) -> bytes:
+        if not 0 <= idx < self._n_records:
+            raise IndexError(idx)
+        start, end = struct.unpack_from("<II", self._buffer, self._offsets_offset + 4 * idx)
+        return bytes(self._buffer[self._records_offset + start:self._records_offset + end - 1])
+
+def open_hgnc_index(index_path: str) -> HGNCIndex:
+    """
+    Open a compiled index file via a read-only memory map.
+
+    Raises:
+        ValueError: If the file is not a compatible HGNC index.
+    """
+    with open(index_path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return HGNCIndex(buffer)
+
+def load_hgnc_index(path: str) -> HGNCIndex:
+    """
+    Load the HGNC reference from a compiled index or a TSV.
+
+    For a TSV path, a compiled index next to it is used when it was built from
+    the same file (same size and modification time) with the current format,
+    or when the TSV itself is missing. Otherwise the TSV is compiled in memory.
+
+    Args:
+        path (str): Path to an index file (.idx) or to hgnc_complete_set.txt.
+
+    Returns:
+        HGNCIndex: The loaded reference.
+    """
+    if path.endswith(INDEX_SUFFIX):
+        return open_hgnc_index(path)
+
+    index_path = default_index_path(path)
+    if os.path.exists(index_path):
+        try:
+            index = open_hgnc_index(index_path)
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️ Ignoring HGNC index {index_path}: {e}")
+        else:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Only the compiled index was shipped; there is no TSV to check it against
+                logging.info(f"📦 {path} not found — using the HGNC index {index_path} as-is")
+                return index
+            if (index.meta.get("source_size"), index.meta.get("source_mtime_ns")) == (stat.st_size, stat.st_mtime_ns):
+                return index
+            index.close()
+            logging.warning(f"⚠️ HGNC index {index_path} is out of date — rebuild it with scripts/build_hgnc_index.py")
+
+    return HGNCIndex(compile_hgnc_reference(path))
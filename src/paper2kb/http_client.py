@@ -0,0 +1,317 @@
+import contextvars
+import io
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from Bio import Entrez
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from paper2kb.disk_cache import DiskCache
+
+# ----------------------------------------
+# HTTP Response Cache
+# ----------------------------------------
+#
+# Every external lookup (HGNC, Ensembl, OLS, Open Targets, Entrez and Europe PMC)
+# goes through get(), post() or entrez() below. Once enable_http_cache() has been
+# called, responses are stored on disk keyed by method, URL, query, headers and
+# body, so re-running a corpus after a crash or a tweak repeats almost no requests.
+# Without it, requests go straight to the network as before.
+
+HTTP_CACHE_DIR = "data/cache/http"
+HTTP_CACHE_MAX_BYTES = 512 * 1024 ** 2
+
+DAY = 24 * 3600
+
+# Seconds a cached response stays valid, per service
+SERVICE_TTLS = {
+    "hgnc": 7 * DAY,          # symbols and IDs change with weekly HGNC releases
+    "ensembl": 30 * DAY,
+    "ols": 30 * DAY,
+    "opentargets": 30 * DAY,  # Open Targets Platform releases are quarterly
+    "entrez": 30 * DAY,
+    "europepmc": 30 * DAY,
+}
+DEFAULT_TTL = DAY
+
+# URL prefixes (host plus optional path) mapped to services, matched in order
+SERVICE_PREFIXES = [
+    ("rest.genenames.org", "hgnc"),
+    ("rest.ensembl.org", "ensembl"),
+    ("grch37.rest.ensembl.org", "ensembl"),
+    ("www.ebi.ac.uk/ols", "ols"),
+    ("www.ebi.ac.uk/europepmc", "europepmc"),
+    ("api.platform.opentargets.org", "opentargets"),
+    ("eutils.ncbi.nlm.nih.gov", "entrez"),
+]
+
+# Responses worth keeping: successes and definitive "not found" answers
+CACHEABLE_STATUS = {200, 404}
+
+_HTTP_CACHE = None
+_SERVICE_STATS = {}
+_STATS_LOCK = threading.Lock()
+
+# Rate limiter of the current context, called as throttle(service) before each
+# request that goes to the network (see set_throttle)
+_THROTTLE = contextvars.ContextVar("paper2kb_http_throttle", default=None)
+
+def enable_http_cache(directory: str = None, max_bytes: int = None) -> DiskCache:
+    """
+    Cache external API responses on disk for all paper2kb modules.
+
+    Args:
+        directory (str, optional): Cache directory (default HTTP_CACHE_DIR).
+        max_bytes (int, optional): Size budget (default HTTP_CACHE_MAX_BYTES); least
+            recently used responses are evicted beyond it.
+
+    Returns:
+        DiskCache: The active cache.
+    """
+    global _HTTP_CACHE
+    _HTTP_CACHE = DiskCache(directory or HTTP_CACHE_DIR, max_bytes or HTTP_CACHE_MAX_BYTES)
+    return _HTTP_CACHE
+
+def disable_http_cache():
+    """Send every request to the network again."""
+    global _HTTP_CACHE
+    _HTTP_CACHE = None
+
+def http_cache_stats() -> dict:
+    """
+    Hit/miss counters for this process.
+
+    Returns:
+        dict: {"hits", "misses", "writes", "evictions"} for the whole cache (zeros if
+        disabled) plus "services": {service: {"hits", "misses"}}.
+    """
+    cache = _HTTP_CACHE
+    stats = cache.stats if cache else {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+    with _STATS_LOCK:
+        stats["services"] = {service: dict(counts) for service, counts in _SERVICE_STATS.items()}
+    return stats
+
+def set_throttle(throttle):
+    """
+    Pace the requests sent from the current context (thread or asyncio task).
+
+    `throttle(service)` is called before every request that goes to the network,
+    and may block until the service's rate limit allows it. Answers from the
+    cache are returned without calling it. Pass None to remove the throttle.
+    """
+    _THROTTLE.set(throttle)
+
+def service_for(url: str) -> str:
+    """Return the service name of a URL (see SERVICE_PREFIXES), or its host if unknown."""
+    parts = urlsplit(url)
+    location = parts.netloc + parts.path
+    for prefix, service in SERVICE_PREFIXES:
+        if location.startswith(prefix):
+            return service
+    return parts.netloc
+
+# ----------------------------------------
+# Pooled Sessions
+# ----------------------------------------
+#
+# All requests share one keep-alive session per process, so repeated calls to a
+# service reuse open TLS connections. Connection errors and 429/5xx answers are
+# retried with exponential backoff (HTTP_BACKOFF × 1, 2, 4, ... seconds), waiting
+# for Retry-After instead when the server sends it.
+
+HTTP_RETRIES = int(os.getenv("PAPER2KB_HTTP_RETRIES", "4"))
+HTTP_BACKOFF = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# (connect, read) timeouts in seconds; PAPER2KB_HTTP_TIMEOUT sets the default read timeout
+DEFAULT_TIMEOUT = (5, float(os.getenv("PAPER2KB_HTTP_TIMEOUT", "10")))
+SERVICE_TIMEOUTS = {
+    "opentargets": (5, 30),   # batched GraphQL queries over many targets
+    "ensembl": (5, 30),       # batched symbol lookups of up to 1000 genes
+    "europepmc": (5, 30),     # full-text XML can be several MB
+}
+
+# Connections kept open per host, sized for the concurrent callers of each service
+HOST_POOL_SIZES = {
+    "eutils.ncbi.nlm.nih.gov": 8,   # async_fetch.MAX_CONCURRENCY
+    "www.ebi.ac.uk": 8,             # Europe PMC (async_fetch) and OLS
+    "rest.genenames.org": 4,
+    "rest.ensembl.org": 4,
+    "api.platform.opentargets.org": 4,
+}
+DEFAULT_POOL_SIZE = 4
+
+_SESSION = None
+_SESSION_PID = None
+_SESSION_LOCK = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    Return the shared session, creating it on first use.
+
+    A forked process gets its own session, so processes never share sockets.
+    """
+    global _SESSION, _SESSION_PID
+    if _SESSION is None or _SESSION_PID != os.getpid():
+        with _SESSION_LOCK:
+            if _SESSION is None or _SESSION_PID != os.getpid():
+                _SESSION = _new_session()
+                _SESSION_PID = os.getpid()
+    return _SESSION
+
+def close_session():
+    """Close pooled connections; the next request opens a new session with the current settings."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is not None and _SESSION_PID == os.getpid():
+            _SESSION.close()
+        _SESSION = None
+
+def _new_session() -> requests.Session:
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=None,              # the POSTs sent here are read-only queries and lookups
+        respect_retry_after_header=True,
+        raise_on_status=False,             # hand the last response to the caller once retries run out
+    )
+    session = requests.Session()
+    default = HTTPAdapter(pool_connections=len(HOST_POOL_SIZES), pool_maxsize=DEFAULT_POOL_SIZE, max_retries=retry)
+    session.mount("https://", default)
+    session.mount("http://", default)
+    for host, size in HOST_POOL_SIZES.items():
+        session.mount(f"https://{host}/", HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=retry))
+    return session
+
+# ----------------------------------------
+# Requests
+# ----------------------------------------
+
+def get(url: str, params: dict = None, headers: dict = None, timeout=None, service: str = None,
+        ttl: float = None) -> requests.Response:
+    """
+    HTTP GET through the response cache.
+
+    Args:
+        url (str): Request URL.
+        params (dict, optional): Query parameters.
+        headers (dict, optional): Request headers (part of the cache key, e.g. Accept).
+        timeout (float | tuple, optional): Seconds to wait for the server, or (connect, read)
+            (default: SERVICE_TIMEOUTS for the service, else DEFAULT_TIMEOUT).
+        service (str, optional): Service name for TTL, timeout and stats (default: from the URL).
+        ttl (float, optional): Override the service's TTL in seconds.
+
+    Returns:
+        requests.Response: The live response (after any retries), or one rebuilt from the cache.
+    """
+    return request("GET", url, params=params, headers=headers, timeout=timeout, service=service, ttl=ttl)
+
+def post(url: str, json: dict = None, data=None, headers: dict = None, timeout=None, service: str = None,
+         ttl: float = None) -> requests.Response:
+    """HTTP POST through the response cache; the body is part of the key (see get)."""
+    return request("POST", url, json=json, data=data, headers=headers, timeout=timeout, service=service, ttl=ttl)
+
+def request(method: str, url: str, params: dict = None, json: dict = None, data=None, headers: dict = None,
+            timeout=None, service: str = None, ttl: float = None) -> requests.Response:
+    """Send a GET or POST, answering from the cache when a fresh response is stored."""
+    service = service or service_for(url)
+    timeout = timeout or SERVICE_TIMEOUTS.get(service, DEFAULT_TIMEOUT)
+    cache = _HTTP_CACHE
+    if cache is None:
+        _wait_for_slot(service)
+        return _send(method, url, params=params, json=json, data=data, headers=headers, timeout=timeout)
+
+    key = _cache_key(method, url, params=params, json=json, data=data, headers=headers)
+    entry = cache.get(key, ttl=SERVICE_TTLS.get(service, DEFAULT_TTL) if ttl is None else ttl)
+    if entry is not None:
+        _count(service, "hits")
+        return _rebuild_response(entry)
+
+    _count(service, "misses")
+    _wait_for_slot(service)
+    response = _send(method, url, params=params, json=json, data=data, headers=headers, timeout=timeout)
+    if response.status_code in CACHEABLE_STATUS:
+        cache.set(key, {
+            "status_code": response.status_code,
+            "url": response.url,
+            "content_type": response.headers.get("Content-Type"),
+            "text": response.text,
+        })
+    return response
+
+def entrez(function: str, **params):
+    """
+    Call a Bio.Entrez E-utility (e.g. "efetch", "elink") through the response cache.
+
+    Biopython still builds the request and applies the NCBI rate limit on a miss;
+    cached answers skip both.
+
+    Returns:
+        A handle like Bio.Entrez's own: binary for XML, text for plain-text results.
+    """
+    call = getattr(Entrez, function)
+    cache = _HTTP_CACHE
+    if cache is None:
+        _wait_for_slot("entrez")
+        return call(**params)
+
+    key = json.dumps({"entrez": function, "params": params}, sort_keys=True, default=str)
+    entry = cache.get(key, ttl=SERVICE_TTLS["entrez"])
+    if entry is not None:
+        _count("entrez", "hits")
+        return _entrez_handle(entry["text"], entry["binary"])
+
+    _count("entrez", "misses")
+    _wait_for_slot("entrez")
+    handle = call(**params)
+    try:
+        data = handle.read()
+    finally:
+        handle.close()
+    binary = isinstance(data, bytes)
+    # surrogateescape keeps arbitrary bytes round-trippable through JSON
+    text = data.decode("utf-8", "surrogateescape") if binary else data
+    cache.set(key, {"text": text, "binary": binary})
+    return _entrez_handle(text, binary)
+
+# ----------------------------------------
+# Helpers
+# ----------------------------------------
+
+def _wait_for_slot(service: str):
+    throttle = _THROTTLE.get()
+    if throttle is not None:
+        throttle(service)
+
+def _send(method: str, url: str, **kwargs) -> requests.Response:
+    kwargs = {name: value for name, value in kwargs.items() if value is not None}
+    session = get_session()
+    if method == "GET":
+        return session.get(url, **kwargs)
+    return session.post(url, **kwargs)
+
+def _cache_key(method: str, url: str, **parts) -> str:
+    return json.dumps({"method": method, "url": url, **parts}, sort_keys=True, default=str)
+
+def _rebuild_response(entry: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = entry["status_code"]
+    response.url = entry["url"]
+    response._content = entry["text"].encode("utf-8")
+    response.encoding = "utf-8"
+    if entry.get("content_type"):
+        response.headers["Content-Type"] = entry["content_type"]
+    return response
+
+def _entrez_handle(text: str, binary: bool):
+    return io.BytesIO(text.encode("utf-8", "surrogateescape")) if binary else io.StringIO(text)
+
+def _count(service: str, counter: str):
+    with _STATS_LOCK:
+        counts = _SERVICE_STATS.setdefault(service, {"hits": 0, "misses": 0})
+        counts[counter] += 1
@@ -1,23 +1,201 @@
+import gzip
+import hashlib
+import json
 import logging
+import multiprocessing
 import os
-import fitz  # PyMuPDF
-from paper2kb.fetch_paper import fetch_paper_text
+import re
+import tarfile
+from importlib import metadata
+from paper2kb.disk_cache import DiskCache
+from paper2kb.fetch_paper import fetch_paper
+from paper2kb.jats import iter_articles, render_document
 
-def extract_text_from_pdf(uploaded_file):
+# JATS files inside PMC Open Access packages and local XML directories
+XML_SUFFIXES = (".xml", ".nxml", ".xml.gz", ".nxml.gz")
+TAR_SUFFIXES = (".tar.gz", ".tgz", ".tar")
+
+# PyMuPDF get_text() output format used for every page
+PDF_TEXT_MODE = "text"
+# Pages handed to a worker at a time in page-parallel PDF extraction
+PDF_PAGES_PER_TASK = 8
+# Shorter PDFs are extracted in-process; starting workers would cost more than it saves
+PDF_PARALLEL_MIN_PAGES = 32
+
+# PDF being extracted, set in the parent before forking and opened once per worker
+_PDF_SOURCE = None
+_PDF_DOC = None
+
+# ------------------------
+# PDF Text Cache
+# ------------------------
+
+# Bump when the way page texts are extracted or stored changes
+PDF_CACHE_VERSION = 1
+PDF_CACHE_DIR = "data/cache/pdf_text"
+PDF_CACHE_MAX_BYTES = 256 * 1024 ** 2
+
+# Disabled unless enable_pdf_cache() is called (the CLI and app enable it)
+_PDF_CACHE = None
+
+
+def enable_pdf_cache(directory: str = None, max_bytes: int = None) -> DiskCache:
+    """
+    Cache extracted PDF page texts on disk.
+
+    Entries are keyed by the SHA-256 of the PDF's bytes, the PyMuPDF version and
+    PDF_TEXT_MODE, so the same file uploaded again (or under another name) skips
+    extraction, while a new extractor never serves stale text.
+
+    Returns:
+        DiskCache: The active cache (its `stats` report hits and misses).
     """
-    Extracts text from a PDF file-like object using PyMuPDF.
+    global _PDF_CACHE
+    _PDF_CACHE = DiskCache(directory or PDF_CACHE_DIR, max_bytes or PDF_CACHE_MAX_BYTES)
+    return _PDF_CACHE
+
+
+def disable_pdf_cache():
+    """Stop reading and writing cached PDF page texts."""
+    global _PDF_CACHE
+    _PDF_CACHE = None
+
+
+def pdf_cache_key(source) -> str:
+    """Describe everything the page texts of a PDF (path or buffer) depend on, as a cache key."""
+    digest = hashlib.sha256()
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1024 ** 2), b""):
+                digest.update(block)
+    else:
+        digest.update(source)
+    try:
+        pymupdf_version = metadata.version("PyMuPDF")
+    except metadata.PackageNotFoundError:
+        pymupdf_version = None
+    return json.dumps({
+        "version": PDF_CACHE_VERSION,
+        "pdf": digest.hexdigest(),
+        "pymupdf": pymupdf_version,
+        "text_mode": PDF_TEXT_MODE,
+    }, sort_keys=True)
+
+
+# ------------------------
+# PDF Text Extraction
+# ------------------------
+
+def extract_text_from_pdf(uploaded_file, workers: int = None):
+    """
+    Extracts text from a PDF using PyMuPDF.
 
     Args:
-        uploaded_file: File-like object (e.g., from Streamlit or file upload).
+        uploaded_file: Path, bytes or file-like object (e.g., from Streamlit or file upload).
+        workers (int, optional): Worker processes for long PDFs (see iter_pdf_pages).
 
     Returns:
         str: Extracted text from all pages.
     """
-    with fitz.open(stream=uploaded_file.read(), filetype="pdf") as doc:
-        return "\n".join(page.get_text() for page in doc)
+    return "\n".join(iter_pdf_pages(uploaded_file, workers=workers))
+
+
+def iter_pdf_pages(source, workers: int = None):
+    """
+    Stream the text of each PDF page, in page order.
+
+    PDFs with at least PDF_PARALLEL_MIN_PAGES pages are split into page ranges
+    extracted by a pool of forked workers. Each worker opens the document once:
+    paths are opened from disk, and in-memory uploads are shared with the workers
+    copy-on-write rather than copied. Pages are yielded as soon as they and all
+    earlier pages are done, so callers can start on the text before the last page.
+    With enable_pdf_cache(), a PDF seen before is answered from the cache without
+    opening it.
+
+    Args:
+        source: Path to a PDF, its bytes, or a file-like object. File objects with a
+            getbuffer() (BytesIO, Streamlit uploads) are used without reading a copy.
+        workers (int, optional): Worker processes (default: all cores). 1 extracts in-process;
+            pass 1 from multithreaded programs (e.g. a web server), which must not fork.
+
+    Yields:
+        str: Text of each page.
+    """
+    source = _pdf_source(source)
+    cache, cache_key = _PDF_CACHE, None
+    if cache is not None:
+        cache_key = pdf_cache_key(source)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logging.info(f"♻️ Using cached PDF text ({len(cached['pages'])} pages)")
+            yield from cached["pages"]
+            return
+
+    pages = []
+    for text in _extract_pdf_pages(source, workers):
+        pages.append(text)
+        yield text
+    if cache is not None:
+        cache.set(cache_key, {"pages": pages})
+
+
+def _extract_pdf_pages(source, workers: int = None):
+    """Yield page texts of a path or buffer, in-process or with a forked pool (see iter_pdf_pages)."""
+    global _PDF_SOURCE
+    with _open_pdf(source) as doc:
+        page_count = doc.page_count
+        workers = min(workers or os.cpu_count() or 1, -(-page_count // PDF_PAGES_PER_TASK))
+        if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES or "fork" not in multiprocessing.get_all_start_methods():
+            for page in doc:
+                yield page.get_text(PDF_TEXT_MODE)
+            return
+
+    ranges = [(start, min(start + PDF_PAGES_PER_TASK, page_count))
+              for start in range(0, page_count, PDF_PAGES_PER_TASK)]
+    logging.info(f"📄 Extracting {page_count} PDF pages with {workers} worker(s)")
+    _PDF_SOURCE = source
+    try:
+        with multiprocessing.get_context("fork").Pool(workers, initializer=_open_worker_pdf) as pool:
+            for pages in pool.imap(_extract_page_range, ranges):
+                yield from pages
+    finally:
+        _PDF_SOURCE = None
+
+
+def _pdf_source(source):
+    """Return a path or buffer that both fitz and forked workers can open without copying."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return source
+    if hasattr(source, "getbuffer"):
+        return source.getbuffer()
+    name = getattr(source, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name
+    return source.read()
+
 
+def _open_pdf(source):
+    import fitz  # PyMuPDF, imported on first use to keep startup fast
 
-def load_text_source(pmid=None, localfile=None):
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _open_worker_pdf():
+    global _PDF_DOC
+    _PDF_DOC = _open_pdf(_PDF_SOURCE)
+
+
+def _extract_page_range(page_range):
+    """Worker task: text of pages [start, end) of the worker's open document."""
+    start, end = page_range
+    return [_PDF_DOC[number].get_text(PDF_TEXT_MODE) for number in range(start, end)]
+
+
+def load_text_source(pmid=None, localfile=None, return_sections=False, skip_sections=None, hedged=False):
     """
     Load the text content of a biomedical paper.
 
@@ -26,9 +204,15 @@ def load_text_source(pmid=None, localfile=None):
     Args:
         pmid (str, optional): PubMed ID of the paper.
         localfile (str, optional): Path to a local text or PDF file.
+        return_sections (bool): If True, also return the section spans of the text
+            (list of (start, end, section_type), or None when unknown).
+        skip_sections (Iterable[str], optional): Full-text section types to leave out
+            of fetched papers (default paper2kb.jats.DEFAULT_SKIP_SECTIONS).
+        hedged (bool): Query NCBI PMC and Europe PMC concurrently and keep the first
+            full text to arrive (lower worst-case latency for interactive use).
 
     Returns:
-        tuple: (paper_text, source_description)
+        tuple: (paper_text, source_description), plus section spans if return_sections=True
 
     Raises:
         ValueError: If neither `pmid` nor `localfile` is provided.
@@ -37,34 +221,138 @@ def load_text_source(pmid=None, localfile=None):
     if localfile:
         logging.info(f"Reading from local file: {localfile}")
         if localfile.endswith(".pdf"):
-            with open(localfile, "rb") as f:
-                text = extract_text_from_pdf(f)
+            text = extract_text_from_pdf(localfile)
         else:
             with open(localfile, "r", encoding="utf-8") as f:
                 text = f.read()
         if not text.strip():
             logging.warning("Local file appears to be empty. Are you sure it's plain text or a readable PDF?")
-        return text, "localfile"
+        return (text, "localfile", None) if return_sections else (text, "localfile")
 
     elif pmid:
         try:
-            text, source = fetch_paper_text(pmid, return_source=True)
-            return text, source
+            paper = fetch_paper(pmid, skip_sections=skip_sections, hedged=hedged)
         except Exception as e:
             logging.error(f"Failed to fetch paper text for PMID {pmid}: {e}")
             raise
+        if return_sections:
+            return paper["text"], paper["source"], paper["sections"]
+        return paper["text"], paper["source"]
 
     else:
         raise ValueError("Must provide either `pmid` or `localfile`.")
 
 
-def infer_output_path(pmid=None, localfile=None, format="json", outdir="data/outputs"):
+def iter_text_files(directory: str):
+    """
+    Stream the .txt files of a corpus directory (searched recursively, in sorted order).
+
+    Args:
+        directory (str): Corpus directory.
+
+    Yields:
+        tuple: (doc_id, text) with the file's path relative to `directory` as doc_id.
+    """
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(".txt"):
+                path = os.path.join(root, name)
+                with open(path, "r", encoding="utf-8") as f:
+                    yield os.path.relpath(path, directory), f.read()
+
+
+def iter_corpus(path: str, skip_sections=None):
+    """
+    Stream the documents of a local corpus, whatever its layout.
+
+    Args:
+        path (str): A directory (.txt files and JATS XML files, searched recursively),
+            a PMC Open Access package (.tar.gz / .tgz / .tar) or a single JATS XML file.
+        skip_sections (Iterable[str], optional): Full-text section types to leave out of
+            XML articles (default paper2kb.jats.DEFAULT_SKIP_SECTIONS).
+
+    Yields:
+        tuple: (doc_id, text, section_spans); section_spans is None for plain text files.
+    """
+    if os.path.isdir(path):
+        for doc_id, text in iter_text_files(path):
+            yield doc_id, text, None
+    yield from iter_xml_articles(path, skip_sections, with_sections=True)
+
+
+def iter_xml_articles(path: str, skip_sections=None, with_sections: bool = False):
+    """
+    Stream JATS articles from PMC Open Access bulk packages or local XML files, with no network.
+
+    Archives are read member by member without unpacking to disk, and each XML
+    file is parsed incrementally (paper2kb.jats.iter_articles), so memory does not
+    grow with the size of the package.
+
+    Args:
+        path (str): A .tar.gz / .tgz / .tar archive, a directory (XML files and archives
+            in it are read recursively, in sorted order) or a single .xml/.nxml(.gz) file.
+        skip_sections (Iterable[str], optional): Full-text section types to leave out.
+        with_sections (bool): If True, also yield the section spans of each text.
+
+    Yields:
+        tuple: (article_id, text) or (article_id, text, section_spans). article_id is the
+        PMCID (e.g. "PMC1234567"), else the PMID, else the file or archive member name.
+    """
+    for source_name, stream in _iter_xml_streams(path):
+        with stream:
+            for n, document in enumerate(iter_articles(stream)):
+                text, sections = render_document(document, skip_sections)
+                if not text:
+                    continue
+                fallback = source_name if n == 0 else f"{source_name}#{n + 1}"
+                article_id = _article_id(document, fallback)
+                yield (article_id, text, sections) if with_sections else (article_id, text)
+
+
+def _iter_xml_streams(path: str):
+    """Yield (name, binary file object) for every XML file under `path`."""
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                if name.endswith(TAR_SUFFIXES):
+                    yield from _iter_xml_streams(file_path)
+                elif name.endswith(XML_SUFFIXES):
+                    yield os.path.relpath(file_path, path), _open_xml(file_path)
+    elif path.endswith(TAR_SUFFIXES):
+        # Stream mode ("r|*") reads the archive sequentially, with no seeking or index
+        with tarfile.open(path, "r|*") as archive:
+            for member in archive:
+                if member.isfile() and member.name.endswith(XML_SUFFIXES):
+                    stream = archive.extractfile(member)
+                    yield member.name, gzip.GzipFile(fileobj=stream) if member.name.endswith(".gz") else stream
+    else:
+        yield os.path.basename(path), _open_xml(path)
+
+
+def _open_xml(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _article_id(document: dict, fallback: str) -> str:
+    """PMCID, PMID or `fallback`, from a parsed article's <article-id>s."""
+    ids = document["ids"]
+    pmcid = ids.get("pmcid") or ids.get("pmc")
+    if pmcid:
+        return pmcid if pmcid.upper().startswith("PMC") else f"PMC{pmcid}"
+    return ids.get("pmid") or fallback
+
+
+def infer_output_path(pmid=None, localfile=None, format="json", outdir="data/outputs", corpus=None):
     """
     Infer a reasonable output file path based on input source.
 
     Args:
         pmid (str, optional): PubMed ID.
         localfile (str, optional): Local file path.
+        corpus (str, optional): Corpus directory, archive or PMID list file.
         format (str): 'json' or 'csv'
         outdir (str): Output directory path.
 
@@ -75,10 +363,13 @@ def infer_output_path(pmid=None, localfile=None, format="json", outdir="data/out
 
     if pmid:
         basename = f"pmid{pmid}"
+    elif corpus:
+        name = re.sub(r"\.(tar\.gz|tgz|tar|xml|nxml|txt)$", "", os.path.basename(os.path.normpath(corpus)))
+        basename = f"{name}_corpus"
     elif localfile:
         stem = os.path.splitext(os.path.basename(localfile))[0]
         basename = f"{stem}_parsed"
     else:
-        raise ValueError("Cannot infer output path without PMID or localfile.")
+        raise ValueError("Cannot infer output path without PMID, localfile or corpus.")
 
     return os.path.join(outdir, f"{basename}.{format}")
\ No newline at end of file
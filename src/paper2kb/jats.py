@@ -0,0 +1,461 @@
+import io
+import os
+import re
+from collections import Counter
+
+from lxml import etree
+
+# ----------------------------------------
+# Section Classification
+# ----------------------------------------
+
+# Canonical section types with the words or phrases (regular expressions) that
+# identify them, tried in order against a section's JATS sec-type attribute and
+# then its normalized title (e.g. "2. Results and Discussion" → results). They
+# must match whole words; patterns anchored with ^...$ must match the whole title.
+SECTION_TYPES = [
+    ("introduction", (r"intro\w*", r"background")),
+    # Before methods, so "Supplementary materials" and "Availability of data and
+    # materials" are not taken for methods sections
+    ("supplementary", (r"supplement\w*", r"supporting information", r"additional files?")),
+    ("data_availability", (r"data availability", r"availability of data", r"data sharing", r"data access")),
+    ("methods", (r"methods?", r"methodology", r"materials", r"experimental procedures?", r"study design",
+                 r"study population")),
+    ("results", (r"results?", r"findings")),
+    ("discussion", (r"discussion",)),
+    ("conclusions", (r"conclusions?", r"summary", r"concluding remarks")),
+    ("cases", (r"case reports?", r"case presentations?", r"case descriptions?", r"cases")),
+    ("acknowledgements", (r"acknowledge?ments?",)),
+    ("funding", (r"funding", r"financial support", r"grants?")),
+    ("competing_interests", (r"conflicts? of interests?", r"conflicts?", r"competing interests?", r"disclosures?",
+                             r"declarations? of interests?", r"coi statement")),
+    ("author_contributions", (r"authors?'? contributions?", r"authorship contributions?", r"contributorship",
+                              r"^contributions$", r"^contributors$")),
+    ("ethics", (r"ethic\w*", r"consent")),
+    ("abbreviations", (r"abbreviations?", r"glossary")),
+    ("references", (r"^references?$", r"^reference list$", r"^bibliography$", r"^literature cited$")),
+]
+
+_SECTION_PATTERNS = [(section_type, re.compile(r"\b(?:" + "|".join(patterns) + r")\b"))
+                     for section_type, patterns in SECTION_TYPES]
+
+# Leading section numbers such as "2.", "2.1", "IV." or "B)"
+SECTION_NUMBER = re.compile(r"^\s*(?:\d+(?:\.\d+)*\.?|[ivxlc]+\.|[a-z][.)])\s+")
+
+# Sections left out of the extraction text unless requested. Override with a
+# comma-separated PAPER2KB_SKIP_SECTIONS (empty string keeps every section).
+DEFAULT_SKIP_SECTIONS = frozenset(
+    s.strip() for s in os.environ.get(
+        "PAPER2KB_SKIP_SECTIONS",
+        "methods,references,acknowledgements,funding,competing_interests,author_contributions,"
+        "data_availability,ethics,abbreviations,footnotes"
+    ).split(",") if s.strip()
+)
+
+def classify_section(title: str, sec_type: str = None) -> str:
+    """
+    Map a section title (and optional JATS sec-type) to a canonical section type.
+
+    A recognized sec-type (e.g. "materials|methods") takes precedence over the title.
+
+    Returns:
+        str: A type from SECTION_TYPES, or "body" if nothing matches.
+    """
+    for label in (sec_type, title):
+        label = _normalize_label(label)
+        if not label:
+            continue
+        for section_type, pattern in _SECTION_PATTERNS:
+            if pattern.search(label):
+                return section_type
+    return "body"
+
+def _normalize_label(label: str) -> str:
+    """Lowercase a title or sec-type, drop its section number and reduce punctuation to single spaces."""
+    label = SECTION_NUMBER.sub("", (label or "").lower().replace("\u2019", "'"))
+    return " ".join(re.sub(r"[^\w']+", " ", label).split())
+
+# ----------------------------------------
+# JATS Parsing
+# ----------------------------------------
+#
+# Articles are streamed with lxml iterparse rather than loaded into a DOM: each
+# paragraph, table, figure and back-matter entry is turned into text when its
+# end tag arrives, then cleared and dropped together with the siblings already
+# processed. Memory stays flat however long the article, or a file of many
+# articles, is.
+
+# Back-matter blocks kept as one section each, with their section type
+BACK_MATTER_TYPES = {"ack": "acknowledgements", "ref-list": "references", "fn-group": "footnotes",
+                     "glossary": "abbreviations", "app-group": "supplementary"}
+
+# Children of a block (abstract, back matter) whose own children become separate paragraphs
+NESTED_BLOCKS = ("sec", "list", "ref-list", "fn-group")
+
+def parse_jats(xml) -> dict:
+    """
+    Parse a JATS/NLM full-text article into a structured document.
+
+    Args:
+        xml (str | bytes | os.PathLike | file-like): Article XML (PMC efetch or Europe PMC
+            fullTextXML) as text, a path to a local file, or a binary file object, which
+            is read incrementally.
+
+    Returns:
+        dict: {
+            "title": article title,
+            "abstract": abstract text,
+            "sections": [{"title", "type", "text"}] for body and back-matter sections
+                        (nested sections are flattened and inherit their parent's type),
+            "tables": [{"label", "caption", "text", "section", "position"}] with cells joined by " | ",
+            "figures": [{"label", "caption", "section", "position"}],
+            "has_body": whether the article has a <body> (False for abstract-only records),
+            "ids": {pub-id-type: value} from the article's <article-id>s (e.g. "pmid", "pmc"),
+        }
+
+        Each table and figure records the type of the section it appears in
+        ("section", None outside any section) and its index among the sections,
+        tables and figures in document order ("position").
+    """
+    for document in _iter_documents(xml, split_articles=False):
+        return document
+    return _new_document()
+
+def iter_articles(xml):
+    """
+    Stream the articles of a multi-article file (a PMC <pmc-articleset>, a bulk
+    XML dump) one document at a time, without holding the whole file in memory.
+
+    Args:
+        xml (str | bytes | os.PathLike | file-like): As for parse_jats.
+
+    Yields:
+        dict: parse_jats documents for each <article>, in file order; use each
+        document's "ids" to match it back to the PMCID/PMID it was requested for.
+    """
+    return _iter_documents(xml, split_articles=True)
+
+def parse_article_set(xml) -> list[dict]:
+    """Parse every article of a multi-article file (see iter_articles) into a list."""
+    return list(iter_articles(xml))
+
+def render_document(document: dict, skip_sections=None) -> tuple[str, list]:
+    """
+    Join a structured document into extraction text, skipping filtered sections.
+
+    Args:
+        document (dict): Output of parse_jats.
+        skip_sections (Iterable[str], optional): Section types to leave out
+            (default DEFAULT_SKIP_SECTIONS). "title", "abstract", "figure" and
+            "table" can be skipped too. Tables and figures are left out with the
+            section they appear in, and otherwise rendered where they appear.
+
+    Returns:
+        tuple: (text, section_spans) where section_spans is a list of
+        (start, end, section_type) character ranges in `text`.
+    """
+    skip = DEFAULT_SKIP_SECTIONS if skip_sections is None else set(skip_sections)
+    flow = [(section["text"], section["type"], None) for section in document.get("sections", [])]
+    floats = [(figure, figure["caption"], "figure") for figure in document.get("figures", [])]
+    floats += [(table, "\n".join(filter(None, [table["caption"], table["text"]])), "table")
+               for table in document.get("tables", [])]
+    # Positions index the final flow, so inserting in ascending order restores document
+    # order; tables and figures without one (hand-built documents) go at the end
+    for item, text, kind in sorted(floats, key=lambda entry: entry[0].get("position", float("inf"))):
+        flow.insert(item.get("position", len(flow)), (text, kind, item.get("section")))
+    blocks = [(document.get("title", ""), "title", None), (document.get("abstract", ""), "abstract", None)] + flow
+
+    parts, spans, position = [], [], 0
+    for text, section_type, parent_type in blocks:
+        if not text or section_type in skip or parent_type in skip:
+            continue
+        if parts:
+            parts.append("\n\n")
+            position += 2
+        parts.append(text)
+        spans.append((position, position + len(text), section_type))
+        position += len(text)
+
+    return "".join(parts), spans
+
+# ----------------------------------------
+# Helpers
+# ----------------------------------------
+
+def _iter_documents(xml, split_articles: bool):
+    """Run iterparse over `xml`, yielding a document per <article> (or one for the whole input)."""
+    stream = _ArticleStream(split_articles)
+    events = etree.iterparse(_as_source(xml), events=("start", "end"), recover=True, huge_tree=True,
+                             remove_comments=True, remove_pis=True, resolve_entities=False)
+    try:
+        for event, element in events:
+            document = stream.start(element) if event == "start" else stream.end(element)
+            if document is not None:
+                yield document
+    except etree.XMLSyntaxError:
+        # Truncated or empty input: keep whatever was parsed, like a lenient DOM parser would
+        if stream.document is not None:
+            yield stream.finish()
+
+def _as_source(xml):
+    """Turn parse_jats input into something iterparse reads (a path or a binary file object)."""
+    if isinstance(xml, str):
+        # The text is already decoded, so an encoding declaration would be wrong now
+        return io.BytesIO(re.sub(r"^\s*<\?xml[^>]*\?>", "", xml).encode("utf-8"))
+    if isinstance(xml, (bytes, bytearray)):
+        return io.BytesIO(xml)
+    if isinstance(xml, os.PathLike):
+        return os.fspath(xml)
+    if isinstance(xml, io.TextIOBase):
+        return _as_source(xml.read())
+    return xml
+
+def _new_document() -> dict:
+    return {"title": "", "abstract": "", "sections": [], "tables": [], "figures": [], "has_body": False, "ids": {}}
+
+class _ArticleStream:
+    """
+    iterparse event handler that builds parse_jats documents.
+
+    Open <body>, <sec>, <back> and block elements (abstract, back matter) are kept
+    on a stack of frames. Text between a frame's children is collected when the
+    next child starts; each direct child is converted to text when it ends and is
+    removed from the tree once the following child starts.
+    """
+
+    def __init__(self, split_articles: bool):
+        self.split_articles = split_articles
+        self.document = None
+        self.root = None
+        self.frames = []
+        self.open_tags = Counter()
+        self.abstract_seen = False
+
+    def start(self, element):
+        name = _local_name(element)
+        self.open_tags[name] += 1
+        if self.document is None:
+            if self.split_articles and name != "article":
+                return None
+            self.document = _new_document()
+            self.root = element
+            self.abstract_seen = False
+        if self._ignored():
+            return None
+
+        parent = element.getparent()
+        frame = self.frames[-1] if self.frames else None
+        if frame is not None and parent is frame["element"]:
+            self._take_text_before(frame, element)
+            self._open_child(frame, element, name)
+        elif name == "body" and not self.frames and not self.document["has_body"] \
+                and (element is self.root or parent is self.root):
+            self.document["has_body"] = True
+            self.frames.append(_frame(element, "section", is_body=True))
+        elif name == "back" and not self.frames and parent is self.root:
+            self.frames.append(_frame(element, "back"))
+        elif name == "abstract" and not self.frames and self.open_tags["article-meta"] and not self.abstract_seen:
+            self.abstract_seen = True
+            self.frames.append(_frame(element, "block", target="abstract"))
+        return None
+
+    def end(self, element):
+        name = _local_name(element)
+        try:
+            if self.document is None:
+                return None
+            if self._ignored():
+                if name in ("sub-article", "response") and self.open_tags[name] == 1:
+                    element.clear(keep_tail=True)
+                return None
+
+            frame = self.frames[-1] if self.frames else None
+            if frame is not None and element is frame["element"]:
+                self._close_frame(frame)
+            elif name in ("table-wrap", "fig") and self.open_tags["table-wrap"] + self.open_tags["fig"] == 1:
+                self._take_float(element, name)
+                # Cleared in place so the enclosing paragraph's text no longer includes it
+                element.clear(keep_tail=True)
+            elif frame is not None and element.getparent() is frame["element"]:
+                self._take_child(frame, element, name)
+                element.clear(keep_tail=True)
+            elif self.open_tags["article-meta"]:
+                if name == "article-title" and not self.document["title"]:
+                    self.document["title"] = _clean(_text(element))
+                elif name == "article-id" and element.get("pub-id-type"):
+                    self.document["ids"][element.get("pub-id-type")] = _clean(_text(element))
+            elif name == "front":
+                element.clear(keep_tail=True)
+
+            if element is self.root:
+                document = self.finish()
+                parent = element.getparent()
+                element.clear(keep_tail=True)
+                if parent is not None:
+                    while element.getprevious() is not None:
+                        del parent[0]
+                return document
+            return None
+        finally:
+            self.open_tags[name] -= 1
+
+    def finish(self) -> dict:
+        """Return the current document and reset for the next article."""
+        document = self.document
+        document["sections"] = [section for section in document["sections"] if section["text"]]
+        self.document, self.root, self.frames = None, None, []
+        return document
+
+    def _ignored(self) -> bool:
+        """Sub-articles and responses (e.g. peer review reports) are not part of the article text."""
+        return bool(self.open_tags["sub-article"] or self.open_tags["response"])
+
+    def _open_child(self, frame: dict, element, name: str):
+        """Push a frame for a direct child that is itself a section or block."""
+        kind = frame["kind"]
+        if name == "sec" and kind in ("section", "back"):
+            parent_type = None
+            if kind == "section":
+                self._flush(frame)
+                parent_type = _section_type(frame)
+            self.frames.append(_frame(element, "section", sec_type=element.get("sec-type"), parent_type=parent_type))
+        elif name in BACK_MATTER_TYPES and kind == "back":
+            self.frames.append(_frame(element, "block", target=BACK_MATTER_TYPES[name]))
+        elif name in NESTED_BLOCKS and kind == "block":
+            self.frames.append(_frame(element, "block", target=frame))
+
+    def _take_text_before(self, frame: dict, element):
+        """Collect the text node preceding `element`, then drop the siblings already processed."""
+        container = frame["element"]
+        previous = element.getprevious()
+        text = previous.tail if previous is not None else container.text
+        if frame["kind"] != "back" and text and text.strip():
+            frame["parts"].append(_clean(text))
+        while element.getprevious() is not None:
+            del container[0]
+
+    def _take_float(self, element, name: str):
+        """Add a finished table or figure, with the section it appears in and its place in the document."""
+        frame = self.frames[-1] if self.frames else None
+        if frame is not None and frame["kind"] == "section":
+            # Emit the paragraphs before it, so it can be rendered after them
+            self._flush(frame)
+        document = self.document
+        item = _parse_table(element) if name == "table-wrap" else _parse_figure(element)
+        item["section"] = self._enclosing_section_type()
+        item["position"] = (sum(1 for section in document["sections"] if section["text"])
+                            + len(document["tables"]) + len(document["figures"]))
+        document["tables" if name == "table-wrap" else "figures"].append(item)
+
+    def _enclosing_section_type(self):
+        """Type of the innermost open section or block; "body" directly in <body>, None outside both."""
+        for frame in reversed(self.frames):
+            if frame["kind"] == "section":
+                return _section_type(frame) or "body"
+            if frame["kind"] == "block" and isinstance(frame["target"], str):
+                return frame["target"]
+        return None
+
+    def _take_child(self, frame: dict, element, name: str):
+        """Convert a finished direct child of a frame into text."""
+        if frame["kind"] == "back":
+            return
+        if name == "title":
+            frame["title"] = frame["title"] or _clean(_text(element))
+        elif name != "label":
+            separator = " " if frame["kind"] == "block" and name in ("ref", "fn") else ""
+            frame["parts"].append(_clean(_text(element, separator)))
+
+    def _close_frame(self, frame: dict):
+        container = frame["element"]
+        last = container[-1] if len(container) else None
+        text = last.tail if last is not None else container.text
+        if frame["kind"] != "back" and text and text.strip():
+            frame["parts"].append(_clean(text))
+        self.frames.pop()
+
+        if frame["kind"] == "section":
+            self._flush(frame)
+        elif frame["kind"] == "block":
+            text = "\n\n".join(part for part in frame["parts"] if part)
+            target = frame["target"]
+            if target == "abstract":
+                self.document["abstract"] = text
+            elif isinstance(target, dict):
+                target["parts"].append(text)
+            else:
+                self.document["sections"].append({"title": frame["title"], "type": target, "text": text})
+        container.clear(keep_tail=True)
+
+    def _flush(self, frame: dict):
+        """Emit the paragraphs collected so far in a section frame as one section."""
+        text = "\n\n".join(part for part in frame["parts"] if part)
+        if text:
+            self.document["sections"].append({"title": frame["title"], "type": _section_type(frame) or "body",
+                                              "text": text})
+        frame["parts"] = []
+
+def _frame(element, kind: str, is_body: bool = False, sec_type: str = None, parent_type: str = None,
+           target=None) -> dict:
+    return {"element": element, "kind": kind, "is_body": is_body, "sec_type": sec_type,
+            "parent_type": parent_type, "target": target, "title": "", "parts": []}
+
+def _section_type(frame: dict):
+    """Classify a <sec> frame (falling back to its parent's type); None for <body> itself."""
+    if frame["is_body"]:
+        return None
+    section_type = classify_section(frame["title"], frame["sec_type"])
+    if section_type == "body" and frame["parent_type"]:
+        return frame["parent_type"]
+    return section_type
+
+def _parse_table(element) -> dict:
+    caption = _first(element, "caption")
+    rows = []
+    for row in element.iter("{*}tr"):
+        cells = [_clean(_text(cell, " ")) for cell in row.iter("{*}th", "{*}td")]
+        if any(cells):
+            rows.append(" | ".join(cells))
+    footer = _first(element, "table-wrap-foot")
+    if footer is not None:
+        rows.append(_clean(_text(footer, " ")))
+    label = _first(element, "label")
+    return {
+        "label": _clean(_text(label)) if label is not None else "",
+        "caption": _block_text(caption) if caption is not None else "",
+        "text": "\n".join(rows),
+    }
+
+def _parse_figure(element) -> dict:
+    caption = _first(element, "caption")
+    label = _first(element, "label")
+    return {
+        "label": _clean(_text(label)) if label is not None else "",
+        "caption": _block_text(caption) if caption is not None else "",
+    }
+
+def _block_text(element) -> str:
+    """Text of a small block element, one paragraph per child element, headings dropped."""
+    parts = [_clean(element.text or "")]
+    for child in element:
+        name = _local_name(child)
+        if name in NESTED_BLOCKS:
+            parts.append(_block_text(child))
+        elif name not in ("title", "label"):
+            parts.append(_clean(_text(child, " " if name in ("ref", "fn") else "")))
+        parts.append(_clean(child.tail or ""))
+    return "\n\n".join(part for part in parts if part)
+
+def _first(element, name: str):
+    """First descendant named `name` (in any namespace), or None."""
+    return next(element.iter("{*}" + name), None)
+
+def _local_name(element) -> str:
+    return element.tag.rpartition("}")[2] if isinstance(element.tag, str) else ""
+
+def _text(element, separator: str = "") -> str:
+    return separator.join(element.itertext())
+
+def _clean(text: str) -> str:
+    """Collapse whitespace runs (XML indentation, line breaks) into single spaces."""
+    return re.sub(r"\s+", " ", text).strip()
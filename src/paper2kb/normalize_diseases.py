@@ -1,4 +1,4 @@
-import requests
+from paper2kb import http_client
 
 def normalize_diseases(gene_entries):
     """
@@ -37,7 +37,7 @@ def query_ols_for_disease(name):
         dict or None: A dictionary with keys 'label' and 'mondo_id', or None if not found.
     """
     try:
-        res = requests.get(
+        res = http_client.get(
             "https://www.ebi.ac.uk/ols/api/search",
             params={
                 "q": name,
@@ -45,8 +45,7 @@ def query_ols_for_disease(name):
                 "exact": "false",
                 "type": "class"
             },
-            headers={"Accept": "application/json"},
-            timeout=10
+            headers={"Accept": "application/json"}
         )
         results = res.json().get("response", {}).get("docs", [])
         if not results:
@@ -1,21 +1,201 @@
-import requests
+import gzip
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
 
-def get_opentargets_diseases(gene_symbol: str):
+from paper2kb import http_client
+
+# ----------------------------------------
+# Offline Association Store
+# ----------------------------------------
+
+# SQLite store built from an Open Targets associations dump by
+# scripts/build_opentargets_store.py. When it exists, lookups never hit the network.
+OT_STORE_PATH = os.getenv("PAPER2KB_OT_STORE", "data/reference/opentargets_associations.db")
+
+_OT_STORE = None
+_OT_STORE_KEY = None
+_OT_STORE_LOCK = threading.Lock()
+
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS associations (
+    ensembl_id TEXT NOT NULL,
+    symbol TEXT,
+    disease_id TEXT NOT NULL,
+    disease_name TEXT NOT NULL,
+    score REAL,
+    PRIMARY KEY (ensembl_id, disease_id)
+);
+CREATE INDEX IF NOT EXISTS idx_associations_symbol ON associations (symbol);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+def get_association_store():
+    """
+    Return a read-only connection to the offline association store, or None.
+
+    The connection is opened lazily and reopened when OT_STORE_PATH changes, the
+    store is rebuilt, or after a fork, so worker processes never share a SQLite handle.
+    """
+    global _OT_STORE, _OT_STORE_KEY
+    version = association_store_version()
+    if version is None:
+        return None
+    key = (OT_STORE_PATH, version, os.getpid())
+    if _OT_STORE is not None and _OT_STORE_KEY == key:
+        return _OT_STORE
+    with _OT_STORE_LOCK:
+        if _OT_STORE is None or _OT_STORE_KEY != key:
+            uri = Path(OT_STORE_PATH).resolve().as_uri() + "?mode=ro"
+            _OT_STORE = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            _OT_STORE_KEY = key
+    return _OT_STORE
+
+def association_store_version():
+    """Identifier that changes whenever the store file is rebuilt, or None if there is no store."""
+    try:
+        stat = os.stat(OT_STORE_PATH)
+    except OSError:
+        return None
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+def lookup_stored_associations(gene_symbol: str = None, ensembl_id: str = None, min_score: float = 0.0):
+    """
+    Look up disease associations for a gene in the offline store.
+
+    Args:
+        gene_symbol (str): Official HGNC gene symbol.
+        ensembl_id (str): Ensembl gene ID (used when the symbol is unknown to the store).
+        min_score (float): Minimum Open Targets association score.
+
+    Returns:
+        list[tuple[str, float]] | None: (lowercase disease name, score) pairs sorted by
+        descending score, or None if no store is available.
+    """
+    conn = get_association_store()
+    if conn is None:
+        return None
+
+    symbol = gene_symbol.upper() if gene_symbol else None
+    with _OT_STORE_LOCK:
+        rows = conn.execute(
+            "SELECT disease_name, score FROM associations "
+            "WHERE (symbol = ? OR ensembl_id = ?) AND score >= ? "
+            "ORDER BY score DESC",
+            (symbol, ensembl_id, min_score)
+        ).fetchall()
+    return rows
+
+def build_association_store(associations_path: str, db_path: str, diseases_path: str = None,
+                            targets_path: str = None, min_score: float = 0.0, batch_size: int = 10000) -> int:
+    """
+    Build the offline association store from an Open Targets JSON dump.
+
+    Each input may be a JSON-lines file (optionally gzipped) or a directory of
+    part files, as published in the Open Targets platform downloads:
+        - associations (e.g. association_overall_direct): targetId, diseaseId, score
+        - diseases: id, name
+        - targets: id, approvedSymbol
+
+    Association rows that already carry `diseaseName` / `targetSymbol` do not
+    need the diseases/targets files.
+
+    Returns:
+        int: Number of associations written.
+    """
+    disease_names = {row["id"]: row["name"] for row in _iter_json_records(diseases_path) if row.get("name")} if diseases_path else {}
+    target_symbols = {row["id"]: row["approvedSymbol"] for row in _iter_json_records(targets_path) if row.get("approvedSymbol")} if targets_path else {}
+
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    tmp_path = f"{db_path}.tmp{os.getpid()}"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript(STORE_SCHEMA)
+
+    written, missing_symbols, batch = 0, 0, []
+    for row in _iter_json_records(associations_path):
+        score = row.get("score", 0.0)
+        name = row.get("diseaseName") or disease_names.get(row.get("diseaseId"))
+        if not name or not row.get("targetId") or score < min_score:
+            continue
+        symbol = row.get("targetSymbol") or target_symbols.get(row["targetId"])
+        missing_symbols += symbol is None
+        batch.append((row["targetId"], symbol.upper() if symbol else None, row["diseaseId"], name.lower(), score))
+        if len(batch) >= batch_size:
+            conn.executemany("INSERT OR REPLACE INTO associations VALUES (?, ?, ?, ?, ?)", batch)
+            written += len(batch)
+            batch = []
+    conn.executemany("INSERT OR REPLACE INTO associations VALUES (?, ?, ?, ?, ?)", batch)
+    written += len(batch)
+
+    conn.executemany("INSERT OR REPLACE INTO store_meta VALUES (?, ?)", [
+        ("source", os.path.abspath(associations_path)),
+        ("min_score", str(min_score)),
+        ("associations", str(written)),
+        ("missing_symbols", str(missing_symbols)),
+        ("built_at", datetime.now().isoformat(timespec="seconds")),
+    ])
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, db_path)
+    return written
+
+def _iter_json_records(path: str):
+    """Yield JSON objects from a JSON-lines file (.json/.jsonl, optionally .gz) or a directory of them."""
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, name) for name in os.listdir(path)
+                       if name.endswith((".json", ".jsonl", ".json.gz", ".jsonl.gz")))
+    else:
+        files = [path]
+
+    for file in files:
+        opener = gzip.open if file.endswith(".gz") else open
+        with opener(file, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+# ----------------------------------------
+# Open Targets Lookup
+# ----------------------------------------
+
+OT_GRAPHQL_URL = "https://api.platform.opentargets.org/api/v4/graphql"
+
+def get_opentargets_diseases(gene_symbol: str, ensembl_id: str = None):
     """
     Get known disease associations for a gene symbol using Open Targets GraphQL API.
 
+    If the offline association store (OT_STORE_PATH) is present it is used
+    instead, and no network request is made.
+
     Args:
         gene_symbol (str): Official HGNC gene symbol.
+        ensembl_id (str): Ensembl gene ID, if already known (skips the HGNC lookup).
 
     Returns:
         list[str]: A list of lowercase disease names associated with the gene.
     """
+    stored = lookup_stored_associations(gene_symbol, ensembl_id)
+    if stored is not None:
+        return [name for name, _ in stored]
+
+    if ensembl_id:
+        return _query_opentargets(ensembl_id)
+
     # Step 1: Resolve HGNC symbol to Ensembl Gene ID via HGNC REST API
     lookup_url = f"https://rest.genenames.org/fetch/symbol/{gene_symbol}"
     headers = {"Accept": "application/json"}
 
     try:
-        res = requests.get(lookup_url, headers=headers, timeout=10)
+        res = http_client.get(lookup_url, headers=headers)
         if res.status_code != 200:
             print(f"[ERROR] Failed to resolve symbol {gene_symbol}")
             return []
@@ -35,7 +215,10 @@ def get_opentargets_diseases(gene_symbol: str):
         print(f"[ERROR] Failed to resolve HGNC symbol '{gene_symbol}': {e}")
         return []
 
-    # Step 2: Query Open Targets GraphQL API using Ensembl Gene ID
+    return _query_opentargets(ensembl_id)
+
+def _query_opentargets(ensembl_id: str):
+    """Query the Open Targets GraphQL API for diseases associated with an Ensembl gene ID."""
     query = """
     query getAssociations($ensemblId: String!) {
       target(ensemblId: $ensemblId) {
@@ -50,24 +233,159 @@ def get_opentargets_diseases(gene_symbol: str):
     }
     """
 
-    gql_url = "https://api.platform.opentargets.org/api/v4/graphql"
+    data = _post_graphql(query, {"ensemblId": ensembl_id}, ensembl_id)
+    if data is None:
+        return []
+    target = data.get("target") or {}
+    rows = target.get("associatedDiseases", {}).get("rows", [])
+    return [row["disease"]["name"].lower() for row in rows if row.get("disease")]
+
+# ----------------------------------------
+# Batched Open Targets Lookup
+# ----------------------------------------
+
+# Targets per aliased GraphQL document, and diseases returned per target
+OT_BATCH_SIZE = 25
+OT_PAGE_SIZE = 25
+
+MAP_IDS_QUERY = """
+query mapTargets($terms: [String!]!) {
+  mapIds(queryTerms: $terms, entityNames: ["target"]) {
+    mappings {
+      term
+      hits {
+        id
+        object {
+          ... on Target {
+            approvedSymbol
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+def get_opentargets_diseases_batch(gene_symbols, ensembl_ids: dict = None, batch_size: int = None,
+                                   page_size: int = None, failed: list = None) -> dict:
+    """
+    Get known disease associations for many genes with a handful of requests.
+
+    Genes found in the offline store are answered locally. Symbols without a
+    known Ensembl ID are resolved together in one Open Targets `mapIds` query,
+    then targets are queried `batch_size` at a time, each request being a
+    single GraphQL document with one aliased `target` field per gene.
+
+    Args:
+        gene_symbols (Iterable[str]): Official HGNC gene symbols.
+        ensembl_ids (dict): Optional symbol → Ensembl gene ID map (e.g. from the HGNC index).
+        batch_size (int): Targets per GraphQL request (default OT_BATCH_SIZE).
+        page_size (int): Diseases returned per target (default OT_PAGE_SIZE).
+        failed (list, optional): Symbols whose lookup failed (request or API error,
+            as opposed to genuinely having no diseases) are appended to it.
+
+    Returns:
+        dict[str, list[str]]: Lowercase disease names per symbol ([] if unresolved).
+    """
+    failed = [] if failed is None else failed
+    batch_size = batch_size or OT_BATCH_SIZE
+    page_size = page_size or OT_PAGE_SIZE
+    ensembl_ids = ensembl_ids or {}
+    symbols = list(dict.fromkeys(gene_symbols))
+    results = {symbol: [] for symbol in symbols}
+
+    pending = []
+    for symbol in symbols:
+        stored = lookup_stored_associations(symbol, ensembl_ids.get(symbol))
+        if stored is None:
+            pending.append(symbol)
+        else:
+            results[symbol] = [name for name, _ in stored]
+    if not pending:
+        return results
+
+    resolved = {symbol: ensembl_ids[symbol] for symbol in pending if ensembl_ids.get(symbol)}
+    unresolved = [symbol for symbol in pending if symbol not in resolved]
+    if unresolved:
+        mapped = _map_symbols_to_ensembl(unresolved)
+        if mapped is None:
+            failed.extend(unresolved)
+        resolved.update(mapped or {})
+
+    targets = list(resolved.items())
+    for start in range(0, len(targets), batch_size):
+        batch = targets[start:start + batch_size]
+        diseases = _query_opentargets_batch([ensembl_id for _, ensembl_id in batch], page_size)
+        if diseases is None:
+            failed.extend(symbol for symbol, _ in batch)
+            continue
+        for symbol, ensembl_id in batch:
+            results[symbol] = diseases.get(ensembl_id, [])
+    return results
+
+def _map_symbols_to_ensembl(gene_symbols: list) -> dict:
+    """Resolve gene symbols to Ensembl gene IDs with a single Open Targets mapIds query (None on failure)."""
+    data = _post_graphql(MAP_IDS_QUERY, {"terms": gene_symbols}, f"{len(gene_symbols)} symbols")
+    if data is None:
+        return None
+
+    resolved = {}
+    for mapping in (data.get("mapIds") or {}).get("mappings", []):
+        hits = mapping.get("hits") or []
+        term = mapping.get("term", "").upper()
+        # Prefer the target whose approved symbol is the term itself
+        exact = [hit for hit in hits if ((hit.get("object") or {}).get("approvedSymbol") or "").upper() == term]
+        best = (exact or hits or [None])[0]
+        if best and term in gene_symbols:
+            resolved[term] = best["id"]
+
+    for symbol in gene_symbols:
+        if symbol not in resolved:
+            print(f"[WARN] No Open Targets target found for symbol {symbol}")
+    return resolved
+
+def _build_batch_query(n_targets: int) -> str:
+    """Build a GraphQL document with one aliased `target` field (t0, t1, ...) per gene."""
+    params = ", ".join(f"$id{i}: String!" for i in range(n_targets))
+    fields = "\n".join(
+        f"  t{i}: target(ensemblId: $id{i}) {{ id associatedDiseases(page: {{index: 0, size: $size}}) "
+        f"{{ rows {{ disease {{ name }} }} }} }}"
+        for i in range(n_targets)
+    )
+    return f"query batchAssociations($size: Int!, {params}) {{\n{fields}\n}}"
+
+def _query_opentargets_batch(ensembl_ids: list, page_size: int) -> dict:
+    """Query associated diseases for several Ensembl gene IDs in one request (None on failure)."""
+    variables = {"size": page_size}
+    variables.update({f"id{i}": ensembl_id for i, ensembl_id in enumerate(ensembl_ids)})
+
+    data = _post_graphql(_build_batch_query(len(ensembl_ids)), variables, f"{len(ensembl_ids)} targets")
+    if data is None:
+        return None
+
+    diseases = {}
+    for i, ensembl_id in enumerate(ensembl_ids):
+        target = data.get(f"t{i}") or {}
+        rows = (target.get("associatedDiseases") or {}).get("rows", [])
+        diseases[ensembl_id] = [row["disease"]["name"].lower() for row in rows if row.get("disease")]
+    return diseases
+
+def _post_graphql(query: str, variables: dict, description: str):
+    """POST a GraphQL query to Open Targets and return its `data` object, or None on failure."""
     try:
-        response = requests.post(
-            gql_url,
-            json={"query": query, "variables": {"ensemblId": ensembl_id}},
-            headers={"Content-Type": "application/json"},
-            timeout=10
+        response = http_client.post(
+            OT_GRAPHQL_URL,
+            json={"query": query, "variables": variables},
+            headers={"Content-Type": "application/json"}
         )
 
         if response.status_code != 200:
             print(f"[WARN] GraphQL query failed (status {response.status_code})")
             print(response.text[:300])
-            return []
+            return None
 
-        data = response.json()
-        rows = data.get("data", {}).get("target", {}).get("associatedDiseases", {}).get("rows", [])
-        return [row["disease"]["name"].lower() for row in rows if row.get("disease")]
+        return response.json().get("data") or {}
 
     except Exception as e:
-        print(f"[ERROR] Failed to query Open Targets for {ensembl_id}: {e}")
-        return []
\ No newline at end of file
+        print(f"[ERROR] Failed to query Open Targets for {description}: {e}")
+        return None
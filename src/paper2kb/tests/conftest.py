@@ -31,4 +31,33 @@ def sample_mention():
         "normalized_diseases": [
             {"label": "Tubulopathy", "mondo_id": "MONDO:0012345"}
         ]
-    }
\ No newline at end of file
+    }
+
+@pytest.fixture
+def jats_article():
+    """
+    Minimal JATS full-text article with body sections, a table, a figure and back matter.
+    """
+    return """<?xml version="1.0"?>
+<article>
+  <front><article-meta>
+    <title-group><article-title>MTOR variants in tubulopathy</article-title></title-group>
+    <abstract><p>We describe <italic>MTOR</italic> variants in two families.</p></abstract>
+  </article-meta></front>
+  <body>
+    <sec sec-type="intro"><title>Introduction</title><p>Tubulopathy is a rare kidney disorder.</p></sec>
+    <sec sec-type="methods"><title>Methods</title><p>DNA was extracted with a commercial kit.</p></sec>
+    <sec><title>Results</title>
+      <p>The MTOR gene is associated with tubulopathy (<xref ref-type="table" rid="t1">Table 1</xref>).</p>
+      <sec><title>Segregation analysis</title><p>Variants segregated with disease.</p></sec>
+      <table-wrap id="t1"><label>Table 1</label><caption><p>Variants found</p></caption>
+        <table><tr><th>Gene</th><th>Variant</th></tr><tr><td>COL4A3</td><td>c.1A&gt;G</td></tr></table>
+      </table-wrap>
+      <fig id="f1"><label>Figure 1</label><caption><p>Pedigree of family 1.</p></caption></fig>
+    </sec>
+  </body>
+  <back>
+    <ack><p>We thank the APOL1 consortium.</p></ack>
+    <ref-list><ref><mixed-citation>Smith J. TP53 in cancer. 2020.</mixed-citation></ref></ref-list>
+  </back>
+</article>"""
@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+from paper2kb.async_fetch import RateLimiter, fetch_papers
+
+def slow_abstract(pmid):
+    time.sleep(0.2)
+    return {"text": f"Abstract of {pmid}", "source": "Entrez abstract", "sections": None}
+
+# Test that PMIDs are fetched concurrently and results arrive as they complete
+@patch("paper2kb.async_fetch.fetch_entrez_abstract", side_effect=slow_abstract)
+@patch("paper2kb.async_fetch.fetch_europepmc_fulltext", return_value=None)
+@patch("paper2kb.async_fetch.fetch_pmc_article")
+@patch("paper2kb.async_fetch.find_pmcids")
+def test_fetch_papers_concurrently(mock_find, mock_article, mock_epmc, mock_abstract):
+    mock_find.side_effect = lambda pmid: ["PMC1"] if pmid == "1" else []
+    mock_article.return_value = {"text": "Full text", "source": "NCBI PMC full text", "sections": [(0, 9, "results")]}
+
+    with patch("paper2kb.async_fetch.NCBI_RATE", 1000), patch("paper2kb.async_fetch.EUROPEPMC_RATE", 1000):
+        t0 = time.perf_counter()
+        results = list(fetch_papers([str(i) for i in range(1, 9)], with_sections=True))
+        elapsed = time.perf_counter() - t0
+
+    assert results[0] == ("1", "Full text", "NCBI PMC full text", [(0, 9, "results")])  # no slow abstract call
+    assert sorted(pmid for pmid, *_ in results) == [str(i) for i in range(1, 9)]
+    assert ("5", "Abstract of 5", "Entrez abstract", None) in results
+    assert elapsed < 7 * 0.2  # seven slow abstracts overlap
+
+# Test that a consumer stopping early cancels the remaining fetches and the fetch thread
+@patch("paper2kb.async_fetch.fetch_entrez_abstract", side_effect=slow_abstract)
+@patch("paper2kb.async_fetch.fetch_europepmc_fulltext", return_value=None)
+@patch("paper2kb.async_fetch.find_pmcids", return_value=[])
+def test_fetch_papers_stops_with_consumer(mock_find, mock_epmc, mock_abstract):
+    with patch("paper2kb.async_fetch.NCBI_RATE", 1000), patch("paper2kb.async_fetch.EUROPEPMC_RATE", 1000):
+        for _ in fetch_papers([str(i) for i in range(100)], max_concurrency=2):
+            break
+
+    assert mock_abstract.call_count < 10
+    assert not any(thread.name == "paper2kb-fetch" for thread in threading.enumerate())
+
+# Test that the limiter spaces requests to the configured rate
+def test_rate_limiter_spacing():
+    async def burst():
+        limiter = RateLimiter(rate=20)
+        times = []
+        for _ in range(5):
+            await limiter.acquire()
+            times.append(time.monotonic())
+        return times
+
+    times = asyncio.run(burst())
+    assert times[-1] - times[0] >= 4 / 20 - 0.01
@@ -0,0 +1,56 @@
+import os
+from unittest.mock import MagicMock, patch
+from paper2kb import extract_genes
+from paper2kb.corpus import extract_corpus
+
+def fake_extract(text, use_hybrid=True, return_skipped=False, section_spans=None):
+    """Stand-in for extraction that records which process handled the document."""
+    return [{"symbol": text.split()[0], "pid": os.getpid()}], []
+
+def fake_extract_with_models(text, use_hybrid=True, return_skipped=False, section_spans=None):
+    """Like fake_extract, but fetches both NER models as extraction does and records the model loads seen."""
+    extract_genes.get_gene_nlp()
+    extract_genes.get_disease_nlp()
+    results, skipped = fake_extract(text)
+    results[0]["model_loads"] = extract_genes._load_model.call_count
+    return results, skipped
+
+# Test that every document is processed once by forked workers, with throughput reported
+@patch("paper2kb.corpus.get_disease_nlp")
+@patch("paper2kb.corpus.get_gene_nlp")
+@patch("paper2kb.corpus.load_hgnc_reference")
+@patch("paper2kb.corpus.extract_gene_disease_mentions", side_effect=fake_extract)
+def test_extract_corpus_with_workers(mock_extract, mock_load, mock_gene_nlp, mock_disease_nlp):
+    documents = [(f"doc-{i}", f"GENE{i} is mentioned here.") for i in range(20)]
+    stats = {}
+    outputs = list(extract_corpus(documents, workers=2, ordered=True, stats=stats))
+
+    assert [doc_id for doc_id, _, _ in outputs] == [doc_id for doc_id, _ in documents]
+    assert outputs[3][1][0]["symbol"] == "GENE3"
+    assert all(results[0]["pid"] != os.getpid() for _, results, _ in outputs)
+    assert stats["docs"] == 20 and stats["workers"] == 2 and stats["docs_per_sec"] > 0
+
+# Test that both NER models are loaded in the parent and never again in a worker
+@patch("paper2kb.extract_genes._load_model", side_effect=lambda name: MagicMock())
+@patch("paper2kb.corpus.load_hgnc_reference")
+@patch("paper2kb.corpus.extract_gene_disease_mentions", side_effect=fake_extract_with_models)
+def test_workers_do_not_load_models(mock_extract, mock_load, mock_load_model, monkeypatch):
+    monkeypatch.setattr("paper2kb.extract_genes._GENE_NLP", None)
+    monkeypatch.setattr("paper2kb.extract_genes._DISEASE_NLP", None)
+    monkeypatch.setattr("paper2kb.extract_genes._DISEASE_COMPONENTS", [])
+    outputs = list(extract_corpus([f"GENE{i} text" for i in range(6)], workers=2))
+
+    assert mock_load_model.call_count == 2  # gene and disease model, in the parent
+    assert all(results[0]["pid"] != os.getpid() for _, results, _ in outputs)
+    assert all(results[0]["model_loads"] == 2 for _, results, _ in outputs)
+
+# Test that a single worker runs in-process
+@patch("paper2kb.corpus.get_disease_nlp")
+@patch("paper2kb.corpus.get_gene_nlp")
+@patch("paper2kb.corpus.load_hgnc_reference")
+@patch("paper2kb.corpus.extract_gene_disease_mentions", side_effect=fake_extract)
+def test_extract_corpus_single_worker(mock_extract, mock_load, mock_gene_nlp, mock_disease_nlp):
+    outputs = list(extract_corpus(["MTOR text", "TP53 text"], workers=1))
+
+    assert [(doc_id, results[0]["symbol"]) for doc_id, results, _ in outputs] == [(0, "MTOR"), (1, "TP53")]
+    assert all(results[0]["pid"] == os.getpid() for _, results, _ in outputs)
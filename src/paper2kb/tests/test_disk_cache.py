@@ -0,0 +1,44 @@
+import os
+from paper2kb.disk_cache import DiskCache
+
+def test_round_trip_and_counters(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    assert cache.get("paper-1") is None
+
+    cache.set("paper-1", {"results": [{"symbol": "MTOR"}], "skipped": []})
+    assert cache.get("paper-1") == {"results": [{"symbol": "MTOR"}], "skipped": []}
+    assert cache.stats == {"hits": 1, "misses": 1, "writes": 1, "evictions": 0}
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl=0)
+    cache.set("key", [1, 2, 3])
+    assert cache.get("key", default="expired") == "expired"
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    payload = os.urandom(1500).hex()
+
+    cache.set("old", payload)
+    cache.max_bytes = int(os.path.getsize(cache._path("old")) * 3.5)  # room for three entries
+    cache.set("recent", payload)
+    os.utime(cache._path("old"), (0, 0))
+    cache.get("recent")
+    cache.set("new-1", payload)
+    cache.set("new-2", payload)
+
+    assert cache.get("old") is None
+    assert cache.get("recent") == payload
+    assert cache.evictions == 1
+
+def test_overwriting_an_entry_keeps_the_size_exact(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    payload = os.urandom(1500).hex()
+
+    cache.set("key", payload)
+    for _ in range(5):
+        cache.set("key", payload)
+
+    assert cache._size == os.path.getsize(cache._path("key"))
+    cache.max_bytes = int(cache._size * 1.5)
+    cache.set("key", payload)
+    assert cache.evictions == 0 and cache.get("key") == payload
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import patch
-from paper2kb.extract_genes import extract_gene_disease_mentions, load_hgnc_reference
+from paper2kb.extract_genes import extract_gene_disease_mentions, load_hgnc_reference, iter_hgnc_matches, get_gene_nlp, extract_many, set_pipeline_profile, split_text_into_chunks, enable_extraction_cache, disable_extraction_cache
 
 # Automatically load HGNC reference before all tests in this module
 @pytest.fixture(scope="module", autouse=True)
@@ -13,7 +13,8 @@ def test_text():
     return "The MTOR gene is associated with tubulopathy and the SET gene is not relevant. COL4A3 is also mentioned in a table."
 
 # Test fallback extraction with mock Open Targets results
-@patch("paper2kb.extract_genes.get_opentargets_diseases", return_value=["tubulopathy", "dilated cardiomyopathy"])
+@patch("paper2kb.extract_genes.get_opentargets_diseases_batch",
+       side_effect=lambda symbols, **kwargs: {s: ["tubulopathy", "dilated cardiomyopathy"] for s in symbols})
 def test_extraction_with_fallback(mock_ot, test_text):
     mentions, skipped = extract_gene_disease_mentions(test_text, use_hybrid=True, return_skipped=True)
 
@@ -23,7 +24,7 @@ def test_extraction_with_fallback(mock_ot, test_text):
     assert all("diseases" in m for m in mentions)
 
 # Test that common-word gene symbols like "SET" are excluded by fallback
-@patch("paper2kb.extract_genes.get_opentargets_diseases", return_value=[])
+@patch("paper2kb.extract_genes.get_opentargets_diseases_batch", return_value={})
 def test_fallback_excludes_common_words(mock_ot):
     text = "Set was found to be critical in the process."
     mentions, skipped = extract_gene_disease_mentions(text, use_hybrid=True, return_skipped=True)
@@ -44,4 +45,127 @@ def test_return_without_skipped():
     mentions = extract_gene_disease_mentions(text, use_hybrid=False, return_skipped=False)
 
     assert isinstance(mentions, list)
-    assert all("symbol" in m for m in mentions)
\ No newline at end of file
+    assert all("symbol" in m for m in mentions)
+
+# Test that the single-pass matcher resolves aliases and multi-token symbols
+def test_matcher_finds_aliases_and_multi_token_symbols():
+    text = "Loss of p53 was seen together with reduced HLA-A expression."
+    matches = {(symbol, mention) for symbol, mention, _ in iter_hgnc_matches(text)}
+
+    assert ("TP53", "P53") in matches
+    assert ("HLA-A", "HLA-A") in matches
+
+# Test that matches respect word boundaries on both sides
+def test_matcher_respects_word_boundaries():
+    text = "XMTOR and MTORX are not gene names."
+    symbols = [symbol for symbol, _, _ in iter_hgnc_matches(text)]
+
+    assert "MTOR" not in symbols
+
+# Test that common-word symbols only match their uppercase form
+def test_matcher_common_words_require_uppercase():
+    text = "A set of genes including SET was profiled."
+    hits = [(symbol, start) for symbol, _, start in iter_hgnc_matches(text) if symbol == "SET"]
+
+    assert hits == [("SET", text.index("SET"))]
+
+# Test that lowercase words which are also HGNC aliases (FOR → WWOX) do not match
+def test_matcher_aliases_require_uppercase():
+    text = "For COL4A3 see table; for details see FOR."
+    hits = [(symbol, start) for symbol, _, start in iter_hgnc_matches(text) if symbol == "WWOX"]
+
+    assert hits == [("WWOX", text.index("FOR"))]
+
+# Test that disease entities are annotated on the same Doc as gene entities
+def test_disease_spans_share_gene_tokens(example_text):
+    doc = get_gene_nlp()(example_text)
+    diseases = [span.text.lower() for span in doc.spans["disease"]]
+
+    assert "tubulopathy" in diseases
+    assert all(span.doc is doc for span in doc.spans["disease"])
+
+# Test that batch extraction streams one result tuple per document, in order
+def test_extract_many_streams_results():
+    texts = [("doc-a", "The MTOR gene is critical in disease."), ("doc-b", "XYZGENE has no HGNC match.")]
+    outputs = list(extract_many(texts, use_hybrid=False, batch_size=2))
+
+    assert [doc_id for doc_id, _, _ in outputs] == ["doc-a", "doc-b"]
+    assert "XYZGENE" in outputs[1][2]
+    assert outputs[1][1] == []
+
+# Test that plain strings are identified by their position
+def test_extract_many_accepts_plain_strings():
+    outputs = list(extract_many(["XYZGENE has no HGNC match."], use_hybrid=False))
+
+    assert outputs[0][0] == 0
+
+# Test that unknown pipeline profiles are rejected
+def test_unknown_pipeline_profile_raises():
+    with pytest.raises(ValueError, match="Unknown pipeline profile"):
+        set_pipeline_profile("turbo")
+
+# Test that chunking is lossless, bounded and cuts at sentence ends
+def test_split_text_into_chunks():
+    text = "The MTOR gene is associated with tubulopathy. " * 50
+    chunks = split_text_into_chunks(text, max_chars=300)
+
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    assert all(chunk.endswith(". ") for chunk in chunks[:-1])
+
+# Test that mentions are merged and deduplicated across chunks of a long text
+@patch("paper2kb.extract_genes.get_opentargets_diseases_batch", return_value={})
+def test_long_text_is_processed_in_chunks(mock_ot, monkeypatch):
+    monkeypatch.setattr("paper2kb.extract_genes.MAX_CHUNK_CHARS", 500)
+    text = "The MTOR gene is critical in disease. " * 40 + "COL4A3 is also mentioned in a table."
+    mentions = extract_gene_disease_mentions(text, use_hybrid=True)
+    symbols = [m["symbol"] for m in mentions]
+
+    assert symbols.count("MTOR") == 1
+    assert "COL4A3" in symbols
+
+# Test that a repeated extraction is served from the on-disk cache without running NER
+@patch("paper2kb.extract_genes.get_opentargets_diseases_batch", return_value={})
+def test_repeated_extraction_uses_cache(mock_ot, tmp_path, example_text):
+    cache = enable_extraction_cache(str(tmp_path))
+    try:
+        first = extract_gene_disease_mentions(example_text, use_hybrid=True)
+        with patch("paper2kb.extract_genes.get_gene_nlp", side_effect=AssertionError("models used")):
+            second = extract_gene_disease_mentions(example_text, use_hybrid=True)
+    finally:
+        disable_extraction_cache()
+
+    assert second == first
+    assert cache.stats["hits"] == 1
+
+# Test that results are not cached when the fallback disease lookup failed
+@patch("paper2kb.extract_genes.get_opentargets_diseases_batch",
+       side_effect=lambda symbols, failed=None, **kwargs: failed.extend(symbols) or {})
+def test_failed_disease_lookup_is_not_cached(mock_ot, tmp_path):
+    cache = enable_extraction_cache(str(tmp_path))
+    try:
+        extract_gene_disease_mentions("COL4A3 is also mentioned in a table.", use_hybrid=True)
+    finally:
+        disable_extraction_cache()
+
+    mock_ot.assert_called_once()
+    assert cache.stats["writes"] == 0
+
+# Test that section spans from full-text parsing become source_section provenance
+@patch("paper2kb.extract_genes.get_opentargets_diseases_batch", return_value={})
+def test_source_section_from_section_spans(mock_ot):
+    intro = "Background on kidney disease."
+    results = "The MTOR gene is critical in disease."
+    table = "Variants found\nCOL4A3 | c.1A>G"
+    text = "\n\n".join([intro, results, table])
+    spans = [
+        (0, len(intro), "introduction"),
+        (len(intro) + 2, len(intro) + 2 + len(results), "results"),
+        (len(text) - len(table), len(text), "table"),
+    ]
+
+    mentions = extract_gene_disease_mentions(text, use_hybrid=True, section_spans=spans)
+    sections = {m["symbol"]: m["source_section"] for m in mentions}
+
+    assert sections["MTOR"] == "results"
+    assert sections["COL4A3"] == "table"
@@ -1,6 +1,8 @@
+import threading
 import pytest
 from unittest.mock import patch, MagicMock
-from paper2kb.fetch_paper import fetch_local_text, fetch_paper_text
+from paper2kb.fetch_paper import (fetch_abstracts_bulk, fetch_entrez_abstract, fetch_local_text, fetch_paper,
+                                  fetch_paper_text, fetch_papers_bulk)
 
 # ---------------- Local File Loading ----------------
 
@@ -29,22 +31,32 @@ def test_fetch_paper_live():
 
 # ---------------- Entrez Abstract Fallback ----------------
 
+@patch("paper2kb.fetch_paper.Entrez.read")
 @patch("paper2kb.fetch_paper.Entrez.efetch")
-def test_fetch_entrez_abstract(mock_efetch):
+def test_fetch_entrez_abstract(mock_efetch, mock_read):
     """
-    Mock abstract retrieval via Entrez fallback path.
+    The single-PMID abstract fallback reads PubMed XML, giving the same text and
+    section spans as the bulk path.
     """
-    mock_handle = MagicMock()
-    mock_handle.read.return_value = "This is an abstract fallback."
-    mock_efetch.return_value = mock_handle
+    abstract = MagicMock()
+    abstract.attributes = {}
+    abstract.__str__.return_value = "This is an abstract fallback."
+    mock_read.return_value = {"PubmedArticle": [{"MedlineCitation": {
+        "PMID": "99999999", "Article": {"ArticleTitle": "A title", "Abstract": {"AbstractText": [abstract]}}
+    }}]}
+
+    single = fetch_entrez_abstract("99999999")
+    bulk = fetch_abstracts_bulk(["99999999"])["99999999"]
 
-    result = fetch_paper_text("99999999", prefer_fulltext=False)
-    assert "abstract fallback" in result
+    assert single == bulk
+    assert single["text"] == "A title\n\nThis is an abstract fallback."
+    assert [kind for _, _, kind in single["sections"]] == ["title", "abstract"]
+    assert mock_efetch.call_args.kwargs["retmode"] == "xml"
 
 
 # ---------------- Europe PMC Full Text ----------------
 
-@patch("paper2kb.fetch_paper.requests.get")
+@patch("paper2kb.http_client.requests.Session.get")
 def test_fetch_europepmc(mock_get):
     """
     Mock Europe PMC full-text XML retrieval via REST API.
@@ -63,22 +75,105 @@ def test_fetch_europepmc(mock_get):
 @patch("paper2kb.fetch_paper.Entrez.elink")
 @patch("paper2kb.fetch_paper.Entrez.read")
 @patch("paper2kb.fetch_paper.Entrez.efetch")
-def test_fetch_pmc_fulltext(mock_efetch, mock_read, mock_elink):
+def test_fetch_pmc_fulltext(mock_efetch, mock_read, mock_elink, jats_article):
     """
-    Mock full-text fetch via NCBI PMC using PMCID from Entrez.elink + efetch.
+    Mock full-text fetch via NCBI PMC using PMCID from Entrez.elink + efetch,
+    parsing real JATS XML into section-aware text.
     """
     # Simulate PMC ID lookup
     mock_read.return_value = [{"LinkSetDb": [{"Link": [{"Id": "PMC123456"}]}]}]
 
     # Simulate efetch returning full-text XML
     mock_efetch.return_value = MagicMock()
-    mock_efetch.return_value.read.return_value = "<body>This is full PMC text</body>"
+    mock_efetch.return_value.read.return_value = jats_article
+
+    paper = fetch_paper("99999999")
+    assert paper["source"] == "NCBI PMC full text"
+    assert "The MTOR gene is associated with tubulopathy" in paper["text"]
+    assert "commercial kit" not in paper["text"]      # methods skipped by default
+    assert "TP53 in cancer" not in paper["text"]      # references skipped by default
+
+    start = paper["text"].index("The MTOR gene")
+    assert any(s <= start < e and kind == "results" for s, e, kind in paper["sections"])
+
+    text = fetch_paper_text("99999999", return_source=False)
+    assert text == paper["text"]
+
+
+# ---------------- Bulk Entrez Retrieval ----------------
+
+@patch("paper2kb.fetch_paper.Entrez.elink")
+@patch("paper2kb.fetch_paper.Entrez.read")
+@patch("paper2kb.fetch_paper.Entrez.efetch")
+def test_fetch_papers_bulk(mock_efetch, mock_read, mock_elink, jats_article):
+    """
+    Three PMIDs cost one elink, one PMC efetch and one abstract efetch; the
+    combined article set is split back into per-PMID papers.
+    """
+    pmc_article = jats_article.replace('<?xml version="1.0"?>', "").replace(
+        "<article-meta>", '<article-meta><article-id pub-id-type="pmc">555</article-id>')
+    abstract = MagicMock()
+    abstract.attributes = {"Label": "RESULTS"}
+    abstract.__str__.return_value = "APOL1 risk variants cause kidney disease."
+
+    mock_read.side_effect = [
+        # elink: one LinkSet per PMID
+        [{"IdList": ["1"], "LinkSetDb": [{"Link": [{"Id": "555"}]}]},
+         {"IdList": ["2"], "LinkSetDb": []}],
+        # efetch pubmed XML for the PMID without PMC full text
+        {"PubmedArticle": [{"MedlineCitation": {
+            "PMID": "2", "Article": {"ArticleTitle": "APOL1 nephropathy", "Abstract": {"AbstractText": [abstract]}}
+        }}]},
+    ]
+    pmc_handle = MagicMock()
+    pmc_handle.read.return_value = f"<pmc-articleset>{pmc_article}</pmc-articleset>"
+    mock_efetch.side_effect = [pmc_handle, MagicMock()]
+
+    papers = dict(fetch_papers_bulk(["1", "2", "1"]))
+
+    assert list(papers) == ["1", "2"]
+    assert papers["1"]["source"] == "NCBI PMC full text"
+    assert "The MTOR gene is associated with tubulopathy" in papers["1"]["text"]
+    assert papers["2"]["text"] == "APOL1 nephropathy\n\nRESULTS: APOL1 risk variants cause kidney disease."
+    assert [kind for _, _, kind in papers["2"]["sections"]] == ["title", "abstract"]
+
+    mock_elink.assert_called_once()
+    assert mock_elink.call_args.kwargs["id"] == ["1", "2"]
+    assert mock_efetch.call_count == 2
+    assert mock_efetch.call_args_list[0].kwargs["id"] == "555"
+    assert mock_efetch.call_args_list[1].kwargs["id"] == "2"
+
+
+# ---------------- Hedged Full-Text Racing ----------------
+
+@patch("paper2kb.fetch_paper.fetch_entrez_abstract")
+@patch("paper2kb.fetch_paper.fetch_europepmc_fulltext")
+@patch("paper2kb.fetch_paper.fetch_pmc_fulltext")
+def test_hedged_fetch_returns_first_full_text(mock_pmc, mock_epmc, mock_abstract):
+    """
+    A slow PMC response does not delay a usable Europe PMC body, and the
+    abstract is only fetched when neither source has full text.
+    """
+    pmc_released = threading.Event()
+
+    def blocked_pmc(pmid, skip_sections=None):
+        pmc_released.wait(timeout=30)
+        return {"text": "PMC text", "source": "NCBI PMC full text", "sections": []}
+
+    mock_pmc.side_effect = blocked_pmc
+    mock_epmc.return_value = {"text": "EPMC text", "source": "Europe PMC full text", "sections": []}
+
+    try:
+        paper = fetch_paper("12345678", hedged=True)
+        assert not pmc_released.is_set()    # returned while PMC was still blocked
+    finally:
+        pmc_released.set()
+    assert paper["source"] == "Europe PMC full text"
+    mock_abstract.assert_not_called()
 
-    # Patch BeautifulSoup to return a fake parsed body
-    with patch("paper2kb.fetch_paper.BeautifulSoup") as MockSoup:
-        mock_soup = MagicMock()
-        mock_soup.find.return_value.get_text.return_value = "This is full PMC text"
-        MockSoup.return_value = mock_soup
+    mock_pmc.side_effect = None
+    mock_pmc.return_value = None
+    mock_epmc.return_value = None
+    mock_abstract.return_value = {"text": "Abstract", "source": "Entrez abstract", "sections": None}
+    assert fetch_paper("12345678", hedged=True)["source"] == "Entrez abstract"
 
-        text = fetch_paper_text("99999999", return_source=False)
-        assert "full PMC text" in text
\ No newline at end of file
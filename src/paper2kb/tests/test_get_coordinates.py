@@ -1,6 +1,8 @@
+import gzip
 import pytest
 from unittest.mock import patch
-from paper2kb.get_coordinates import add_coordinates
+from paper2kb import get_coordinates
+from paper2kb.get_coordinates import add_coordinates, build_gene_index, gene_index_version, lookup_stored_coordinates
 
 # ---------------- Fixtures ----------------
 
@@ -11,7 +13,7 @@ def mentions():
 
 # ---------------- Tests ----------------
 
-@patch("paper2kb.get_coordinates.requests.get")
+@patch("paper2kb.http_client.requests.Session.get")
 def test_add_coordinates_success(mock_get, mentions):
     """
     Test successful coordinate enrichment from Ensembl with working liftover.
@@ -32,7 +34,7 @@ def test_add_coordinates_success(mock_get, mentions):
     assert gene["hg19_chr"] is not None  # Confirm liftover added hg19 coordinates
 
 
-@patch("paper2kb.get_coordinates.requests.get")
+@patch("paper2kb.http_client.requests.Session.get")
 def test_add_coordinates_api_fail(mock_get, mentions):
     """
     If Ensembl API fails, coordinate fields should be None.
@@ -46,12 +48,13 @@ def test_add_coordinates_api_fail(mock_get, mentions):
     assert gene["hg19_chr"] is None
 
 
-@patch("paper2kb.get_coordinates.requests.get")
-@patch("paper2kb.get_coordinates.lo.convert_coordinate", return_value=None)
+@patch("paper2kb.http_client.requests.Session.get")
+@patch("paper2kb.get_coordinates.get_liftover")
 def test_liftover_fail(mock_liftover, mock_get, mentions):
     """
     Liftover failure should result in hg19 fields being None, hg38 still populated.
     """
+    mock_liftover.return_value.convert_coordinate.return_value = None
     mock_get.return_value.status_code = 200
     mock_get.return_value.json.return_value = {
         "seq_region_name": "1",
@@ -66,7 +69,7 @@ def test_liftover_fail(mock_liftover, mock_get, mentions):
     assert gene["hg19_chr"] is None
 
 
-@patch("paper2kb.get_coordinates.requests.get")
+@patch("paper2kb.http_client.requests.Session.get")
 def test_hg38_only(mock_get, mentions):
     """
     If build is 'hg38', no hg19 coordinates should be added.
@@ -85,7 +88,7 @@ def test_hg38_only(mock_get, mentions):
     assert "hg19_chr" not in gene
 
 
-@patch("paper2kb.get_coordinates.requests.get")
+@patch("paper2kb.http_client.requests.Session.get")
 def test_empty_input(mock_get):
     """
     Empty input list should return immediately and make no API calls.
@@ -93,4 +96,83 @@ def test_empty_input(mock_get):
     result = add_coordinates([], build="both")
 
     assert result == []
-    mock_get.assert_not_called()
\ No newline at end of file
+    mock_get.assert_not_called()
+
+
+@patch("paper2kb.http_client.requests.Session.get", side_effect=AssertionError("per-gene lookup used"))
+@patch("paper2kb.http_client.requests.Session.post")
+def test_batched_lookup(mock_post, mock_get):
+    """
+    Many genes should be looked up in one POST without transcript expansion, each symbol once.
+    """
+    mock_post.return_value.status_code = 200
+    mock_post.return_value.json.return_value = {
+        "MTOR": {"seq_region_name": "1", "start": 11106535, "end": 11262556},
+        "TP53": {"seq_region_name": "17", "start": 7661779, "end": 7687538},
+    }
+    genes = [{"symbol": "MTOR"}, {"symbol": "TP53"}, {"symbol": "NOTAGENE"}, {"symbol": "MTOR"}]
+
+    enriched = add_coordinates(genes, build="hg38")
+
+    mock_post.assert_called_once()
+    assert mock_post.call_args.kwargs["json"] == {"symbols": ["MTOR", "NOTAGENE", "TP53"]}
+    assert [gene["hg38_chr"] for gene in enriched] == ["1", "17", None, "1"]
+    assert enriched[1]["hg38_end"] == 7687538
+
+
+HG38_GTF = (
+    "#!genome-build GRCh38.p14\n"
+    '1\tensembl_havana\tgene\t11106535\t11262556\t.\t-\t.\tgene_id "ENSG00000198793"; gene_version "13"; gene_name "MTOR";\n'
+    '1\tensembl_havana\ttranscript\t11106535\t11262556\t.\t-\t.\tgene_id "ENSG00000198793"; transcript_id "ENST00000361445";\n'
+    'KI270728.1\tensembl\tgene\t100\t200\t.\t+\t.\tgene_id "ENSG00000999999"; gene_name "MTOR";\n'
+)
+HG19_GFF3 = (
+    "##gff-version 3\n"
+    "chr1\tHAVANA\tgene\t11166592\t11322564\t.\t-\t.\tID=ENSG00000198793.8;gene_id=ENSG00000198793.8;gene_name=MTOR\n"
+    "chrM\tENSEMBL\tgene\t3307\t4262\t.\t+\t.\tID=ENSG00000198888.2;gene_id=ENSG00000198888.2;gene_name=MT-ND1\n"
+)
+
+@pytest.fixture
+def gene_index(tmp_path, monkeypatch):
+    """Offline coordinate index built from a small Ensembl GTF (hg38) and GENCODE GFF3 (hg19)."""
+    hg38 = tmp_path / "Homo_sapiens.GRCh38.112.gtf"
+    hg38.write_text(HG38_GTF, encoding="utf-8")
+    hg19 = tmp_path / "gencode.v19.annotation.gff3.gz"
+    hg19.write_bytes(gzip.compress(HG19_GFF3.encode("utf-8")))
+
+    db_path = str(tmp_path / "gene_coordinates.db")
+    assert build_gene_index(db_path, hg38_path=str(hg38), hg19_path=str(hg19)) == {"hg38": 2, "hg19": 2}
+    monkeypatch.setattr(get_coordinates, "GENE_INDEX_PATH", db_path)
+    return db_path
+
+
+@patch("paper2kb.get_coordinates.get_liftover", side_effect=AssertionError("liftover used"))
+@patch("paper2kb.http_client.requests.Session.post", side_effect=AssertionError("network used"))
+@patch("paper2kb.http_client.requests.Session.get", side_effect=AssertionError("network used"))
+def test_offline_gene_index(mock_get, mock_post, mock_liftover, gene_index):
+    """
+    With an index for both builds, coordinates should come from it without liftover or REST calls.
+    """
+    genes = [{"symbol": "MTOR"}, {"symbol": "MT-ND1", "ensembl_gene_id": "ENSG00000198888"}, {"symbol": "NOTAGENE"}]
+
+    enriched = add_coordinates(genes, build="both")
+
+    assert enriched[0]["hg38_chr"] == "1" and enriched[0]["hg38_end"] == 11262556    # primary chromosome wins
+    assert (enriched[0]["hg19_start"], enriched[0]["hg19_end"]) == (11166592, 11322564)
+    assert enriched[1]["hg38_chr"] is None and enriched[1]["hg19_chr"] == "MT"
+    assert enriched[2]["hg19_start"] is None
+    assert gene_index_version().startswith("hg38:Homo_sapiens.GRCh38.112.gtf hg19:gencode.v19.annotation.gff3.gz")
+
+def test_rebuilt_gene_index_is_reopened(gene_index, tmp_path):
+    """
+    A long-running process should serve the new index after build_gene_index replaces the file.
+    """
+    assert lookup_stored_coordinates(["MTOR"], build="hg19")["MTOR"]["hg19_start"] == 11166592
+
+    hg38 = tmp_path / "Homo_sapiens.GRCh38.113.gtf"
+    hg38.write_text(HG38_GTF.replace("11106535", "11106000"), encoding="utf-8")
+    build_gene_index(gene_index, hg38_path=str(hg38))
+
+    assert gene_index_version().startswith("hg38:Homo_sapiens.GRCh38.113.gtf (")
+    assert lookup_stored_coordinates(["MTOR"], build="hg38")["MTOR"]["hg38_start"] == 11106000
+    assert lookup_stored_coordinates(["MTOR"], build="hg19") is None
@@ -1,12 +1,33 @@
+import json
 import pytest
+import requests
 from unittest.mock import patch
+from paper2kb import extract_genes
 from paper2kb.get_hgnc_metadata import enrich_with_hgnc
+from paper2kb.hgnc_index import HGNCIndex, compile_hgnc_reference
+
+HGNC_TSV = (
+    "hgnc_id\tsymbol\tname\tlocus_group\talias_symbol\tprev_symbol\tensembl_gene_id\n"
+    "HGNC:3942\tMTOR\tmechanistic target of rapamycin kinase\tprotein-coding gene\t\"RAFT1|RAPT1\"\tFRAP1\tENSG00000198793\n"
+    "HGNC:11998\tTP53\ttumor protein p53\tprotein-coding gene\tP53\t\t\n"
+)
+
+@pytest.fixture(autouse=True)
+def no_loaded_reference(monkeypatch):
+    # REST tests must not be answered by a reference another test module loaded
+    monkeypatch.setattr(extract_genes, "HGNC_INDEX", None)
 
 @pytest.fixture
 def mentions():
     return [{"symbol": "MTOR"}, {"symbol": "FAKEGENE"}]
 
-@patch("paper2kb.get_hgnc_metadata.requests.get")
+@pytest.fixture
+def hgnc_reference(tmp_path):
+    path = tmp_path / "hgnc_complete_set.txt"
+    path.write_text(HGNC_TSV, encoding="utf-8")
+    return HGNCIndex(compile_hgnc_reference(str(path)))
+
+@patch("paper2kb.http_client.requests.Session.get")
 def test_enrich_success(mock_get, mentions):
     # Mock a successful response for MTOR
     mock_get.return_value.status_code = 200
@@ -27,7 +48,7 @@ def test_enrich_success(mock_get, mentions):
     assert enriched[0]["name"].lower().startswith("mechanistic")
     assert "RAFT1" in enriched[0]["alias_symbol"]
 
-@patch("paper2kb.get_hgnc_metadata.requests.get")
+@patch("paper2kb.http_client.requests.Session.get")
 def test_enrich_no_results(mock_get, mentions):
     # Simulate HGNC returning no matching docs
     mock_get.return_value.status_code = 200
@@ -39,7 +60,7 @@ def test_enrich_no_results(mock_get, mentions):
     assert enriched[0]["hgnc_id"] is None
     assert enriched[0]["alias_symbol"] == []
 
-@patch("paper2kb.get_hgnc_metadata.requests.get")
+@patch("paper2kb.http_client.requests.Session.get")
 def test_enrich_api_error(mock_get, mentions):
     # Simulate failed API call
     mock_get.return_value.status_code = 500
@@ -48,9 +69,118 @@ def test_enrich_api_error(mock_get, mentions):
     assert enriched[0]["hgnc_id"] is None
     assert enriched[0]["alias_symbol"] == []
 
-@patch("paper2kb.get_hgnc_metadata.requests.get", side_effect=Exception("Timeout"))
+@patch("paper2kb.http_client.requests.Session.get", side_effect=Exception("Timeout"))
 def test_enrich_request_exception(mock_get, mentions):
     # Simulate a network error
     enriched = enrich_with_hgnc([mentions[0]])
     assert enriched[0]["hgnc_id"] is None
-    assert enriched[0]["alias_symbol"] == []
\ No newline at end of file
+    assert enriched[0]["alias_symbol"] == []
+
+# Test that symbols in the local reference are enriched without any request
+@patch("paper2kb.http_client.requests.Session.get")
+def test_enrich_from_local_reference(mock_get, hgnc_reference):
+    mock_get.return_value.status_code = 404
+
+    enriched = enrich_with_hgnc([{"symbol": "MTOR"}, {"symbol": "TP53"}, {"symbol": "FAKEGENE"}], reference=hgnc_reference)
+
+    assert enriched[0]["hgnc_id"] == "HGNC:3942"
+    assert enriched[0]["alias_symbol"] == ["RAFT1", "RAPT1"]
+    assert enriched[0]["ensembl_gene_id"] == "ENSG00000198793"
+    assert enriched[1]["name"] == "tumor protein p53" and enriched[1]["ensembl_gene_id"] is None
+    assert enriched[2]["hgnc_id"] is None
+    mock_get.assert_called_once()    # only the symbol missing locally went to the REST API
+
+# Test that the REST fallback can be switched off, and that a loaded reference is used by default
+@patch("paper2kb.http_client.requests.Session.get", side_effect=AssertionError("network used"))
+def test_enrich_without_rest_fallback(mock_get, monkeypatch, hgnc_reference):
+    monkeypatch.setattr(extract_genes, "HGNC_INDEX", hgnc_reference)
+
+    enriched = enrich_with_hgnc([{"symbol": "MTOR"}, {"symbol": "FAKEGENE"}], rest_fallback=False)
+
+    assert enriched[0]["hgnc_id"] == "HGNC:3942"
+    assert enriched[1] == {"symbol": "FAKEGENE", "hgnc_id": None, "name": None, "alias_symbol": [], "ensembl_gene_id": None}
+
+# HGNC REST responses in the service's documented format: a search for
+# symbol:FAKEGENE+OR+symbol:MTOR+OR+symbol:TP53, and the fetch of one of its hits
+HGNC_SEARCH_RESPONSE = """{"responseHeader":{"status":0,"QTime":2},"response":{"numFound":2,"start":0,"maxScore":8.1726,
+"docs":[{"hgnc_id":"HGNC:3942","symbol":"MTOR","score":8.1726},{"hgnc_id":"HGNC:11998","symbol":"TP53","score":8.1726}]}}"""
+HGNC_FETCH_MTOR_RESPONSE = """{"responseHeader":{"status":0,"QTime":1},"response":{"numFound":1,"start":0,"docs":[{
+"hgnc_id":"HGNC:3942","symbol":"MTOR","name":"mechanistic target of rapamycin kinase","status":"Approved",
+"locus_group":"protein-coding gene","locus_type":"gene with protein product","location":"1p36.22",
+"alias_symbol":["RAFT1","RAPT1","FRAP","FRAP2"],"prev_symbol":["FRAP1"],"entrez_id":"2475",
+"ensembl_gene_id":"ENSG00000198793","uniprot_ids":["P42345"]}]}}"""
+
+def json_response(content: str):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content.encode("utf-8")
+    return response
+
+def hgnc_rest_response(url, **kwargs):
+    """Stand-in HGNC REST API: searches find every symbol but NOTAGENE*, and fetches return a record."""
+    query = url.rsplit("/", 1)[1]
+    if "/search/" in url:
+        symbols = [term.split(":", 1)[1].strip('"') for term in query.split("+OR+")]
+        docs = [{"hgnc_id": f"HGNC:{symbol}", "symbol": symbol, "score": 1.0}
+                for symbol in symbols if not symbol.startswith("NOTAGENE")]
+    else:
+        docs = [] if query.startswith("NOTAGENE") else [
+            {"hgnc_id": f"HGNC:{query}", "symbol": query, "name": f"{query} gene", "alias_symbol": [f"{query}A"]}]
+    return json_response(json.dumps({"response": {"numFound": len(docs), "docs": docs}}))
+
+# Test enrichment against HGNC's documented search and fetch responses
+@patch("paper2kb.http_client.requests.Session.get")
+def test_enrich_from_documented_responses(mock_get):
+    def hgnc(url, **kwargs):
+        if url.startswith("https://rest.genenames.org/search/"):
+            return json_response(HGNC_SEARCH_RESPONSE)
+        if url == "https://rest.genenames.org/fetch/symbol/MTOR":
+            return json_response(HGNC_FETCH_MTOR_RESPONSE)
+        return json_response('{"responseHeader":{"status":0,"QTime":1},"response":{"numFound":0,"start":0,"docs":[]}}')
+    mock_get.side_effect = hgnc
+
+    enriched = enrich_with_hgnc([{"symbol": "MTOR"}, {"symbol": "FAKEGENE"}, {"symbol": "TP53"}])
+
+    urls = [call.args[0] for call in mock_get.call_args_list]
+    assert urls[0] == "https://rest.genenames.org/search/symbol:FAKEGENE+OR+symbol:MTOR+OR+symbol:TP53"
+    assert sorted(urls[1:]) == ["https://rest.genenames.org/fetch/symbol/MTOR", "https://rest.genenames.org/fetch/symbol/TP53"]
+    assert enriched[0]["hgnc_id"] == "HGNC:3942"
+    assert enriched[0]["alias_symbol"] == ["RAFT1", "RAPT1", "FRAP", "FRAP2"]
+    assert enriched[0]["ensembl_gene_id"] == "ENSG00000198793"
+    assert enriched[1]["hgnc_id"] is None
+
+# Test that repeated symbols are searched once, in OR'd batches, and only the hits are fetched
+@patch("paper2kb.http_client.requests.Session.get", side_effect=hgnc_rest_response)
+def test_enrich_batches_unique_symbols(mock_get):
+    symbols = [f"NOTAGENE{i}" for i in range(98)] + ["GENE1", "GENE2"]
+    entries = [{"symbol": symbol} for symbol in symbols * 2]
+
+    enriched = enrich_with_hgnc(entries)
+
+    assert mock_get.call_count == 2 + 2    # ceil(100 / 50) searches + GENE1 and GENE2 fetched
+    assert enriched[98]["hgnc_id"] == enriched[198]["hgnc_id"] == "HGNC:GENE1"
+    assert enriched[0]["hgnc_id"] is None
+    enriched[99]["alias_symbol"].append("EXTRA")
+    assert enriched[199]["alias_symbol"] == ["GENE2A"]    # entries do not share lists
+
+# Test that symbols with punctuation are quoted in the search query
+@patch("paper2kb.http_client.requests.Session.get", side_effect=hgnc_rest_response)
+def test_search_query_quotes_symbols(mock_get):
+    enrich_with_hgnc([{"symbol": "HLA-A"}, {"symbol": "MTOR"}])
+
+    assert mock_get.call_args_list[0].args[0] == 'https://rest.genenames.org/search/symbol:"HLA-A"+OR+symbol:MTOR'
+
+# Test that the symbols of a failed search are fetched one by one
+@patch("paper2kb.http_client.requests.Session.get")
+def test_failed_search_falls_back_to_single_lookups(mock_get):
+    def search_down(url, **kwargs):
+        if "/search/" in url:
+            raise requests.exceptions.ConnectionError("search unavailable")
+        return hgnc_rest_response(url, **kwargs)
+    mock_get.side_effect = search_down
+
+    enriched = enrich_with_hgnc([{"symbol": "GENE1"}, {"symbol": "NOTAGENE"}])
+
+    assert mock_get.call_count == 1 + 2
+    assert enriched[0]["name"] == "GENE1 gene"
+    assert enriched[1]["hgnc_id"] is None
@@ -0,0 +1,62 @@
+import os
+import pytest
+from paper2kb.hgnc_index import HGNCIndex, build_hgnc_index, compile_hgnc_reference, load_hgnc_index, open_hgnc_index
+
+HGNC_TSV = (
+    "hgnc_id\tsymbol\tname\tlocus_group\talias_symbol\tprev_symbol\tensembl_gene_id\n"
+    "HGNC:3942\tMTOR\tmechanistic target of rapamycin kinase\tprotein-coding gene\t\"RAFT1|RAPT1|FRAP\"\t\"FRAP1|FRAP2\"\tENSG00000198793\n"
+    "HGNC:11998\tTP53\ttumor protein p53\tprotein-coding gene\tP53\t\tENSG00000141510\n"
+    "HGNC:4931\tHLA-A\tmajor histocompatibility complex, class I, A\tprotein-coding gene\t\t\"HLAA\"\tENSG00000206503\n"
+)
+
+@pytest.fixture
+def hgnc_tsv(tmp_path):
+    path = tmp_path / "hgnc_complete_set.txt"
+    path.write_text(HGNC_TSV, encoding="utf-8")
+    return str(path)
+
+def test_compiled_index_lookups(hgnc_tsv):
+    index = HGNCIndex(compile_hgnc_reference(hgnc_tsv))
+
+    assert len(index) == 3
+    assert "MTOR" in index.symbols and "RAFT1" not in index.symbols
+    assert index.aliases["RAPT1"] == "MTOR"
+    assert index.previous["FRAP1"] == "MTOR"
+    assert index.resolve("p53") == "TP53"
+    assert index.resolve("XYZGENE") is None
+
+    record = index.get("mtor")
+    assert record["hgnc_id"] == "HGNC:3942"
+    assert record["ensembl_gene_id"] == "ENSG00000198793"
+    assert record["alias_symbol"] == ["RAFT1", "RAPT1", "FRAP"]
+    assert ("HLA-A", "HLA-A") in set(index.multi_token_names())
+
+def test_built_index_is_memory_mapped_and_reused(hgnc_tsv):
+    index_path = build_hgnc_index(hgnc_tsv)
+    assert index_path.endswith("hgnc_complete_set.idx")
+
+    index = load_hgnc_index(hgnc_tsv)
+    assert index.version == open_hgnc_index(index_path).version
+    assert sorted(index.symbols) == ["HLA-A", "MTOR", "TP53"]
+
+def test_stale_index_falls_back_to_tsv(hgnc_tsv):
+    build_hgnc_index(hgnc_tsv)
+    with open(hgnc_tsv, "a", encoding="utf-8") as f:
+        f.write("HGNC:1100\tBRCA1\tBRCA1 DNA repair associated\tprotein-coding gene\t\t\tENSG00000012048\n")
+
+    assert "BRCA1" in load_hgnc_index(hgnc_tsv).symbols
+
+def test_index_is_used_without_its_tsv(hgnc_tsv):
+    build_hgnc_index(hgnc_tsv)
+    os.remove(hgnc_tsv)
+
+    assert sorted(load_hgnc_index(hgnc_tsv).symbols) == ["HLA-A", "MTOR", "TP53"]
+
+def test_rejects_other_format_versions(hgnc_tsv, tmp_path):
+    data = bytearray(compile_hgnc_reference(hgnc_tsv))
+    data[8] = 99  # format version field
+    path = tmp_path / "other.idx"
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError):
+        open_hgnc_index(str(path))
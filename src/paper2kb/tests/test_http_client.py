@@ -0,0 +1,125 @@
+import contextvars
+import io
+import json
+import threading
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from paper2kb import extract_genes, http_client
+from paper2kb.get_hgnc_metadata import enrich_with_hgnc
+
+def make_response(payload, status_code=200, url="https://rest.genenames.org/fetch/symbol/MTOR"):
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response._content = json.dumps(payload).encode("utf-8")
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+@pytest.fixture
+def http_cache(tmp_path):
+    cache = http_client.enable_http_cache(str(tmp_path))
+    http_client._SERVICE_STATS.clear()
+    yield cache
+    http_client.disable_http_cache()
+
+# Test that a repeated lookup is answered from disk and counted per service
+@patch("paper2kb.http_client.requests.Session.get")
+def test_repeated_get_is_served_from_cache(mock_get, http_cache, monkeypatch):
+    monkeypatch.setattr(extract_genes, "HGNC_INDEX", None)    # enrich over REST, not a loaded reference
+    mock_get.return_value = make_response({"response": {"docs": [{"hgnc_id": "HGNC:3942", "name": "MTOR"}]}})
+
+    first = enrich_with_hgnc([{"symbol": "MTOR"}])
+    second = enrich_with_hgnc([{"symbol": "MTOR"}])
+
+    assert first == second and first[0]["hgnc_id"] == "HGNC:3942"
+    mock_get.assert_called_once()
+    stats = http_client.http_cache_stats()
+    assert stats["services"] == {"hgnc": {"hits": 1, "misses": 1}}
+    assert stats["writes"] == 1
+
+# Test that the context's throttle runs for network requests but not for cache hits
+@patch("paper2kb.http_client.requests.Session.get", return_value=make_response({"ok": True}))
+def test_throttle_skips_cache_hits(mock_get, http_cache):
+    throttled = []
+
+    def fetch_twice():
+        http_client.set_throttle(throttled.append)
+        for _ in range(2):
+            http_client.get("https://www.ebi.ac.uk/europepmc/webservices/rest/1/fullTextXML")
+
+    contextvars.copy_context().run(fetch_twice)
+
+    assert throttled == ["europepmc"]
+    assert mock_get.call_count == 1
+
+# Test that POST bodies are part of the key and server errors are not cached
+@patch("paper2kb.http_client.requests.Session.post")
+def test_post_keyed_by_body(mock_post, http_cache):
+    url = "https://api.platform.opentargets.org/api/v4/graphql"
+    mock_post.side_effect = lambda *args, **kwargs: make_response({"data": kwargs["json"]}, url=url)
+
+    assert http_client.post(url, json={"query": "a"}).json() == {"data": {"query": "a"}}
+    assert http_client.post(url, json={"query": "b"}).json() == {"data": {"query": "b"}}
+    assert http_client.post(url, json={"query": "a"}).json() == {"data": {"query": "a"}}
+    assert mock_post.call_count == 2
+
+    mock_post.side_effect = None
+    mock_post.return_value = make_response({}, status_code=502, url=url)
+    http_client.post(url, json={"query": "c"})
+    http_client.post(url, json={"query": "c"})
+    assert mock_post.call_count == 4
+
+# Test that Entrez results keep their binary/text handle type through the cache
+@patch("paper2kb.http_client.Entrez.efetch")
+def test_entrez_results_are_cached(mock_efetch, http_cache):
+    mock_efetch.return_value = io.BytesIO(b"<pmc-articleset>\xce\xb1-synuclein</pmc-articleset>")
+
+    first = http_client.entrez("efetch", db="pmc", id="123", retmode="xml").read()
+    second = http_client.entrez("efetch", db="pmc", id="123", retmode="xml").read()
+
+    assert first == second == b"<pmc-articleset>\xce\xb1-synuclein</pmc-articleset>"
+    mock_efetch.assert_called_once()
+    assert http_client.http_cache_stats()["services"]["entrez"] == {"hits": 1, "misses": 1}
+
+class FlakyService(BaseHTTPRequestHandler):
+    """Answers 503 (then 429 with Retry-After) before succeeding, over one keep-alive connection."""
+    protocol_version = "HTTP/1.1"
+    failures = []
+    connections = set()
+
+    def do_GET(self):
+        type(self).connections.add(self.client_address)
+        status, headers = type(self).failures.pop(0) if type(self).failures else (200, {})
+        payload = json.dumps({"ok": status == 200}).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+# Test that transient 503/429 answers are retried (honoring Retry-After) on pooled connections
+def test_transient_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_BACKOFF", 0)
+    http_client.close_session()
+    FlakyService.failures = [(503, {}), (429, {"Retry-After": "0"})]
+    FlakyService.connections = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyService)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/lookup"
+
+    try:
+        assert http_client.get(url).json() == {"ok": True}
+        assert http_client.get(url).json() == {"ok": True}
+        assert len(FlakyService.connections) == 1    # every request reused one connection
+    finally:
+        http_client.close_session()    # drop the keep-alive connection so the server can stop
+        server.shutdown()
+
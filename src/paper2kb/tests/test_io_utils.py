@@ -0,0 +1,90 @@
+import gzip
+import io
+import tarfile
+from unittest.mock import patch
+
+from paper2kb import io_utils
+from paper2kb.io_utils import (
+    disable_pdf_cache, enable_pdf_cache, extract_text_from_pdf, infer_output_path, iter_corpus, iter_pdf_pages,
+    iter_xml_articles,
+)
+
+def make_article(jats_article, pmcid):
+    return jats_article.replace("<article-meta>", f'<article-meta><article-id pub-id-type="pmc">{pmcid}</article-id>')
+
+def make_pdf(path, pages):
+    import fitz
+
+    with fitz.open() as doc:
+        for number in range(pages):
+            doc.new_page().insert_text((72, 72), f"Page {number} mentions MTOR")
+        doc.save(path)
+    return path
+
+def add_member(archive, name, data: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    archive.addfile(info, io.BytesIO(data))
+
+# Test that articles are streamed out of an OA package without unpacking it
+def test_iter_xml_articles_from_tarball(tmp_path, jats_article):
+    package = tmp_path / "oa_comm_xml.PMC000xxxxxx.baseline.tar.gz"
+    with tarfile.open(package, "w:gz") as archive:
+        add_member(archive, "PMC000xxxxxx/PMC111.xml", make_article(jats_article, "111").encode("utf-8"))
+        add_member(archive, "PMC000xxxxxx/PMC222.nxml.gz", gzip.compress(make_article(jats_article, "PMC222").encode()))
+        add_member(archive, "PMC000xxxxxx/README.txt", b"not an article")
+
+    articles = list(iter_xml_articles(str(package), with_sections=True))
+
+    assert [article_id for article_id, _, _ in articles] == ["PMC111", "PMC222"]
+    article_id, text, sections = articles[0]
+    assert "The MTOR gene is associated with tubulopathy" in text
+    assert "commercial kit" not in text       # methods skipped by default
+    assert sections[0] == (0, len("MTOR variants in tubulopathy"), "title")
+    assert list(tmp_path.iterdir()) == [package]
+
+# Test that a directory mixes text files and XML articles, named by path when IDs are missing
+def test_iter_corpus_directory(tmp_path, jats_article):
+    (tmp_path / "notes.txt").write_text("BRCA1 is linked to breast cancer.", encoding="utf-8")
+    (tmp_path / "xml").mkdir()
+    (tmp_path / "xml" / "paper.xml").write_text(jats_article, encoding="utf-8")
+
+    documents = list(iter_corpus(str(tmp_path), skip_sections=()))
+
+    assert [(doc_id, sections is None) for doc_id, _, sections in documents] == [
+        ("notes.txt", True), ("xml/paper.xml", False)
+    ]
+    assert "commercial kit" in documents[1][1]
+
+def test_infer_output_path_for_archives(tmp_path):
+    assert infer_output_path(corpus="data/oa_comm.tar.gz", outdir=str(tmp_path)).endswith("oa_comm_corpus.json")
+    assert infer_output_path(corpus="pmids.txt", outdir=str(tmp_path)).endswith("pmids_corpus.json")
+
+# Test that page-parallel extraction streams the same pages, in order, as a sequential pass
+def test_iter_pdf_pages_parallel_matches_sequential(tmp_path, monkeypatch):
+    monkeypatch.setattr(io_utils, "PDF_PAGES_PER_TASK", 3)
+    monkeypatch.setattr(io_utils, "PDF_PARALLEL_MIN_PAGES", 4)
+    pdf = make_pdf(str(tmp_path / "supplement.pdf"), 10)
+
+    parallel = list(iter_pdf_pages(pdf, workers=2))
+
+    assert parallel == list(iter_pdf_pages(pdf, workers=1))
+    assert [page.strip() for page in parallel] == [f"Page {n} mentions MTOR" for n in range(10)]
+    with open(pdf, "rb") as f:
+        uploaded = io.BytesIO(f.read())
+    assert extract_text_from_pdf(uploaded, workers=2) == "\n".join(parallel)
+
+# Test that a PDF seen before (even as an upload of the same bytes) is not extracted again
+def test_pdf_text_cached_by_content(tmp_path):
+    pdf = make_pdf(str(tmp_path / "paper.pdf"), 3)
+    enable_pdf_cache(str(tmp_path / "cache"))
+    try:
+        first = extract_text_from_pdf(pdf)
+        with open(pdf, "rb") as f, patch("paper2kb.io_utils._extract_pdf_pages", side_effect=AssertionError("re-extracted")):
+            assert extract_text_from_pdf(io.BytesIO(f.read())) == first
+        assert "Page 2 mentions MTOR" in first
+
+        make_pdf(pdf, 4)    # changed contents are extracted afresh
+        assert "Page 3 mentions MTOR" in extract_text_from_pdf(pdf)
+    finally:
+        disable_pdf_cache()
@@ -0,0 +1,101 @@
+from paper2kb.jats import classify_section, iter_articles, parse_article_set, parse_jats, render_document
+
+def test_parse_jats_structure(jats_article):
+    document = parse_jats(jats_article)
+
+    assert document["title"] == "MTOR variants in tubulopathy"
+    assert document["abstract"] == "We describe MTOR variants in two families."
+    assert [(s["title"], s["type"]) for s in document["sections"]] == [
+        ("Introduction", "introduction"),
+        ("Methods", "methods"),
+        ("Results", "results"),
+        ("Segregation analysis", "results"),
+        ("", "acknowledgements"),
+        ("", "references"),
+    ]
+    assert document["tables"][0]["caption"] == "Variants found"
+    assert "COL4A3 | c.1A>G" in document["tables"][0]["text"]
+    assert document["figures"][0]["caption"] == "Pedigree of family 1."
+
+def test_render_skips_filtered_sections(jats_article):
+    text, spans = render_document(parse_jats(jats_article))
+
+    assert "commercial kit" not in text      # methods
+    assert "APOL1 consortium" not in text    # acknowledgements
+    assert "TP53 in cancer" not in text      # references
+    assert "COL4A3 | c.1A>G" in text
+    for start, end, section_type in spans:
+        assert text[start:end]
+    assert [section_type for _, _, section_type in spans] == [
+        "title", "abstract", "introduction", "results", "results", "table", "figure"
+    ]
+
+def test_tables_follow_their_section():
+    article = """<article><body>
+      <sec sec-type="methods"><title>Methods</title><p>Primers are listed below.</p>
+        <table-wrap><caption><p>Primers</p></caption><table><tr><td>MTOR-F</td><td>ACGT</td></tr></table></table-wrap>
+      </sec>
+      <sec><title>Results</title><p>COL4A3 variants were found.</p>
+        <table-wrap><caption><p>Variants</p></caption><table><tr><td>COL4A3</td><td>c.1A&gt;G</td></tr></table></table-wrap>
+        <p>APOL1 was not associated.</p>
+      </sec>
+    </body></article>"""
+    document = parse_jats(article)
+    text, spans = render_document(document)
+
+    assert [(table["section"], table["position"]) for table in document["tables"]] == [("methods", 1), ("results", 3)]
+    assert "MTOR-F" not in text      # table inside the skipped methods section
+    assert text == "COL4A3 variants were found.\n\nVariants\nCOL4A3 | c.1A>G\n\nAPOL1 was not associated."
+    assert [section_type for _, _, section_type in spans] == ["results", "table", "results"]
+    assert "MTOR-F" in render_document(document, skip_sections=())[0]
+
+def test_render_keeps_all_sections_when_requested(jats_article):
+    text, _ = render_document(parse_jats(jats_article), skip_sections=())
+    assert "commercial kit" in text and "TP53 in cancer" in text
+
+def test_classify_section():
+    assert classify_section("Materials and Methods") == "methods"
+    assert classify_section("Results and Discussion") == "results"
+    assert classify_section("Conflict of interest statement") == "competing_interests"
+    assert classify_section("Patient cohort") == "body"
+    assert classify_section("2.1 Patients and methods") == "methods"
+    assert classify_section("Authors’ contributions") == "author_contributions"
+    assert classify_section("References") == "references"
+
+def test_classify_section_matches_whole_words():
+    assert classify_section("Contributions of rare variants to disease risk") == "body"
+    assert classify_section("Reference gene selection") == "body"
+    assert classify_section("Supplementary materials") == "supplementary"
+    assert classify_section("Availability of data and materials") == "data_availability"
+    assert classify_section("Preferences of patients") == "body"
+    assert classify_section("Reference gene selection", sec_type="results") == "results"
+    assert classify_section("Study cohort", sec_type="materials|methods") == "methods"
+    assert classify_section("Results", sec_type="display-objects") == "results"
+
+def test_parse_article_set_splits_articles(jats_article):
+    first = jats_article.replace('<?xml version="1.0"?>', "").replace(
+        "<article-meta>", '<article-meta><article-id pub-id-type="pmc">111</article-id>')
+    second = """<article><front><article-meta>
+      <article-id pub-id-type="pmid">222</article-id><article-id pub-id-type="pmcid">PMC222</article-id>
+      <title-group><article-title>APOL1 and kidney disease</article-title></title-group>
+    </article-meta></front><body><p>APOL1 variants increase risk.</p></body></article>"""
+    documents = parse_article_set(f"<pmc-articleset>{first}{second}</pmc-articleset>")
+
+    assert [document["ids"] for document in documents] == [{"pmc": "111"}, {"pmid": "222", "pmcid": "PMC222"}]
+    assert documents[0]["title"] == "MTOR variants in tubulopathy"
+    assert len(documents[0]["tables"]) == 1 and documents[1]["tables"] == []
+    assert documents[1]["sections"][0]["text"] == "APOL1 variants increase risk."
+
+def test_iter_articles_streams_local_file(tmp_path, jats_article):
+    article = jats_article.replace('<?xml version="1.0"?>', "").replace(
+        "</back>", "</back><sub-article><body><p>Reviewer report on MTOR.</p></body></sub-article>")
+    path = tmp_path / "bulk.xml"
+    path.write_text(f"<pmc-articleset>{article * 3}</pmc-articleset>", encoding="utf-8")
+
+    documents = list(iter_articles(path))
+
+    assert len(documents) == 3
+    assert all(document == documents[0] for document in documents)
+    assert documents[0] == parse_jats(jats_article)      # sub-articles are left out
+    assert parse_jats(path.open("rb"))["title"] == "MTOR variants in tubulopathy"
+
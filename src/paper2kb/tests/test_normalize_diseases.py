@@ -15,7 +15,7 @@ def mock_mondo_response():
         }
     }
 
-@patch("paper2kb.normalize_diseases.requests.get")
+@patch("paper2kb.http_client.requests.Session.get")
 def test_disease_normalization_success(mock_get, mock_mondo_response):
     """Test that a known disease gets normalized with correct MONDO ID."""
     mock_get.return_value.json.return_value = mock_mondo_response
@@ -28,7 +28,7 @@ def test_disease_normalization_success(mock_get, mock_mondo_response):
     assert result["label"] == "Tubulopathy"
     assert result["mondo_id"] == "MONDO:0012345"
 
-@patch("paper2kb.normalize_diseases.requests.get")
+@patch("paper2kb.http_client.requests.Session.get")
 def test_disease_not_found(mock_get):
     """Test fallback behavior when MONDO returns no matches."""
     mock_get.return_value.json.return_value = {"response": {"docs": []}}
@@ -40,7 +40,7 @@ def test_disease_not_found(mock_get):
     assert result["label"] == "unknown condition"
     assert result["mondo_id"] is None
 
-@patch("paper2kb.normalize_diseases.requests.get", side_effect=RequestException("server down"))
+@patch("paper2kb.http_client.requests.Session.get", side_effect=RequestException("server down"))
 def test_disease_api_failure(mock_get):
     """Test graceful handling of request exceptions (e.g., timeout, server errors)."""
     mentions = [{"diseases": ["tubulopathy"]}]
@@ -0,0 +1,126 @@
+import json
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
+from paper2kb import opentargets_utils
+from paper2kb.opentargets_utils import build_association_store, get_opentargets_diseases, get_opentargets_diseases_batch
+
+def write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+@pytest.fixture
+def ot_store(tmp_path, monkeypatch):
+    """Small association store built from Open Targets-style JSON lines."""
+    associations = write_jsonl(tmp_path / "associations.json", [
+        {"targetId": "ENSG00000198793", "diseaseId": "MONDO_0004975", "score": 0.4},
+        {"targetId": "ENSG00000198793", "diseaseId": "EFO_0000407", "score": 0.7},
+        {"targetId": "ENSG00000141510", "diseaseId": "MONDO_0007254", "score": 0.9},
+    ])
+    diseases = write_jsonl(tmp_path / "diseases.json", [
+        {"id": "MONDO_0004975", "name": "Alzheimer disease"},
+        {"id": "EFO_0000407", "name": "Dilated Cardiomyopathy"},
+        {"id": "MONDO_0007254", "name": "Breast Cancer"},
+    ])
+    targets = write_jsonl(tmp_path / "targets.json", [
+        {"id": "ENSG00000198793", "approvedSymbol": "MTOR"},
+        {"id": "ENSG00000141510", "approvedSymbol": "TP53"},
+    ])
+
+    db_path = str(tmp_path / "opentargets_associations.db")
+    assert build_association_store(associations, db_path, diseases_path=diseases, targets_path=targets) == 3
+    monkeypatch.setattr(opentargets_utils, "OT_STORE_PATH", db_path)
+    return db_path
+
+# Test that the offline store answers lookups without any HTTP request
+@patch("paper2kb.http_client.requests.Session.post", side_effect=AssertionError("network used"))
+@patch("paper2kb.http_client.requests.Session.get", side_effect=AssertionError("network used"))
+def test_store_used_instead_of_network(mock_get, mock_post, ot_store):
+    assert get_opentargets_diseases("MTOR") == ["dilated cardiomyopathy", "alzheimer disease"]
+    assert get_opentargets_diseases("BRCA1") == []
+    assert get_opentargets_diseases("unknown", ensembl_id="ENSG00000141510") == ["breast cancer"]
+
+# Test that the REST/GraphQL path is still used when no store exists
+@patch("paper2kb.http_client.requests.Session.get")
+def test_network_used_without_store(mock_get, tmp_path, monkeypatch):
+    monkeypatch.setattr(opentargets_utils, "OT_STORE_PATH", str(tmp_path / "missing.db"))
+    mock_get.return_value.status_code = 404
+
+    assert get_opentargets_diseases("MTOR") == []
+    mock_get.assert_called_once()
+
+class StandInOpenTargets(BaseHTTPRequestHandler):
+    """Minimal Open Targets GraphQL stand-in: mapIds plus aliased target queries."""
+    requests_seen = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        variables = body["variables"]
+        type(self).requests_seen.append(body)
+
+        if "terms" in variables:
+            mappings = [{"term": term, "hits": [] if term == "NOTAGENE" else
+                         [{"id": f"ENSG_{term}", "object": {"approvedSymbol": term}}]}
+                        for term in variables["terms"]]
+            data = {"mapIds": {"mappings": mappings}}
+        else:
+            rows = lambda ensembl_id: [{"disease": {"name": f"Disease {n} of {ensembl_id}"}} for n in range(variables["size"])]
+            data = {key: {"id": value, "associatedDiseases": {"rows": rows(value)}}
+                    for key, value in ((f"t{name[2:]}", value) for name, value in variables.items() if name.startswith("id"))}
+
+        payload = json.dumps({"data": data}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stand_in_server(tmp_path, monkeypatch):
+    StandInOpenTargets.requests_seen = []
+    server = HTTPServer(("127.0.0.1", 0), StandInOpenTargets)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(opentargets_utils, "OT_GRAPHQL_URL", f"http://127.0.0.1:{server.server_port}/graphql")
+    monkeypatch.setattr(opentargets_utils, "OT_STORE_PATH", str(tmp_path / "missing.db"))
+    yield StandInOpenTargets.requests_seen
+    server.shutdown()
+
+# Test that many genes are resolved and queried in a handful of batched requests
+def test_batch_lookup_uses_few_requests(stand_in_server):
+    symbols = [f"GENE{i}" for i in range(59)] + ["NOTAGENE"]
+    results = get_opentargets_diseases_batch(symbols, ensembl_ids={"GENE0": "ENSG_KNOWN"}, batch_size=25, page_size=2)
+
+    assert len(stand_in_server) == 1 + 3  # one mapIds query + ceil(59 / 25) target batches
+    assert stand_in_server[0]["variables"]["terms"] == symbols[1:]
+    assert results["GENE0"] == ["disease 0 of ensg_known", "disease 1 of ensg_known"]
+    assert results["GENE58"] == ["disease 0 of ensg_gene58", "disease 1 of ensg_gene58"]
+    assert results["NOTAGENE"] == []
+
+# Test that failed requests are reported apart from genes that simply have no diseases
+@patch("paper2kb.http_client.requests.Session.post")
+def test_batch_lookup_reports_failures(mock_post, tmp_path, monkeypatch):
+    monkeypatch.setattr(opentargets_utils, "OT_STORE_PATH", str(tmp_path / "missing.db"))
+    mock_post.return_value.status_code = 503
+    failed = []
+
+    results = get_opentargets_diseases_batch(["MTOR", "TP53"], ensembl_ids={"TP53": "ENSG00000141510"}, failed=failed)
+
+    assert results == {"MTOR": [], "TP53": []}
+    assert sorted(failed) == ["MTOR", "TP53"]
+
+# Test that rebuilding the store changes its version
+def test_store_version_tracks_rebuilds(ot_store, tmp_path):
+    version = opentargets_utils.association_store_version()
+    assert version is not None
+
+    associations = write_jsonl(tmp_path / "more.json", [{"targetId": "ENSG1", "targetSymbol": "ABC1", "diseaseId": "D1",
+                                                        "diseaseName": "Some disease", "score": 0.5}])
+    build_association_store(associations, ot_store)
+
+    assert opentargets_utils.association_store_version() != version
+    assert get_opentargets_diseases("ABC1") == ["some disease"]
@@ -13,9 +13,10 @@ import streamlit as st
 import pandas as pd
 
 # Core extraction and I/O modules
-from paper2kb.io_utils import extract_text_from_pdf, load_text_source
+from paper2kb.io_utils import enable_pdf_cache, extract_text_from_pdf, load_text_source
 from paper2kb.fetch_paper import fetch_paper_text
-from paper2kb.extract_genes import extract_gene_disease_mentions, load_hgnc_reference
+from paper2kb.extract_genes import enable_extraction_cache, extract_gene_disease_mentions, load_hgnc_reference
+from paper2kb.http_client import enable_http_cache
 from paper2kb.get_hgnc_metadata import enrich_with_hgnc
 from paper2kb.get_coordinates import add_coordinates
 from paper2kb.normalize_diseases import normalize_diseases
@@ -43,6 +44,9 @@ with st.expander("ℹ️ About Paper2KB", expanded=False):
 # Load HGNC reference table once per session
 if "hgnc_loaded" not in st.session_state:
     load_hgnc_reference("data/reference/hgnc_complete_set.txt")
+    enable_extraction_cache()
+    enable_http_cache()
+    enable_pdf_cache()
     st.session_state.hgnc_loaded = True
 
 # Toggle for hybrid vs ML-only extraction mode
@@ -58,6 +62,7 @@ input_method = st.radio("Choose Method", ["PMID", "Text Input", "PDF Upload"], h
 
 text = None
 source = None
+sections = None
 fetch_button = False
 
 if input_method == "PMID":
@@ -65,7 +70,8 @@ if input_method == "PMID":
     fetch_button = st.button("🔍 Fetch & Analyze")
     if fetch_button and pmid:
         with st.spinner("Fetching paper..."):
-            text, source = load_text_source(pmid=pmid, localfile=None)
+            # PMC and Europe PMC are raced so a slow NCBI response does not hold up the page
+            text, source, sections = load_text_source(pmid=pmid, localfile=None, return_sections=True, hedged=True)
 
 elif input_method == "Text Input":
     text = st.text_area("Paste Abstract or Full Text", height=300)
@@ -77,7 +83,8 @@ elif input_method == "PDF Upload":
     fetch_button = st.button("📄 Analyze PDF")
     if fetch_button and uploaded_pdf:
         with st.spinner("Extracting text from PDF..."):
-            text = extract_text_from_pdf(uploaded_pdf)
+            # In-process: forking PDF workers from the threaded Streamlit server is unsafe
+            text = extract_text_from_pdf(uploaded_pdf, workers=1)
             source = "PDF upload"
 
 # --- View existing database contents ---
@@ -108,7 +115,8 @@ if fetch_button and text:
 
     with st.spinner("🔬 Extracting gene and disease mentions..."):
         t0 = time.time()
-        mentions, skipped = extract_gene_disease_mentions(text, use_hybrid=use_hybrid, return_skipped=True)
+        mentions, skipped = extract_gene_disease_mentions(text, use_hybrid=use_hybrid, return_skipped=True,
+                                                          section_spans=sections)
         st.info(f"⏱️ Extraction took {time.time() - t0:.2f}s")
 
     if not mentions: